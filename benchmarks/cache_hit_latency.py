@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Benchmark the hit latency of `caching.cache` against `functools.lru_cache`.
+
+Run it from the root of the repo:
+
+    python benchmarks/cache_hit_latency.py
+
+Every cached function is called once to fill its cache, and then the time of a
+cache hit is measured for a few different ways of calling it.
+'''
+
+import functools
+import sys
+import timeit
+
+sys.path.insert(0, '.')
+
+from python_toolbox import caching
+from python_toolbox.sleek_reffing import SleekCallArgs
+
+
+def f(a, b=2, *args, c=3, **kwargs):
+    return a
+
+
+calls = (
+    ('f(1)', (1,), {}),
+    ('f(1, 2)', (1, 2), {}),
+    ('f(b=2, a=1)', (), {'b': 2, 'a': 1}),
+    ('f(1, 2, 3, c=4, d=5)', (1, 2, 3), {'c': 4, 'd': 5}),
+)
+
+cached_functions = (
+    ('functools.lru_cache(None)', functools.lru_cache(None)(f)),
+    ('functools.lru_cache(128)', functools.lru_cache(128)(f)),
+    ('caching.cache()', caching.cache()(f)),
+    ('caching.cache(max_size=128)', caching.cache(max_size=128)(f)),
+    ('caching.cache(time_to_keep={\'days\': 1})',
+     caching.cache(time_to_keep={'days': 1})(f)),
+)
+
+
+def get_hit_latency(function, args, kwargs, number):
+    '''Get the average time, in microseconds, of one call to `function`.'''
+    function(*args, **kwargs)
+    timer = timeit.Timer(lambda: function(*args, **kwargs))
+    return min(timer.repeat(repeat=5, number=number)) / number * 10 ** 6
+
+
+def main(number=2000):
+    introspecting_key = lambda *args, **kwargs: \
+                                         SleekCallArgs({}, f, *args, **kwargs)
+    name_width = max(len(name) for name, _ in cached_functions)
+    for call_name, args, kwargs in calls:
+        print(call_name)
+        for name, cached_function in cached_functions:
+            latency = get_hit_latency(cached_function, args, kwargs, number)
+            print(f'    {name:<{name_width}}  {latency:7.2f} us')
+        latency = get_hit_latency(introspecting_key, args, kwargs, number)
+        print(f'    {"(introspecting key only)":<{name_width}}  '
+              f'{latency:7.2f} us')
+
+
+if __name__ == '__main__':
+    main()
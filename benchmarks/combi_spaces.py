@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Benchmark the `combi` spaces.
+
+Run it from the root of the repo:
+
+    python benchmarks/combi_spaces.py --output before.json
+    (make some changes)
+    python benchmarks/combi_spaces.py --output after.json --compare before.json
+
+For every allowed combination of `PermSpace` variations (see
+`combi.perming.variations`), and for `CombSpace`, `ProductSpace`, `ChainSpace`
+and `SelectionSpace`, at a few sizes, this times these operations:
+
+ - `len`: Creating the space and getting its length. (Lengths are cached on
+   the space, so we time a fresh space every time.)
+ - `getitem`: Getting an item by its index number.
+ - `index`: Getting the index number of an item.
+ - `iter`: Getting the next item while iterating on the space.
+ - `itertools`: Getting the next item from the equivalent `itertools`
+   iterator, where there is one, for comparison with `iter`.
+
+All times are in microseconds per operation. The results are printed as JSON,
+and with `--compare` the ratio to the times in an earlier JSON file is printed
+too.
+'''
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from python_toolbox.combi import (PermSpace, CombSpace, ProductSpace,
+                                  ChainSpace, SelectionSpace, Perm, Comb)
+from python_toolbox.combi.perming import variations
+
+
+class BenchmarkPerm(Perm):
+    '''A perm type for benchmarking typed perm spaces.'''
+
+class BenchmarkComb(Comb):
+    '''A comb type for benchmarking typed comb spaces.'''
+
+
+def make_perm_space(variation_selection, size):
+    '''
+    Make a `PermSpace` with the variations in `variation_selection`.
+
+    `size` is the length of the sequence. Returns `None` if the space can't
+    have these variations. (For example, a combination space that isn't
+    partial has just one item, so it can't be sliced.)
+    '''
+    if variation_selection.is_recurrent:
+        sequence = tuple('x%s' % (i // 2) for i in range(size))
+    elif variation_selection.is_rapplied:
+        sequence = tuple('x%s' % i for i in range(size))
+    else:
+        sequence = tuple(range(size))
+    kwargs = {}
+    n_elements = size
+    if variation_selection.is_partial:
+        n_elements = size - 2
+        if n_elements < 1:
+            return None
+        kwargs['n_elements'] = n_elements
+    if variation_selection.is_combination:
+        kwargs['is_combination'] = True
+    if variation_selection.is_dapplied:
+        kwargs['domain'] = tuple('d%s' % i for i in range(n_elements))
+    if variation_selection.is_fixed:
+        key = kwargs['domain'][0] if variation_selection.is_dapplied else 0
+        kwargs['fixed_map'] = {key: sequence[1]}
+    if variation_selection.is_degreed:
+        kwargs['degrees'] = (1, 3)
+    if variation_selection.is_typed:
+        kwargs['perm_type'] = BenchmarkComb if \
+                          variation_selection.is_combination else BenchmarkPerm
+
+    perm_space = PermSpace(sequence, **kwargs)
+    if variation_selection.is_sliced:
+        perm_space = perm_space[perm_space.length // 4:
+                                -(perm_space.length // 4) or None]
+    if not perm_space or perm_space.variation_selection != \
+                                                           variation_selection:
+        return None
+    return perm_space
+
+
+def iterate_cases(sizes):
+    '''
+    Iterate over all the benchmark cases.
+
+    Yields tuples of `(name, size, make_space, make_itertools_iterator)`,
+    where `make_itertools_iterator` is `None` if there's no equivalent
+    `itertools` iterator.
+    '''
+    Variation = variations.Variation
+    itertools_equivalents = {
+        frozenset(): lambda size: itertools.permutations(range(size)),
+        frozenset((Variation.PARTIAL,)):
+                 lambda size: itertools.permutations(range(size), size - 2),
+        frozenset((Variation.PARTIAL, Variation.COMBINATION)):
+                 lambda size: itertools.combinations(range(size), size - 2),
+    }
+    variation_selection_space = variations.variation_selection_space
+    for variation_selection in \
+                        variation_selection_space.allowed_variation_selections:
+        name = 'PermSpace(%s)' % (
+            ', '.join(variation.value for variation in
+                      variation_selection.variations) or 'pure'
+        )
+        itertools_equivalent = itertools_equivalents.get(
+            frozenset(variation_selection.variations)
+        )
+        for size in sizes:
+            if make_perm_space(variation_selection, size) is None:
+                continue
+            yield (
+                name, size,
+                lambda variation_selection=variation_selection, size=size:
+                                   make_perm_space(variation_selection, size),
+                None if itertools_equivalent is None else
+                   lambda itertools_equivalent=itertools_equivalent, size=size:
+                                                   itertools_equivalent(size)
+            )
+
+    for size in sizes:
+        yield ('CombSpace', size,
+               lambda size=size: CombSpace(size, size // 2),
+               lambda size=size: itertools.combinations(range(size),
+                                                        size // 2))
+        yield ('ProductSpace', size,
+               lambda size=size: ProductSpace((range(size),) * 4),
+               lambda size=size: itertools.product(range(size), repeat=4))
+        yield ('ChainSpace', size,
+               lambda size=size: ChainSpace((range(size ** 3), 'abc') * size),
+               lambda size=size: itertools.chain(
+                                          *((range(size ** 3), 'abc') * size)))
+        yield ('SelectionSpace', size,
+               lambda size=size: SelectionSpace(range(size)), None)
+
+
+def time_per_operation(function, n_operations, time_budget):
+    '''
+    Time `function`, which does `n_operations` operations, in microseconds.
+
+    `function` is called repeatedly until `time_budget` seconds pass, and the
+    best time is taken.
+    '''
+    best_time = float('inf')
+    end_time = time.perf_counter() + time_budget
+    while True:
+        start_time = time.perf_counter()
+        function()
+        now = time.perf_counter()
+        best_time = min(best_time, now - start_time)
+        if now >= end_time:
+            break
+    return best_time / n_operations * 10 ** 6
+
+
+def benchmark_case(make_space, make_itertools_iterator, time_budget,
+                   n_samples=50, n_iterated_items=1000):
+    '''Benchmark a single case, returning a `dict` of operation timings.'''
+    space = make_space()
+    length = space.length
+    random_ = random.Random(0)
+    indices = [random_.randrange(length) for _ in range(n_samples)]
+    items = [space[i] for i in indices]
+    n_iterated_items = min(n_iterated_items, length)
+
+    results = {
+        'len': time_per_operation(lambda: make_space().length, 1,
+                                  time_budget),
+        'getitem': time_per_operation(
+            lambda: [space[i] for i in indices], n_samples, time_budget
+        ),
+        'index': time_per_operation(
+            lambda: [space.index(item) for item in items], n_samples,
+            time_budget
+        ),
+        'iter': time_per_operation(
+            lambda: tuple(itertools.islice(space, n_iterated_items)),
+            n_iterated_items, time_budget
+        ),
+    }
+    if make_itertools_iterator is not None:
+        results['itertools'] = time_per_operation(
+            lambda: tuple(itertools.islice(make_itertools_iterator(),
+                                           n_iterated_items)),
+            n_iterated_items, time_budget
+        )
+    return results
+
+
+def get_commit():
+    '''Get the current git commit, or `None` if it can't be found.'''
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the `combi` spaces.'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=(5, 8, 12),
+                        help='Sizes of the spaces to benchmark.')
+    parser.add_argument('--time-budget', type=float, default=0.02,
+                        help='Seconds to spend timing each operation.')
+    parser.add_argument('--filter', default='',
+                        help='Benchmark only cases whose name contains this.')
+    parser.add_argument('--output', help='File to write the JSON results to. '
+                                         '(Default: standard output.)')
+    parser.add_argument('--compare', help='JSON results of an earlier run to '
+                                          'compare to.')
+    options = parser.parse_args(arguments)
+
+    cases = []
+    for name, size, make_space, make_itertools_iterator in \
+                                                  iterate_cases(options.sizes):
+        if options.filter not in name:
+            continue
+        cases.append({
+            'name': name,
+            'size': size,
+            'microseconds': benchmark_case(make_space, make_itertools_iterator,
+                                           options.time_budget),
+        })
+
+    results = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'cases': cases,
+    }
+    results_json = json.dumps(results, indent=2)
+    if options.output is None:
+        print(results_json)
+    else:
+        with open(options.output, 'w') as file:
+            file.write(results_json)
+
+    if options.compare is not None:
+        with open(options.compare) as file:
+            old_results = json.load(file)
+        old_cases = {(case['name'], case['size']): case
+                     for case in old_results['cases']}
+        print('Ratio of new time to old time (below 1 is faster):',
+              file=sys.stderr)
+        for case in cases:
+            old_case = old_cases.get((case['name'], case['size']))
+            if old_case is None:
+                continue
+            ratios = ', '.join(
+                '%s %.2f' % (operation, microseconds /
+                                        old_case['microseconds'][operation])
+                for operation, microseconds in case['microseconds'].items()
+                if old_case['microseconds'].get(operation)
+            )
+            print('    %s, size %s: %s' % (case['name'], case['size'], ratios),
+                  file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
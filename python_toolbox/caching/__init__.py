@@ -7,4 +7,6 @@
 
 from .decorators import cache
 from .cached_type import CachedType
-from .cached_property import CachedProperty
\ No newline at end of file
+from .cached_property import CachedProperty
+from .cache_statistics import CacheInfo, CacheStatistics
+from .sqlite_cache_backend import SqliteCacheBackend
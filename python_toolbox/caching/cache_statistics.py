@@ -0,0 +1,98 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `CacheStatistics` class.
+
+See its documentation for more details.
+'''
+
+import collections
+import datetime as datetime_module
+import time
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo',
+    ('hits', 'misses', 'evictions', 'expirations', 'size', 'miss_time')
+)
+CacheInfo.__doc__ = '''
+A snapshot of the statistics of a cache.
+
+`hits` and `misses` count lookups in the cache, `evictions` counts entries that
+were thrown away to keep the cache under its maximum size, `expirations` counts
+entries that were thrown away because they expired, `size` is the number of
+entries in the cache and `miss_time` is the total time in seconds that was
+spent computing values on misses.
+'''
+
+
+class CacheStatistics:
+    '''
+    Counters of the hits, misses, evictions and expirations of a cache.
+
+    The cache increments the counters directly, and `get_info` returns a
+    `CacheInfo` snapshot of them.
+
+    You may optionally give a `publisher`, which is a callable that will be
+    called with a `CacheInfo` snapshot at most once every
+    `publishing_interval`. (A `timedelta` object, or a `dict` of keyword
+    arguments to create one.)
+    There's no background thread; the cache calls `publish_if_due` when it's
+    being used, so nothing is published while the cache is idle.
+    '''
+    def __init__(self, get_size=None, publisher=None,
+                 publishing_interval={'minutes': 1}):
+        self.get_size = get_size
+        '''Function that returns the number of entries in the cache.'''
+
+        self.publisher = publisher
+        '''Callable that gets `CacheInfo` snapshots periodically, or `None`.'''
+
+        if not isinstance(publishing_interval, datetime_module.timedelta):
+            try:
+                publishing_interval = \
+                               datetime_module.timedelta(**publishing_interval)
+            except Exception as exception:
+                raise TypeError(
+                    '`publishing_interval` must be either a `timedelta` '
+                    'object or a dict of keyword arguments for constructing '
+                    'a `timedelta` object.'
+                ) from exception
+        self.publishing_interval = publishing_interval.total_seconds()
+        '''Minimal number of seconds between calls to the publisher.'''
+
+        self.reset()
+
+
+    def reset(self):
+        '''Reset all the counters to zero.'''
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.miss_time = 0.0
+        self._next_publishing_time = \
+                                   time.monotonic() + self.publishing_interval
+
+
+    def get_info(self):
+        '''Get a `CacheInfo` snapshot of the statistics.'''
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            size=(self.get_size() if self.get_size is not None else None),
+            miss_time=self.miss_time,
+        )
+
+
+    def publish_if_due(self):
+        '''Call the publisher, if `publishing_interval` has passed.'''
+        if self.publisher is None:
+            return
+        now = time.monotonic()
+        if now >= self._next_publishing_time:
+            self._next_publishing_time = now + self.publishing_interval
+            self.publisher(self.get_info())
@@ -7,9 +7,13 @@ Defines the `CachedProperty` class.
 See its documentation for more details.
 '''
 
+import time
+
 from python_toolbox import misc_tools
 from python_toolbox.third_party.decorator import decorator
 
+from .cache_statistics import CacheStatistics
+
 
 class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
     '''
@@ -51,6 +55,7 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
         else:
             self.getter = lambda thing: getter_or_value
         self.__doc__ = doc or getattr(self.getter, '__doc__', None)
+        self._cache_statistics = CacheStatistics()
 
 
     def __get__(self, thing, our_type=None):
@@ -59,13 +64,27 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
             # We're being accessed from the class itself, not from an object
             return self
 
+        self._cache_statistics.misses += 1
+        start_time = time.perf_counter()
         value = self.getter(thing)
+        self._cache_statistics.miss_time += time.perf_counter() - start_time
 
         setattr(thing, self.get_our_name(thing, our_type=our_type), value)
 
         return value
 
 
+    def cache_info(self):
+        '''
+        Get a `CacheInfo` with the number of computations and their total time.
+
+        Once a value is computed it's stored on the object, and Python gets it
+        from there without going through this property, so hits can't be
+        counted; `hits` and `size` are `None`.
+        '''
+        return self._cache_statistics.get_info()._replace(hits=None)
+
+
     def __call__(self, method_function):
         '''
         Decorate method to use value of `CachedProperty` as a context manager.
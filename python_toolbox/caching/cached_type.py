@@ -7,13 +7,25 @@ Defines the `CachedType` metaclass.
 See its documentation for more details.
 '''
 
-from python_toolbox.sleek_reffing import SleekCallArgs
+import time
+
+from python_toolbox import misc_tools
+
+from .cache_statistics import CacheStatistics
+from .decorators import (_get_call_args_key_builder, _get_storage,
+                         _get_time_to_keep_timedelta)
+
+infinity = float('inf')
 
 
 class SelfPlaceholder:
     '''Placeholder for `self` when storing call-args.'''
 
 
+class _INHERIT(misc_tools.NonInstantiable):
+    '''Sentinel for a cache limit that's inherited from the base class.'''
+
+
 class CachedType(type):
     '''
     A metaclass for sharing instances.
@@ -39,24 +51,75 @@ class CachedType(type):
     you can avoid memory leaks when using weakreffable arguments, but if you
     ever want to use non-weakreffable arguments you are still able to.
     (Assuming you don't mind the memory leaks.)
+
+    To limit the memory used by instances that are kept alive by the cache,
+    you may pass `max_size` and/or `time_to_keep` as class keyword arguments,
+    just like the arguments of `caching.cache`:
+
+        class Grokker(metaclass=caching.CachedType, max_size=1000,
+                      time_to_keep={'hours': 1}):
+            ...
+
+    Instances beyond `max_size` are forgotten according to a least-recently-
+    used algorithm, and instances older than `time_to_keep` are forgotten as
+    well. (Forgotten instances still work, but the next call with the same
+    arguments will create a new instance.) Subclasses get their own cache,
+    with the same `max_size` and `time_to_keep` as their base class, unless
+    they're given different ones.
+
+    Call `Grokker.cache_info()` to get a `CacheInfo` with the number of hits
+    and misses, the number of cached instances and the total time spent
+    creating them, and `Grokker.cache_clear()` to forget all the instances.
     '''
 
-    def __new__(mcls, *args, **kwargs):
+    def __new__(mcls, *args, max_size=_INHERIT, time_to_keep=_INHERIT,
+                **kwargs):
         result = super().__new__(mcls, *args, **kwargs)
-        result.__cache = {}
+        base = next((base for base in result.__mro__[1:]
+                     if isinstance(base, CachedType)), None)
+        if max_size is _INHERIT:
+            max_size = infinity if base is None else base.__max_size
+        if time_to_keep is _INHERIT:
+            time_to_keep = None if base is None else base.__time_to_keep
+        elif time_to_keep is not None:
+            time_to_keep = _get_time_to_keep_timedelta(time_to_keep)
+        result.__max_size = max_size
+        result.__time_to_keep = time_to_keep
+        result.__cache_statistics = CacheStatistics()
+        result.__cache, result.__lookup, result.__store, result.__clear, _ = \
+              _get_storage(max_size, time_to_keep, result.__cache_statistics)
+        result.__build_key = _get_call_args_key_builder(result.__init__)
         return result
 
 
+    def __init__(cls, *args, max_size=_INHERIT, time_to_keep=_INHERIT,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+
+
     def __call__(cls, *args, **kwargs):
-        sleek_call_args = SleekCallArgs(
-            cls.__cache,
-            cls.__init__,
-            *((SelfPlaceholder,) + args),
-            **kwargs
-        )
+        sleek_call_args = cls.__build_key(cls.__cache,
+                                          (SelfPlaceholder,) + args, kwargs)
         try:
-            return cls.__cache[sleek_call_args]
+            value = cls.__lookup(sleek_call_args)
         except KeyError:
-            cls.__cache[sleek_call_args] = value = \
-                                              super().__call__(*args, **kwargs)
+            cls.__cache_statistics.misses += 1
+            start_time = time.perf_counter()
+            value = super().__call__(*args, **kwargs)
+            cls.__cache_statistics.miss_time += \
+                                               time.perf_counter() - start_time
+            cls.__store(sleek_call_args, value)
+            return value
+        else:
+            cls.__cache_statistics.hits += 1
             return value
+
+
+    def cache_info(cls):
+        '''Get a `CacheInfo` with statistics about the cached instances.'''
+        return cls.__cache_statistics.get_info()
+
+
+    def cache_clear(cls):
+        '''Forget all the cached instances.'''
+        cls.__clear()
@@ -6,18 +6,29 @@ Defines the `cache` decorator.
 
 See its documentation for more details.
 '''
-# todo: examine thread-safety
 
+import asyncio
+import concurrent.futures
 import datetime as datetime_module
+import functools
+import heapq
+import inspect
+import itertools
+import threading
+import time
 
 from python_toolbox import misc_tools
-from python_toolbox import binary_search
 from python_toolbox import decorator_tools
 from python_toolbox.sleek_reffing import SleekCallArgs
 from python_toolbox.third_party.decorator import decorator as decorator_
 
+from .cache_statistics import CacheStatistics
+
 infinity = float('inf')
 
+_n_lock_stripes = 16
+'''Number of locks that `cache(thread_safe=True)` spreads its keys over.'''
+
 
 class CLEAR_ENTIRE_CACHE(misc_tools.NonInstantiable):
     '''Sentinel object for clearing the entire cache.'''
@@ -32,8 +43,227 @@ def _get_now():
     return datetime_module.datetime.now()
 
 
+def _get_time_to_keep_timedelta(time_to_keep):
+    '''
+    Get `time_to_keep` as a `timedelta` object.
+
+    `time_to_keep` may be either a `timedelta` object or a `dict` of keyword
+    arguments for constructing one.
+    '''
+    if isinstance(time_to_keep, datetime_module.timedelta):
+        return time_to_keep
+    try:
+        return datetime_module.timedelta(**time_to_keep)
+    except Exception as exception:
+        raise TypeError(
+            '`time_to_keep` must be either a `timedelta` object or a dict of '
+            'keyword arguments for constructing a `timedelta` object.'
+        ) from exception
+
+
+def _get_call_args_key_builder(function, cheat_hasher=None):
+    '''
+    Compile a function that makes `SleekCallArgs` keys for calls to `function`.
+
+    The signature of `function` is analyzed only once, here, so the returned
+    `build_key(containing_dict, args, kwargs)` can resolve the call args of
+    each call without running `inspect.getcallargs` on it. Calls like `f(1)`,
+    `f(1, 2)` and `f(b=2, a=1)` get the same key.
+
+    Calls that don't fit the signature are handed over to the regular
+    `SleekCallArgs` constructor, so they raise the same `TypeError` as before.
+
+    `cheat_hasher`, if given, is used for cheat-hashing unhashable arguments.
+    (See `SleekCallArgs.from_call_args`.)
+    '''
+    parameters = inspect.signature(function,
+                                   follow_wrapped=False).parameters.values()
+    positional_names = []
+    keyword_names = set()
+    defaults = []
+    has_star_args = has_star_kwargs = False
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            has_star_args = True
+            continue
+        elif parameter.kind == parameter.VAR_KEYWORD:
+            has_star_kwargs = True
+            continue
+        if parameter.kind != parameter.KEYWORD_ONLY:
+            positional_names.append(parameter.name)
+        if parameter.kind != parameter.POSITIONAL_ONLY:
+            keyword_names.add(parameter.name)
+        if parameter.default is not parameter.empty:
+            defaults.append((parameter.name, parameter.default))
+
+    n_positionals = len(positional_names)
+    n_names = n_positionals + len(keyword_names.difference(positional_names))
+
+    def build_key(containing_dict, args, kwargs):
+        if len(args) > n_positionals and not has_star_args:
+            return SleekCallArgs(containing_dict, function, *args, **kwargs)
+        call_args = dict(zip(positional_names, args))
+        star_args = args[n_positionals:]
+        star_kwargs = {}
+        for name, value in kwargs.items():
+            if name in keyword_names and name not in call_args:
+                call_args[name] = value
+            elif has_star_kwargs and name not in keyword_names:
+                star_kwargs[name] = value
+            else:
+                return SleekCallArgs(containing_dict, function,
+                                     *args, **kwargs)
+        if len(call_args) < n_names:
+            for name, default in defaults:
+                if name not in call_args:
+                    call_args[name] = default
+            if len(call_args) < n_names:
+                return SleekCallArgs(containing_dict, function,
+                                     *args, **kwargs)
+        return SleekCallArgs.from_call_args(containing_dict, call_args,
+                                            star_args, star_kwargs,
+                                            cheat_hasher)
+
+    return build_key
+
+
+def _get_storage(max_size, time_to_keep, statistics, backend=None,
+                 function_name=None):
+    '''
+    Create the storage of a cache, according to its size and expiry options.
+
+    Returns a tuple `(cache_dict, lookup, store, clear, forget)`:
+    `lookup(sleek_call_args)` returns the cached value or raises `KeyError`,
+    `store(sleek_call_args, value)` stores a value, `clear()` clears the cache
+    and `forget(sleek_call_args)` removes one entry if it exists. `cache_dict`
+    is the underlying `dict`, which `SleekCallArgs` keys should be told about
+    so they could remove themselves from it when one of their arguments dies.
+    (It's `None` when using a `backend`.) Evictions, expirations and the size
+    of the cache are reported to `statistics`.
+    '''
+    from python_toolbox.nifty_collections import OrderedDict
+
+    statistics.get_size = lambda: len(cache_dict)
+
+    # Each flavor of storage below defines `lookup`, `store` and `clear`.
+    # `forget` is the same for all the in-memory flavors:
+
+    def forget(sleek_call_args):
+        cache_dict.pop(sleek_call_args, None)
+
+    if backend is not None:
+
+        from .sqlite_cache_backend import get_stable_key
+
+        cache_dict = None
+        statistics.get_size = \
+                        functools.partial(backend.get_size, function_name)
+
+        def lookup(sleek_call_args):
+            return backend.lookup(function_name,
+                                  get_stable_key(sleek_call_args))
+
+        def store(sleek_call_args, value):
+            statistics.evictions += backend.store(
+                function_name, get_stable_key(sleek_call_args), value
+            )
+
+        def forget(sleek_call_args):
+            backend.discard(function_name, get_stable_key(sleek_call_args))
+
+        clear = functools.partial(backend.clear, function_name)
+
+    elif time_to_keep:
+
+        # Entries are stored as `(value, serial)`. Every entry also gets an
+        # item `(expiry, serial, sleek_call_args)` in a heap, so expired
+        # entries can be found in O(log n) without looking at the rest of the
+        # cache. Heap items of entries that were already thrown away (by LRU,
+        # by `cache_clear` or by an argument dying) are ignored when popped,
+        # and purged when they pile up.
+
+        cache_dict = OrderedDict()
+        expiry_heap = []
+        serials = itertools.count()
+
+        def remove_expired_entries():
+            now = _get_now()
+            while expiry_heap and expiry_heap[0][0] <= now:
+                _, serial, sleek_call_args = heapq.heappop(expiry_heap)
+                entry = cache_dict.get(sleek_call_args)
+                if entry is not None and entry[1] == serial:
+                    del cache_dict[sleek_call_args]
+                    statistics.expirations += 1
+
+        def purge_expiry_heap():
+            live_serials = {serial for _, serial in cache_dict.values()}
+            expiry_heap[:] = [item for item in expiry_heap
+                              if item[1] in live_serials]
+            heapq.heapify(expiry_heap)
+
+        def lookup(sleek_call_args):
+            remove_expired_entries()
+            value, _ = cache_dict[sleek_call_args]
+            if max_size != infinity:
+                cache_dict.move_to_end(sleek_call_args)
+            return value
+
+        def store(sleek_call_args, value):
+            serial = next(serials)
+            cache_dict[sleek_call_args] = (value, serial)
+            heapq.heappush(
+                expiry_heap,
+                (_get_now() + time_to_keep, serial, sleek_call_args)
+            )
+            if len(cache_dict) > max_size:
+                cache_dict.popitem(last=False)
+                statistics.evictions += 1
+            if len(expiry_heap) > 2 * len(cache_dict) + 16:
+                purge_expiry_heap()
+
+        def clear():
+            cache_dict.clear()
+            del expiry_heap[:]
+
+    elif max_size == infinity:
+
+        cache_dict = {}
+        lookup = cache_dict.__getitem__
+        store = cache_dict.__setitem__
+        clear = cache_dict.clear
+
+    else: # max_size < infinity
+
+        cache_dict = OrderedDict()
+
+        def lookup(sleek_call_args):
+            value = cache_dict[sleek_call_args]
+            cache_dict.move_to_end(sleek_call_args)
+            return value
+
+        def store(sleek_call_args, value):
+            cache_dict[sleek_call_args] = value
+            if len(cache_dict) > max_size:
+                cache_dict.popitem(last=False)
+                statistics.evictions += 1
+
+        clear = cache_dict.clear
+
+    return cache_dict, lookup, store, clear, forget
+
+
+def _make_locked(function, lock):
+    '''Wrap `function` so it always runs while holding `lock`.'''
+    def locked_function(*args, **kwargs):
+        with lock:
+            return function(*args, **kwargs)
+    return locked_function
+
+
 @decorator_tools.helpful_decorator_builder
-def cache(max_size=infinity, time_to_keep=None):
+def cache(max_size=infinity, time_to_keep=None, thread_safe=False,
+          info_publisher=None, info_publishing_interval={'minutes': 1},
+          backend=None, name=None, cheat_hasher=None):
     '''
     Cache a function, saving results so they won't have to be computed again.
 
@@ -62,28 +292,59 @@ def cache(max_size=infinity, time_to_keep=None):
 
     You may optionally specific a `time_to_keep`, which is a time period after
     which a cache entry will expire. (Pass in either a `timedelta` object or
-    keyword arguments to create one.)
+    keyword arguments to create one.) Expired entries are thrown away in
+    O(log n) time each, and `time_to_keep` may be combined with `max_size`.
+
+    Specify `thread_safe=True` to make the cached function safe to call from
+    several threads at once. In this mode, when several threads miss on the
+    same arguments at the same time, only one of them calls the function and
+    the others wait for its result. (If the function raises an exception, the
+    waiting threads get it too, and nothing is cached.) The statistics of
+    `cache_info` are kept accurate in this mode too.
+
+    You may also decorate a coroutine function (`async def`.) The awaited
+    results are cached, rather than the coroutine objects. Callers that await
+    the same arguments while the result is being computed share a single task,
+    and if the coroutine raises an exception, nothing is cached. The cache of a
+    coroutine function should be used from one event loop, so `thread_safe`
+    can't be used with it. (A `ValueError` is raised if it is.)
+
+    The cached function has a `cache_info()` method that returns a `CacheInfo`
+    with counts of hits, misses, evictions and expirations, the current size of
+    the cache and the total time spent computing values on misses. You may
+    optionally give an `info_publisher`, which will be called with a
+    `CacheInfo` at most once every `info_publishing_interval` while the cached
+    function is being used. (Pass in either a `timedelta` object or keyword
+    arguments to create one.)
+
+    You may optionally give a `backend` to store the results in, instead of
+    keeping them in memory. For example, a `SqliteCacheBackend` keeps them in a
+    file, so they survive the process and are shared with other processes. The
+    size limit is then set on the backend, so `max_size` and `time_to_keep`
+    can't be used with a `backend`. (A `ValueError` is raised if they are.)
+    The results are stored in the backend under a `name`, which defaults to
+    the module and qualified name of the function, along with a digest of its
+    code, so when the code of the function changes, the results of its old
+    code aren't used. If you don't give a `name`, the digest also covers the
+    variables in the closure of the function, which must be picklable then. (See
+    `sqlite_cache_backend.get_stable_function_name`.)
+
+    Unhashable arguments, like lists and dicts, are cheat-hashed on every
+    call, which walks through all of their contents. If you call the function
+    many times with big unhashable arguments that rarely change, you may give
+    a `cheat_hasher`, like a `cheat_hashing.IncrementalCheatHasher`, which
+    will be used for cheat-hashing them instead, so it could remember their
+    cheat-hashes between calls.
     '''
-    # todo idea: figure how how complex the function's argspec is, and then
-    # compile a function accordingly, so functions with a simple argspec won't
-    # have to go through so much shit. update: probably it will help only for
-    # completely argumentless function. so do one for those.
-
-    from python_toolbox.nifty_collections import OrderedDict
+    if backend is not None and (max_size != infinity or
+                                time_to_keep is not None):
+        raise ValueError(
+            "Can't use `max_size` or `time_to_keep` with a `backend`; set "
+            "the size limit on the backend instead."
+        )
 
     if time_to_keep is not None:
-        if max_size != infinity:
-            raise NotImplementedError
-        if not isinstance(time_to_keep, datetime_module.timedelta):
-            try:
-                time_to_keep = datetime_module.timedelta(**time_to_keep)
-            except Exception as exception:
-                raise TypeError(
-                    '`time_limit` must be either a `timedelta` object or a '
-                    'dict of keyword arguments for constructing a '
-                    '`timedelta` object.'
-                ) from exception
-        assert isinstance(time_to_keep, datetime_module.timedelta)
+        time_to_keep = _get_time_to_keep_timedelta(time_to_keep)
 
 
     def decorator(function):
@@ -91,87 +352,176 @@ def cache(max_size=infinity, time_to_keep=None):
         # In case we're being given a function that is already cached:
         if getattr(function, 'is_cached', False): return function
 
-        if max_size == infinity:
-
-            if time_to_keep:
-
-                sorting_key_function = lambda sleek_call_args: \
-                                              cached._cache[sleek_call_args][1]
+        if thread_safe and inspect.iscoroutinefunction(function):
+            raise ValueError(
+                "Can't use `thread_safe` with a coroutine function, because "
+                "its tasks belong to one event loop."
+            )
+
+        build_key = _get_call_args_key_builder(function, cheat_hasher)
+
+        statistics = CacheStatistics(
+            publisher=info_publisher,
+            publishing_interval=info_publishing_interval
+        )
+        if backend is not None:
+            from .sqlite_cache_backend import get_stable_function_name
+            function_name = get_stable_function_name(function, name)
+        else:
+            function_name = None
+        cache_dict, lookup, store, clear, forget = _get_storage(
+            max_size, time_to_keep, statistics, backend, function_name
+        )
+
+        # A plain `dict` is safe to use from several threads at once, but the
+        # LRU and expiry bookkeeping isn't, so we guard it with a lock:
+        if thread_safe and (time_to_keep or max_size != infinity):
+            bookkeeping_lock = threading.RLock()
+            lookup, store, clear, forget = (
+                _make_locked(function_, bookkeeping_lock) for function_ in
+                (lookup, store, clear, forget)
+            )
+        elif thread_safe and backend is not None:
+            # The backend does its own locking, but counting the evictions that
+            # `store` reports isn't safe without a lock:
+            store = _make_locked(store, threading.Lock())
+
+        if inspect.iscoroutinefunction(function):
+
+            # We cache the results of the coroutines rather than the coroutines
+            # themselves, which could be awaited only once. Callers that miss
+            # on a key that's already being computed await the same task. The
+            # task is shielded so a cancelled caller won't cancel it for the
+            # others.
+
+            tasks = {}
+
+            def finish_task(sleek_call_args, start_time, task):
+                statistics.miss_time += time.perf_counter() - start_time
+                if tasks.get(sleek_call_args) is task:
+                    del tasks[sleek_call_args]
+                if not task.cancelled() and task.exception() is None:
+                    store(sleek_call_args, task.result())
+
+            async def cached(function, *args, **kwargs):
+                statistics.publish_if_due()
+                sleek_call_args = build_key(cache_dict, args, kwargs)
+                try:
+                    value = lookup(sleek_call_args)
+                except KeyError:
+                    statistics.misses += 1
+                else:
+                    statistics.hits += 1
+                    return value
+                task = tasks.get(sleek_call_args)
+                if task is None:
+                    task = tasks[sleek_call_args] = \
+                              asyncio.ensure_future(function(*args, **kwargs))
+                    task.add_done_callback(
+                        functools.partial(finish_task, sleek_call_args,
+                                          time.perf_counter())
+                    )
+                return await asyncio.shield(task)
 
+        elif not thread_safe:
 
-                def remove_expired_entries():
-                    almost_cutting_point = \
-                                          binary_search.binary_search_by_index(
-                        list(cached._cache.keys()),
-                        _get_now(),
-                        sorting_key_function,
-                        rounding=binary_search.LOW
-                    )
-                    if almost_cutting_point is not None:
-                        cutting_point = almost_cutting_point + 1
-                        for key in list(cached._cache.keys())[:cutting_point]:
-                            del cached._cache[key]
-
-                @misc_tools.set_attributes(_cache=OrderedDict())
-                def cached(function, *args, **kwargs):
-                    remove_expired_entries()
-                    sleek_call_args = \
-                        SleekCallArgs(cached._cache, function, *args, **kwargs)
-                    try:
-                        return cached._cache[sleek_call_args][0]
-                    except KeyError:
-                        value = function(*args, **kwargs)
-                        cached._cache[sleek_call_args] = (
-                            value,
-                            _get_now() + time_to_keep
-                        )
-                        cached._cache.sort(key=sorting_key_function)
-                        return value
+            def cached(function, *args, **kwargs):
+                statistics.publish_if_due()
+                sleek_call_args = build_key(cache_dict, args, kwargs)
+                try:
+                    value = lookup(sleek_call_args)
+                except KeyError:
+                    statistics.misses += 1
+                    start_time = time.perf_counter()
+                    value = function(*args, **kwargs)
+                    statistics.miss_time += time.perf_counter() - start_time
+                    store(sleek_call_args, value)
+                    return value
+                else:
+                    statistics.hits += 1
+                    return value
 
-            else: # not time_to_keep
+        else: # thread_safe
 
-                @misc_tools.set_attributes(_cache={})
-                def cached(function, *args, **kwargs):
-                    sleek_call_args = \
-                        SleekCallArgs(cached._cache, function, *args, **kwargs)
-                    try:
-                        return cached._cache[sleek_call_args]
-                    except KeyError:
-                        cached._cache[sleek_call_args] = value = \
-                              function(*args, **kwargs)
-                        return value
+            # Callers that miss on the same key are coordinated by a lock
+            # that's chosen by the key's hash, out of a few lock stripes. The
+            # first caller registers a `Future` and computes the value; the
+            # others wait for that `Future` instead of computing the value
+            # themselves.
+            stripes = tuple((threading.Lock(), {})
+                            for _ in range(_n_lock_stripes))
 
-        else: # max_size < infinity
+            # Callers on different stripes may update the statistics at the
+            # same time, so the statistics have a lock of their own:
+            statistics_lock = threading.Lock()
 
-            @misc_tools.set_attributes(_cache=OrderedDict())
             def cached(function, *args, **kwargs):
-                sleek_call_args = \
-                    SleekCallArgs(cached._cache, function, *args, **kwargs)
+                statistics.publish_if_due()
+                sleek_call_args = build_key(cache_dict, args, kwargs)
                 try:
-                    result = cached._cache[sleek_call_args]
-                    cached._cache.move_to_end(sleek_call_args)
-                    return result
+                    value = lookup(sleek_call_args)
                 except KeyError:
-                    cached._cache[sleek_call_args] = value = \
-                        function(*args, **kwargs)
-                    if len(cached._cache) > max_size:
-                        cached._cache.popitem(last=False)
+                    pass
+                else:
+                    with statistics_lock:
+                        statistics.hits += 1
                     return value
+                stripe_lock, futures = \
+                             stripes[hash(sleek_call_args) % _n_lock_stripes]
+                with stripe_lock:
+                    try:
+                        value = lookup(sleek_call_args)
+                    except KeyError:
+                        with statistics_lock:
+                            statistics.misses += 1
+                        future = futures.get(sleek_call_args)
+                        is_computing = future is None
+                        if is_computing:
+                            future = futures[sleek_call_args] = \
+                                                  concurrent.futures.Future()
+                    else:
+                        with statistics_lock:
+                            statistics.hits += 1
+                        return value
+                if not is_computing:
+                    return future.result()
+                start_time = time.perf_counter()
+                try:
+                    value = function(*args, **kwargs)
+                except BaseException as exception:
+                    with stripe_lock:
+                        del futures[sleek_call_args]
+                    future.set_exception(exception)
+                    raise
+                finally:
+                    miss_time = time.perf_counter() - start_time
+                    with statistics_lock:
+                        statistics.miss_time += miss_time
+                # Whether or not storing the value fails, the waiters get the
+                # value and the `Future` is removed, so no one waits forever:
+                try:
+                    store(sleek_call_args, value)
+                finally:
+                    with stripe_lock:
+                        del futures[sleek_call_args]
+                    future.set_result(value)
+                return value
+
 
+        cached._cache = cache_dict
 
         result = decorator_(cached, function)
 
         def cache_clear(key=CLEAR_ENTIRE_CACHE):
             if key is CLEAR_ENTIRE_CACHE:
-                cached._cache.clear()
+                clear()
             else:
-                try:
-                    del cached._cache[key]
-                except KeyError:
-                    pass
+                forget(key)
 
         result.cache_clear = cache_clear
 
+        result.cache_info = statistics.get_info
+
         result.is_cached = True
 
         return result
@@ -0,0 +1,308 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `SqliteCacheBackend` class.
+
+See its documentation for more details.
+'''
+
+import hashlib
+import os
+import pathlib
+import pickle as pickle_module
+import sqlite3
+import threading
+import time
+import types
+
+from python_toolbox import pickle_tools
+
+infinity = float('inf')
+
+
+def _get_stable_pickle(thing):
+    '''
+    Pickle `thing` in a way that's the same for equal objects in any process.
+
+    Sets and dicts are sorted first, because their iteration order may differ
+    between processes even when they're equal.
+    '''
+    if isinstance(thing, (set, frozenset)):
+        return pickle_module.dumps(
+            (type(thing).__name__, tuple(sorted(map(_get_stable_pickle,
+                                                    thing)))),
+            protocol=4
+        )
+    elif isinstance(thing, dict):
+        return pickle_module.dumps(
+            (type(thing).__name__,
+             tuple(sorted((_get_stable_pickle(key), _get_stable_pickle(value))
+                          for key, value in thing.items()))),
+            protocol=4
+        )
+    elif isinstance(thing, (list, tuple)):
+        return pickle_module.dumps(
+            (type(thing).__name__, tuple(map(_get_stable_pickle, thing))),
+            protocol=4
+        )
+    else:
+        return pickle_module.dumps(thing, protocol=4)
+
+
+def get_stable_key(sleek_call_args):
+    '''
+    Get a `bytes` key for a `SleekCallArgs` that's the same in every process.
+
+    The key is a SHA-256 digest of the call args, so all the arguments must be
+    picklable.
+    '''
+    return hashlib.sha256(
+        _get_stable_pickle((sleek_call_args.args, sleek_call_args.star_args,
+                            sleek_call_args.star_kwargs))
+    ).digest()
+
+
+def _get_code_digest(code):
+    '''
+    Get a digest of a code object that changes when the code is changed.
+
+    The digest covers the bytecode, the constants and the names that the code
+    uses, going into the code objects of nested functions, and it's the same
+    in every process. (Of the same Python version.)
+    '''
+    sha256 = hashlib.sha256(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            sha256.update(_get_code_digest(const))
+        else:
+            sha256.update(_get_stable_pickle(const))
+    sha256.update(_get_stable_pickle(code.co_names))
+    return sha256.digest()
+
+
+def get_stable_function_name(function, name=None):
+    '''
+    Get a name that identifies `function` and its code in every process.
+
+    This is the namespace that `caching.cache` stores the results of
+    `function` under in a backend. It's `name`, which defaults to the module
+    and qualified name of the function, followed by a digest of the code of
+    the function, so after the code is changed, the results of the old code
+    aren't used.
+
+    When `name` isn't given, the digest also covers the variables in the
+    closure of the function, so functions that share a qualified name, like
+    lambdas or closures made by a factory, don't get each other's results.
+    These variables must be picklable then; if they aren't, you must give a
+    `name` that's different for every function.
+    '''
+    sha256 = hashlib.sha256(_get_code_digest(function.__code__))
+    if name is None:
+        name = f'{function.__module__}.{function.__qualname__}'
+        if function.__closure__:
+            try:
+                sha256.update(_get_stable_pickle(
+                    tuple(cell.cell_contents for cell in function.__closure__)
+                ))
+            except Exception as exception:
+                raise TypeError(
+                    f"Can't tell {function.__qualname__} apart from other "
+                    f"functions with the same name, because the variables "
+                    f"in its closure can't be pickled. Give it a unique "
+                    f"`name`."
+                ) from exception
+    return f'{name}:{sha256.hexdigest()[:16]}'
+
+
+class SqliteCacheBackend:
+    '''
+    A persistent cache backend that stores results in an SQLite file.
+
+    Use it with `caching.cache` like this:
+
+        backend = SqliteCacheBackend('~/.my_cache.sqlite', max_size=10000)
+
+        @caching.cache(backend=backend)
+        def f(x):
+            return whatever
+
+    The results survive the process, so the next process that calls `f` with
+    the same arguments gets the result from the file. Several functions may
+    share the same backend, and several processes may use the same file at
+    once; SQLite takes care of the locking.
+
+    You may optionally specify a `max_size` for the maximum number of results
+    to keep in the file for each function, after which the results of that
+    function are thrown away in least-recently-used order. To keep
+    lookups fast, the times in which results were used are written to the file
+    in batches, either when a result is stored or after every
+    `n_batched_uses` lookups, rather than on every lookup. So other processes
+    see the recent uses of a result only after the batch is written.
+
+    The arguments are identified by a hash of their pickled form, so they must
+    be picklable, and the results are stored compressed with
+    `pickle_tools.compickle`, so they must be picklable too.
+    '''
+
+    n_batched_uses = 100
+    '''Number of lookups whose times of use are written to the file at once.'''
+
+    def __init__(self, path, max_size=infinity, timeout=60):
+        '''
+        Construct the backend.
+
+        `path` is the path of the SQLite file, which will be created if needed.
+        `timeout` is the number of seconds to wait for another process that's
+        holding a lock on the file.
+        '''
+        self.path = pathlib.Path(path).expanduser()
+        '''Path of the SQLite file.'''
+
+        self.max_size = max_size
+        '''Maximum number of results to keep in the file for each function.'''
+
+        self.timeout = timeout
+        '''Seconds to wait for another process that's locking the file.'''
+
+        self._local = threading.local()
+
+        self._pending_uses = {}
+        '''
+        `dict` mapping from `(function_name, key)` to its last time of use.
+
+        These are the uses that weren't written to the file yet.
+        '''
+
+        self._pending_uses_lock = threading.Lock()
+
+        self._connection.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS entries (
+                function TEXT NOT NULL,
+                key BLOB NOT NULL,
+                value BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (function, key)
+            );
+            CREATE INDEX IF NOT EXISTS entries_by_function_and_last_used
+                ON entries (function, last_used);
+            '''
+        )
+
+
+    @property
+    def _connection(self):
+        '''
+        The SQLite connection of the current thread.
+
+        SQLite connections can't be shared between threads or across a fork, so
+        each thread of each process gets its own.
+        '''
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(str(self.path),
+                                         timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+    def lookup(self, function_name, key):
+        '''Get the stored result for `key`, or raise `KeyError`.'''
+        connection = self._connection
+        row = connection.execute(
+            'SELECT value FROM entries WHERE function = ? AND key = ?',
+            (function_name, key)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        if self.max_size != infinity:
+            with self._pending_uses_lock:
+                self._pending_uses[(function_name, key)] = time.time()
+                should_write_uses = \
+                               len(self._pending_uses) >= self.n_batched_uses
+            if should_write_uses:
+                with connection:
+                    connection.execute('BEGIN IMMEDIATE')
+                    self._write_pending_uses(connection)
+        return pickle_tools.decompickle(row[0])
+
+
+    def _write_pending_uses(self, connection):
+        '''Write the times of the lookups that weren't written yet.'''
+        with self._pending_uses_lock:
+            pending_uses, self._pending_uses = self._pending_uses, {}
+        connection.executemany(
+            'UPDATE entries SET last_used = ? WHERE function = ? AND key = ?',
+            ((last_used, function_name, key) for (function_name, key),
+             last_used in pending_uses.items())
+        )
+
+
+    def store(self, function_name, key, value):
+        '''
+        Store `value` as the result for `key`.
+
+        Returns the number of results of `function_name` that were thrown away
+        to stay within `max_size`.
+        '''
+        compickled_value = pickle_tools.compickle(value)
+        connection = self._connection
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            if self.max_size != infinity:
+                # Writing the pending uses first, so a pending use of `key`
+                # won't overwrite its new time, and so the eviction below will
+                # take them into account:
+                self._write_pending_uses(connection)
+            connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                (function_name, key, compickled_value, time.time())
+            )
+            if self.max_size == infinity:
+                return 0
+            return connection.execute(
+                'DELETE FROM entries WHERE rowid IN ('
+                'SELECT rowid FROM entries WHERE function = ? '
+                'ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (function_name, self.max_size)
+            ).rowcount
+
+
+    def discard(self, function_name, key):
+        '''Remove the result for `key`, if there is one.'''
+        self._connection.execute(
+            'DELETE FROM entries WHERE function = ? AND key = ?',
+            (function_name, key)
+        )
+
+
+    def clear(self, function_name=None):
+        '''Remove all the results of `function_name`, or of all functions.'''
+        if function_name is None:
+            self._connection.execute('DELETE FROM entries')
+        else:
+            self._connection.execute(
+                'DELETE FROM entries WHERE function = ?', (function_name,)
+            )
+
+
+    def get_size(self, function_name=None):
+        '''Get the number of results of `function_name`, or of all of them.'''
+        if function_name is None:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM entries'
+            ).fetchone()[0]
+        else:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM entries WHERE function = ?',
+                (function_name,)
+            ).fetchone()[0]
+
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self.path}>'
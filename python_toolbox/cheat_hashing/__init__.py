@@ -8,4 +8,5 @@ See its documentation for more details.
 '''
 
 from . import cheat_hash_functions
-from .cheat_hash import cheat_hash
\ No newline at end of file
+from .cheat_hash import cheat_hash
+from .incremental_cheat_hasher import IncrementalCheatHasher
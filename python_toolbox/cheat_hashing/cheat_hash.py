@@ -8,20 +8,88 @@ See its documentation for more details.
 '''
 
 from .cheat_hash_functions import (cheat_hash_dict, cheat_hash_object,
-                                   cheat_hash_sequence, cheat_hash_set)
+                                   cheat_hash_sequence, cheat_hash_set,
+                                   steps_functions)
 
 infinity = float('inf')
 
-dispatch_map = {
+
+class _DispatchMap(dict):
+    '''
+    A `dict` of cheat-hash functions that keeps `_handler_cache` up to date.
+
+    Whenever it's changed, all the handlers that were already resolved for
+    types are forgotten, because they may not be the best match anymore.
+    '''
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        _handler_cache.clear()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        _handler_cache.clear()
+
+    def clear(self):
+        super().clear()
+        _handler_cache.clear()
+
+    def pop(self, *args):
+        try:
+            return super().pop(*args)
+        finally:
+            _handler_cache.clear()
+
+    def popitem(self):
+        try:
+            return super().popitem()
+        finally:
+            _handler_cache.clear()
+
+    def setdefault(self, key, default=None):
+        try:
+            return super().setdefault(key, default)
+        finally:
+            _handler_cache.clear()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        _handler_cache.clear()
+
+
+dispatch_map = _DispatchMap({
     object: cheat_hash_object,
     tuple: cheat_hash_sequence,
     list: cheat_hash_sequence,
     dict: cheat_hash_dict,
     set: cheat_hash_set
-}
+})
 '''`dict` mapping from a type to a function that cheat-hashes it.'''
 
 
+_handler_cache = {}
+'''`dict` mapping from a type to its resolved function from `dispatch_map`.'''
+
+
+def _get_handler(thing_type):
+    '''Get the function from `dispatch_map` that cheat-hashes `thing_type`.'''
+    try:
+        return _handler_cache[thing_type]
+    except KeyError:
+        matching_types = \
+            [type_ for type_ in dispatch_map if issubclass(thing_type, type_)]
+
+        mro = thing_type.mro()
+
+        matching_type = min(
+            matching_types,
+            key=lambda type_: (mro.index(type_) if type_ in mro else infinity)
+        )
+
+        _handler_cache[thing_type] = handler = dispatch_map[matching_type]
+        return handler
+
+
 def cheat_hash(thing):
     '''
     Cheat-hash an object. Works on mutable objects.
@@ -33,19 +101,37 @@ def cheat_hash(thing):
     This is intended for situtations where you have mutable objects that you
     never modify, and you want to be able to hash them despite Python not
     letting you.
-    '''
-    thing_type = type(thing)
-    matching_types = \
-        [type_ for type_ in dispatch_map if issubclass(thing_type, type_)]
-
-    mro = thing_type.mro()
-
-    matching_type = min(
-        matching_types,
-        key=lambda type_: (mro.index(type_) if type_ in mro else infinity)
-    )
 
-    return dispatch_map[matching_type](thing)
+    Nested lists, tuples, dicts and sets are walked through without recursion,
+    so deeply-nested structures won't hit the recursion limit.
+    '''
+    return _get_handler(type(thing))(thing)
 
 
+def run_cheat_hash_steps(steps):
+    '''
+    Run a generator of cheat-hashing steps and return the resulting cheat-hash.
 
+    The generator yields the items it needs cheat-hashed and gets their
+    cheat-hashes sent back. When an item is itself a container, its own
+    generator of steps is pushed on an explicit stack rather than run
+    recursively.
+    '''
+    stack = [steps]
+    cheat_hash_ = None
+    while True:
+        try:
+            thing = stack[-1].send(cheat_hash_)
+        except StopIteration as stop_iteration:
+            stack.pop()
+            cheat_hash_ = stop_iteration.value
+            if not stack:
+                return cheat_hash_
+        else:
+            handler = _get_handler(type(thing))
+            steps_function = steps_functions.get(handler)
+            if steps_function is None:
+                cheat_hash_ = handler(thing)
+            else:
+                stack.append(steps_function(thing))
+                cheat_hash_ = None
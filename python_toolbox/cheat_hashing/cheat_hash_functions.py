@@ -1,7 +1,15 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
-'''Defines functions for cheat-hashing various types.'''
+'''
+Defines functions for cheat-hashing various types.
+
+The functions for containers are built from generator functions that yield
+each unhashable item that needs to be cheat-hashed, get its cheat-hash sent
+back, and finally return the cheat-hash of the container. This lets
+`cheat_hash` walk through nested containers on an explicit stack instead of
+recursing into them. (See `run_cheat_hash_steps`.)
+'''
 
 # todo: there are some recommended hash implementations in `_abcoll`, maybe
 # they'll help
@@ -15,8 +23,8 @@ def cheat_hash_object(thing):
         return id(thing)
 
 
-def cheat_hash_set(my_set):
-    '''Cheat-hash a `set`.'''
+def _cheat_hash_set_steps(my_set):
+    '''Generator of the steps of cheat-hashing a `set`.'''
     hashables = set()
     unhashables = set()
     for thing in my_set:
@@ -27,16 +35,20 @@ def cheat_hash_set(my_set):
         else:
             hashables.add(thing)
 
+    unhashables_cheat_hashes = []
+    for thing in unhashables:
+        unhashables_cheat_hashes.append((yield thing))
+
     return hash(
         (
             frozenset(hashables),
-            tuple(sorted(cheat_hash(thing) for thing in unhashables))
+            tuple(sorted(unhashables_cheat_hashes))
         )
     )
 
 
-def cheat_hash_sequence(my_sequence):
-    '''Cheat-hash a sequence.'''
+def _cheat_hash_sequence_steps(my_sequence):
+    '''Generator of the steps of cheat-hashing a sequence.'''
     hashables = []
     unhashables = []
     for thing in my_sequence:
@@ -47,16 +59,20 @@ def cheat_hash_sequence(my_sequence):
         else:
             hashables.append(thing)
 
+    unhashables_cheat_hashes = []
+    for thing in unhashables:
+        unhashables_cheat_hashes.append((yield thing))
+
     return hash(
         (
             tuple(hashables),
-            tuple(cheat_hash(thing) for thing in unhashables)
+            tuple(unhashables_cheat_hashes)
         )
     )
 
 
-def cheat_hash_dict(my_dict):
-    '''Cheat-hash a `dict`.'''
+def _cheat_hash_dict_steps(my_dict):
+    '''Generator of the steps of cheat-hashing a `dict`.'''
     hashable_items = []
     unhashable_items = []
     for key, value in my_dict.items():
@@ -67,11 +83,40 @@ def cheat_hash_dict(my_dict):
         else:
             hashable_items.append((key, value))
 
+    unhashable_items_cheat_hashes = []
+    for thing in sorted(unhashable_items):
+        unhashable_items_cheat_hashes.append((yield thing))
+
     return hash(
         (
             tuple(sorted(hashable_items)),
-            tuple(cheat_hash(thing) for thing in sorted(unhashable_items))
+            tuple(unhashable_items_cheat_hashes)
         )
     )
 
-from .cheat_hash import cheat_hash
\ No newline at end of file
+
+def cheat_hash_set(my_set):
+    '''Cheat-hash a `set`.'''
+    return run_cheat_hash_steps(_cheat_hash_set_steps(my_set))
+
+
+def cheat_hash_sequence(my_sequence):
+    '''Cheat-hash a sequence.'''
+    return run_cheat_hash_steps(_cheat_hash_sequence_steps(my_sequence))
+
+
+def cheat_hash_dict(my_dict):
+    '''Cheat-hash a `dict`.'''
+    return run_cheat_hash_steps(_cheat_hash_dict_steps(my_dict))
+
+
+steps_functions = {
+    cheat_hash_set: _cheat_hash_set_steps,
+    cheat_hash_sequence: _cheat_hash_sequence_steps,
+    cheat_hash_dict: _cheat_hash_dict_steps,
+}
+'''
+`dict` mapping from a cheat-hash function to its generator function of steps.
+'''
+
+from .cheat_hash import run_cheat_hash_steps
@@ -0,0 +1,140 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `IncrementalCheatHasher` class.
+
+See its documentation for more details.
+'''
+
+import collections
+import pickle
+import weakref
+
+from .cheat_hash import cheat_hash
+
+
+class IncrementalCheatHasher:
+    '''
+    Cheat-hasher that remembers the cheat-hashes of objects by identity.
+
+    `cheat_hash` walks through the entire object every time, so cheat-hashing
+    a big list or dict costs as much as the object is big. If you have big
+    objects that rarely change, use an `IncrementalCheatHasher` instead:
+
+        cheat_hasher = IncrementalCheatHasher()
+        cheat_hasher(my_big_config, version=my_big_config_version)
+
+    The cheat-hash of an object is remembered along with a version token, and
+    it's computed again only when the object is cheat-hashed with a different
+    version token. It's your responsibility to change the version token when
+    you change the object.
+
+    Instead of giving a `version` on every call, you may give a `get_version`
+    function, which takes the object and returns its version token. Or you may
+    use `track_changes=True`, which uses the pickle of the object as its
+    version token, like `change_tracker.ChangeTracker`. Pickling is still
+    proportional to the size of the object, but it's much faster than
+    cheat-hashing it.
+
+    If there's no version token, the object is cheat-hashed from scratch.
+
+    Objects that can be weakreffed are remembered until they die. Other
+    objects, like plain lists and dicts, are remembered with a strong
+    reference, so they're kept alive until they're thrown away to keep the
+    number of these below `max_size`. (In least-recently-used order.)
+    '''
+    def __init__(self, get_version=None, track_changes=False, max_size=1000):
+        if get_version is not None and track_changes:
+            raise NotImplementedError(
+                "Can't use both `get_version` and `track_changes`."
+            )
+        if track_changes:
+            get_version = lambda thing: pickle.dumps(thing, 2)
+
+        self.get_version = get_version
+        '''Function that returns the version token of an object, or `None`.'''
+
+        self.max_size = max_size
+        '''Maximum number of objects to remember with a strong reference.'''
+
+        self._weak_entries = {}
+        '''
+        `dict` mapping from an object's `id` to `(ref, version, cheat_hash)`.
+        '''
+
+        self._strong_entries = collections.OrderedDict()
+        '''
+        `dict` mapping from an object's `id` to `(thing, version, cheat_hash)`.
+        '''
+
+
+    def __call__(self, thing, version=None):
+        '''
+        Cheat-hash `thing`, reusing its remembered cheat-hash if possible.
+
+        If `version` isn't given, it's taken from `get_version`.
+        '''
+        if version is None and self.get_version is not None:
+            version = self.get_version(thing)
+        if version is None:
+            return cheat_hash(thing)
+
+        if type(thing).__weakrefoffset__:
+            entry = self._weak_entries.get(id(thing))
+            if entry is not None and entry[0]() is thing and \
+                                                           entry[1] == version:
+                return entry[2]
+            cheat_hash_ = cheat_hash(thing)
+            self._weak_entries[id(thing)] = (
+                weakref.ref(thing, self._get_remover(id(thing))), version,
+                cheat_hash_
+            )
+            return cheat_hash_
+
+        entry = self._strong_entries.get(id(thing))
+        if entry is not None and entry[1] == version:
+            self._strong_entries.move_to_end(id(thing))
+            return entry[2]
+        cheat_hash_ = cheat_hash(thing)
+        self._strong_entries[id(thing)] = (thing, version, cheat_hash_)
+        self._strong_entries.move_to_end(id(thing))
+        while len(self._strong_entries) > self.max_size:
+            self._strong_entries.popitem(last=False)
+        return cheat_hash_
+
+
+    def _get_remover(self, id_):
+        '''
+        Get a weakref callback that forgets the object with the `id` `id_`.
+
+        The entry is removed only if it still belongs to the dead object,
+        because the `id` may have been reused by a newer object by then.
+        '''
+        weak_entries = self._weak_entries
+        def remove(ref):
+            entry = weak_entries.get(id_)
+            if entry is not None and entry[0] is ref:
+                del weak_entries[id_]
+        return remove
+
+
+    def forget(self, thing):
+        '''Forget the remembered cheat-hash of `thing`, if there is one.'''
+        if type(thing).__weakrefoffset__:
+            entry = self._weak_entries.get(id(thing))
+            if entry is not None and entry[0]() is thing:
+                del self._weak_entries[id(thing)]
+        else:
+            self._strong_entries.pop(id(thing), None)
+
+
+    def clear(self):
+        '''Forget all the remembered cheat-hashes.'''
+        self._weak_entries.clear()
+        self._strong_entries.clear()
+
+
+    def __len__(self):
+        '''Get the number of objects whose cheat-hashes are remembered.'''
+        return len(self._weak_entries) + len(self._strong_entries)
@@ -10,6 +10,10 @@ from .chain_space import ChainSpace
 from .product_space import ProductSpace
 from .map_space import MapSpace
 from .selection_space import SelectionSpace
+from .slice_space import SliceSpace
 
 from .perming import (PermSpace, CombSpace, Perm, UnrecurrentedPerm, Comb,
-                      UnrecurrentedComb, UnallowedVariationSelectionException)
+                      UnrecurrentedComb, UnallowedVariationSelectionException,
+                      CompactPerm, PermArray)
+
+from .sharding import get_shard_ranges, map_over_space, find_in_space
@@ -10,7 +10,8 @@ from python_toolbox import nifty_collections
 from python_toolbox import caching
 
 from python_toolbox import sequence_tools
-from python_toolbox import nifty_collections
+
+from .slice_space import SliceSpace
 
 infinity = float('inf')
 
@@ -69,7 +70,7 @@ class ChainSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
 
     def __getitem__(self, i):
         if isinstance(i, slice):
-            raise NotImplementedError
+            return SliceSpace.from_slice(self, i)
         assert isinstance(i, int)
         if i <= -1:
             i += self.length
@@ -91,6 +92,26 @@ class ChainSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
         for sequence in self.sequences:
             yield from sequence
 
+
+    def _iterate_from(self, start):
+        '''
+        Iterate over the items, starting from index number `start`.
+
+        We skip over whole sequences by their lengths, without a binary search
+        on `accumulated_lengths`, so only the sequences up to `start` need to
+        be reached.
+        '''
+        sequences = iter(self.sequences)
+        for sequence in sequences:
+            sequence_length = sequence_tools.get_length(sequence)
+            if start < sequence_length:
+                yield from map(sequence.__getitem__,
+                               range(start, sequence_length))
+                break
+            start -= sequence_length
+        for sequence in sequences:
+            yield from sequence
+
     _reduced = property(lambda self: (type(self), self.sequences))
 
     __eq__ = lambda self, other: (isinstance(other, ChainSpace) and
@@ -5,4 +5,5 @@ from .variations import UnallowedVariationSelectionException
 from .perm_space import PermSpace
 from .comb_space import CombSpace
 from .perm import Perm, UnrecurrentedPerm
+from .compact_perm import CompactPerm, PermArray
 from .comb import Comb, UnrecurrentedComb
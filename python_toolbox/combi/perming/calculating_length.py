@@ -1,12 +1,57 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
-import itertools
-
+from python_toolbox import math_tools
 from python_toolbox import nifty_collections
+from python_toolbox import caching
+
+
+def _multiply_polynomials(a, b, k, is_exponential):
+    '''
+    Multiply the polynomials `a` and `b`, dropping terms of degree above `k`.
 
+    Polynomials are lists of coefficients, from the constant term up. If
+    `is_exponential`, these are exponential generating functions, i.e. the
+    coefficient of `x ** i` is implicitly divided by `i!`, so we multiply them
+    with binomial coefficients to keep everything in integers.
+    '''
+    result = [0] * min(len(a) + len(b) - 1, k + 1)
+    for i, a_coefficient in enumerate(a):
+        if not a_coefficient:
+            continue
+        for j in range(min(len(b), k + 1 - i)):
+            if is_exponential:
+                result[i + j] += a_coefficient * b[j] * \
+                                               math_tools.binomial(i + j, i)
+            else:
+                result[i + j] += a_coefficient * b[j]
+    return result
+
+
+def _calculate_length_with_generating_function(k, fbb, is_exponential):
+    '''
+    Calculate the length of a recurrent space with a generating function.
+
+    An item that recurs `r` times contributes the polynomial
+    `1 + x + ... + x ** r`, and the length is the coefficient of `x ** k` in
+    the product of these polynomials. For combs it's an ordinary generating
+    function, and for perms it's an exponential one. Items with the same
+    number of recurrences are multiplied in by repeated squaring, so this
+    takes O(k ** 2 * log(n)) multiplications for every key of `fbb`.
+    '''
+    product = [1]
+    for n_recurrences, n_items in fbb.items():
+        power = [1] * (min(n_recurrences, k) + 1)
+        while n_items:
+            if n_items & 1:
+                product = _multiply_polynomials(product, power, k,
+                                                is_exponential)
+            n_items >>= 1
+            if n_items:
+                power = _multiply_polynomials(power, power, k,
+                                              is_exponential)
+    return product[k] if k < len(product) else 0
 
-_length_of_recurrent_perm_space_cache = {}
 
 def calculate_length_of_recurrent_perm_space(k, fbb):
     '''
@@ -20,79 +65,13 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
 
     It's assumed that the space is not a `CombSpace`, it's not fixed, not
     degreed and not sliced.
-    '''
-    cache = _length_of_recurrent_perm_space_cache
-    if not isinstance(fbb, nifty_collections.FrozenBagBag):
-        fbb = nifty_collections.FrozenBagBag(fbb)
-    ### Checking for edge cases: ##############################################
-    #                                                                         #
-    if k == 0:
-        return 1
-    elif k == 1:
-        assert fbb
-        # (Works because `FrozenBagBag` has a functioning `__bool__`, unlike
-        # Python's `Counter`.)
-        return fbb.n_elements
-    #                                                                         #
-    ### Finished checking for edge cases. #####################################
-
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
-
-    # This is a 2-phase algorithm, similar to recursion but not really
-    # recursion since we don't want to abuse the stack.
-    #
-    # In the first phase, we get all the sub-FBBs that we need to solve for to
-    # get a solution for this FBB, and then for these sub-FBBs we get the
-    # sub-sub-FBBs we need to solve in order to solve them, and we continue
-    # until we reach trivial FBBs.
-    #
-    # In the second phase, we'll go over the levels of FBBs, starting with the
-    # simplest ones and making our way up to the original FBB. The simplest
-    # FBBs will be solved trivially, and then as they get progressively more
-    # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
-
-
-    ### Doing phase one, getting all sub-FBBs: ################################
-    #                                                                         #
-    levels = []
-    current_fbbs = {fbb}
-    while len(levels) < k and current_fbbs:
-        k_ = k - len(levels)
-        levels.append(
-            {fbb_: fbb_.get_sub_fbbs_for_one_key_removed()
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache}
-        )
-        current_fbbs = set(itertools.chain(*levels[-1].values()))
-    #                                                                         #
-    ### Finished doing phase one, getting all sub-FBBs. #######################
 
-    ### Doing phase two, solving FBBs from trivial to complex: ################
-    #                                                                         #
-    for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
-        if k_ == 1:
-            for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = fbb_.n_elements
-        else:
-            for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] * factor for
-                           sub_fbb, factor in sub_fbb_bag.items())
-                )
-    #                                                                         #
-    ### Finished doing phase two, solving FBBs from trivial to complex. #######
-
-    return cache[(k, fbb)]
-
-
-
-
-###############################################################################
+    Results are kept in a bounded LRU cache; call `cache_info()` on this
+    function to get its statistics.
+    '''
+    return _calculate_length(k, fbb,
+                             _calculate_length_of_recurrent_perm_space)
 
-_length_of_recurrent_comb_space_cache = {}
 
 def calculate_length_of_recurrent_comb_space(k, fbb):
     '''
@@ -105,8 +84,31 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     for more info.)
 
     It's assumed that the space is not fixed, not degreed and not sliced.
+
+    Results are kept in a bounded LRU cache; call `cache_info()` on this
+    function to get its statistics.
     '''
-    cache = _length_of_recurrent_comb_space_cache
+    return _calculate_length(k, fbb,
+                             _calculate_length_of_recurrent_comb_space)
+
+
+# These take `k` and `fbb` in one tuple, because `caching.cache` weakrefs
+# weakreffable arguments like `FrozenBagBag`, so a result would be forgotten as
+# soon as its `FrozenBagBag` dies. A tuple is kept with a strong reference.
+
+@caching.cache(max_size=10 ** 5, thread_safe=True)
+def _calculate_length_of_recurrent_perm_space(k_and_fbb):
+    return _calculate_length_with_generating_function(*k_and_fbb,
+                                                      is_exponential=True)
+
+
+@caching.cache(max_size=10 ** 5, thread_safe=True)
+def _calculate_length_of_recurrent_comb_space(k_and_fbb):
+    return _calculate_length_with_generating_function(*k_and_fbb,
+                                                      is_exponential=False)
+
+
+def _calculate_length(k, fbb, cached_calculate_length):
     if not isinstance(fbb, nifty_collections.FrozenBagBag):
         fbb = nifty_collections.FrozenBagBag(fbb)
     ### Checking for edge cases: ##############################################
@@ -115,61 +117,16 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
         return 1
     elif k == 1:
         assert fbb
-        # (Works because `FrozenBagBag` has a functioning `__bool__`,
-        # unlike Python's `Counter`.)
+        # (Works because `FrozenBagBag` has a functioning `__bool__`, unlike
+        # Python's `Counter`.)
         return fbb.n_elements
     #                                                                         #
     ### Finished checking for edge cases. #####################################
 
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
-
-    # This is a 2-phase algorithm, similar to recursion but not really
-    # recursion since we don't want to abuse the stack.
-    #
-    # In the first phase, we get all the sub-FBBs that we need to solve for to
-    # get a solution for this FBB, and then for these sub-FBBs we get the
-    # sub-sub-FBBs we need to solve in order to solve them, and we continue
-    # until we reach trivial FBBs.
-    #
-    # In the second phase, we'll go over the levels of FBBs, starting with the
-    # simplest ones and making our way up to the original FBB. The simplest
-    # FBBs will be solved trivially, and then as they get progressively more
-    # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
-
-
-    ### Doing phase one, getting all sub-FBBs: ################################
-    #                                                                         #
-    levels = []
-    current_fbbs = {fbb}
-    while len(levels) < k and current_fbbs:
-        k_ = k - len(levels)
-        levels.append(
-            {fbb_: fbb_.get_sub_fbbs_for_one_key_and_previous_piles_removed()
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache}
-        )
-        current_fbbs = set(itertools.chain(*levels[-1].values()))
-    #                                                                         #
-    ### Finished doing phase one, getting all sub-FBBs. #######################
-
-    ### Doing phase two, solving FBBs from trivial to complex: ################
-    #                                                                         #
-    for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
-        if k_ == 1:
-            for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = len(sub_fbbs)
-        else:
-            for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] for sub_fbb in sub_fbbs)
-                )
-    #                                                                         #
-    ### Finished doing phase two, solving FBBs from trivial to complex. #######
-
-    return cache[(k, fbb)]
-
+    return cached_calculate_length((k, fbb))
 
 
+calculate_length_of_recurrent_perm_space.cache_info = \
+                         _calculate_length_of_recurrent_perm_space.cache_info
+calculate_length_of_recurrent_comb_space.cache_info = \
+                         _calculate_length_of_recurrent_comb_space.cache_info
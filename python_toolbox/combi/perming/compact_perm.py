@@ -0,0 +1,376 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `CompactPerm` and `PermArray` classes.
+
+See their documentation for more details.
+'''
+
+import array
+import collections
+import functools
+import numbers
+
+from python_toolbox import sequence_tools
+
+from . import cycle_tracking
+
+
+def _get_typecode(sequence_length):
+    '''Get the smallest `array` typecode that can hold indices in a perm.'''
+    if sequence_length <= 2 ** 8:
+        return 'B'
+    elif sequence_length <= 2 ** 16:
+        return 'H'
+    else:
+        return 'L'
+
+
+def _get_nominal_perm_space(perm_space):
+    '''
+    Get the space that compact perms of `perm_space` will refer to.
+
+    Like `Perm.nominal_perm_space`, this drops the slicing, degrees and fixed
+    map of the space. Raises `NotImplementedError` for spaces whose perms
+    aren't sequences of indices.
+    '''
+    nominal_perm_space = perm_space.unsliced.undegreed.unfixed
+    if nominal_perm_space.is_rapplied or nominal_perm_space.is_dapplied or \
+                                          nominal_perm_space.is_combination:
+        raise NotImplementedError(
+            "Compact perms are supported only for spaces that aren't "
+            "rapplied, dapplied or combination spaces."
+        )
+    return nominal_perm_space
+
+
+def _check_perm_sequence(perm_sequence, nominal_perm_space):
+    '''
+    Raise `ValueError` if `perm_sequence` isn't a perm of `nominal_perm_space`.
+
+    The perm must have `n_elements` items, which must be distinct indices of
+    the space's sequence.
+    '''
+    if len(perm_sequence) != nominal_perm_space.n_elements:
+        raise ValueError('%s has %s items, while the perms of %s have %s.' %
+                         (perm_sequence, len(perm_sequence),
+                          nominal_perm_space, nominal_perm_space.n_elements))
+    sequence_length = nominal_perm_space.sequence_length
+    if not all(isinstance(item, int) and 0 <= item < sequence_length
+               for item in perm_sequence):
+        raise ValueError('%s has items that are not indices in '
+                         '`range(%s)`.' % (perm_sequence, sequence_length))
+    if len(set(perm_sequence)) != len(perm_sequence):
+        raise ValueError('%s has repeating items.' % (perm_sequence,))
+
+
+@functools.total_ordering
+class CompactPerm(collections.abc.Sequence):
+    '''
+    A memory-efficient permutation, stored as an `array` of small integers.
+
+    `Perm` keeps a tuple of its items, a few cached properties and a few
+    flags, which add up to hundreds of bytes per perm. `CompactPerm` has
+    `__slots__` and keeps only an `array` of its items and a reference to its
+    perm space, which is shared between all the perms of the space. Use it
+    when keeping millions of perms in memory. (Or use `PermArray` to keep
+    many perms in a single buffer.)
+
+    It supports the `apply`, `inverse`, `degree` and `n_cycles` API of `Perm`,
+    but it's only available for perms that are sequences of indices, i.e.
+    perms of spaces that aren't rapplied, dapplied or combination spaces.
+    Nothing is cached, so `inverse` and `n_cycles` are computed every time.
+
+    Example:
+
+        >>> perm = CompactPerm(PermSpace(5)[10])
+        >>> perm
+        <CompactPerm: (0, 2, 4, 1, 3)>
+        >>> perm.n_cycles
+        2
+        >>> perm.to_perm()
+        <Perm: (0, 2, 4, 1, 3)>
+
+    '''
+    __slots__ = ('_array', 'nominal_perm_space')
+
+    def __init__(self, perm_sequence, perm_space=None):
+        '''
+        Create the `CompactPerm`.
+
+        If `perm_space` is not supplied, it's taken from `perm_sequence` if
+        it's a `Perm` or a `CompactPerm`, and otherwise we assume that this is
+        a pure permutation, i.e. a permutation on `range(len(perm_sequence))`.
+
+        Raises `ValueError` if `perm_sequence` isn't a permutation in
+        `perm_space`.
+        '''
+        perm_sequence = sequence_tools. \
+                           ensure_iterable_is_immutable_sequence(perm_sequence)
+        if perm_space is None:
+            if isinstance(perm_sequence, (Perm, CompactPerm)):
+                perm_space = perm_sequence.nominal_perm_space
+            else:
+                perm_space = PermSpace(len(perm_sequence))
+        self.nominal_perm_space = _get_nominal_perm_space(
+            PermSpace.coerce(perm_space)
+        )
+        _check_perm_sequence(perm_sequence, self.nominal_perm_space)
+        self._array = array.array(
+            _get_typecode(self.nominal_perm_space.sequence_length),
+            perm_sequence
+        )
+
+
+    @classmethod
+    def _from_array(cls, array_, nominal_perm_space):
+        '''Create a `CompactPerm` from an `array`, without copying it.'''
+        compact_perm = cls.__new__(cls)
+        compact_perm._array = array_
+        compact_perm.nominal_perm_space = nominal_perm_space
+        return compact_perm
+
+
+    def to_perm(self):
+        '''Get a `Perm` that's equal to this compact perm.'''
+        return Perm(tuple(self._array), self.nominal_perm_space)
+
+
+    length = property(lambda self: len(self._array))
+    __len__ = lambda self: len(self._array)
+    __iter__ = lambda self: iter(self._array)
+    __getitem__ = lambda self, i: self._array[i]
+    __contains__ = lambda self, item: item in self._array
+    __bool__ = lambda self: bool(self._array)
+    is_partial = property(lambda self: self.nominal_perm_space.is_partial)
+
+    def index(self, member):
+        '''Get the index number of `member` in the permutation.'''
+        return self._array.index(member)
+
+    _reduced = property(lambda self: (
+        type(self), self._array.tobytes(), self.nominal_perm_space
+    ))
+    __hash__ = lambda self: hash(self._reduced)
+
+    def __eq__(self, other):
+        return type(self) == type(other) and \
+               self.nominal_perm_space == other.nominal_perm_space and \
+                                                    self._array == other._array
+
+    __ne__ = lambda self, other: not (self == other)
+
+    def __lt__(self, other):
+        if isinstance(other, CompactPerm) and \
+                           self.nominal_perm_space == other.nominal_perm_space:
+            return self._array < other._array
+        else:
+            return NotImplemented
+
+    def __repr__(self):
+        return '<%s%s: (%s%s)>' % (
+            type(self).__name__,
+            (', n_elements=%s' % len(self)) if self.is_partial else '',
+            ', '.join(map(repr, self._array)),
+            ',' if len(self) == 1 else ''
+        )
+
+
+    @property
+    def inverse(self):
+        '''
+        The inverse of this permutation.
+
+        This is also accessible as `~perm`.
+        '''
+        if self.is_partial:
+            raise TypeError("Partial perms don't have an inverse.")
+        inverse_array = array.array(self._array.typecode, self._array)
+        for i, item in enumerate(self._array):
+            inverse_array[item] = i
+        return CompactPerm._from_array(inverse_array,
+                                       self.nominal_perm_space)
+
+    __invert__ = lambda self: self.inverse
+
+
+    def apply(self, sequence, result_type=None):
+        '''
+        Apply the perm to a sequence, choosing items from it.
+
+        This can also be used as `sequence * perm`. Like `Perm.apply`, if
+        `result_type=None` the result is a `tuple`, except when `sequence` is
+        a `str`, `Perm` or `CompactPerm`, in which case that same type is used.
+        '''
+        if isinstance(sequence, CompactPerm):
+            if len(sequence) < len(self):
+                raise Exception("Can't apply permutation on sequence of "
+                                "shorter length.")
+            if result_type is None:
+                other_array = sequence._array
+                return CompactPerm._from_array(
+                    array.array(other_array.typecode,
+                                map(other_array.__getitem__, self._array)),
+                    sequence.nominal_perm_space
+                )
+            sequence = sequence._array
+        elif isinstance(sequence, Perm):
+            return self.to_perm().apply(sequence, result_type)
+        return Perm.apply(self, sequence, result_type)
+
+    __rmul__ = apply
+
+    __mul__ = lambda self, other: other.__rmul__(self)
+
+
+    def __pow__(self, exponent):
+        '''Raise the perm by the power of `exponent`.'''
+        assert isinstance(exponent, numbers.Integral)
+        if not self.is_partial:
+            return CompactPerm._from_array(
+                array.array(self._array.typecode,
+                            cycle_tracking.get_power_of_cycles(self.cycles,
+                                                               exponent)),
+                self.nominal_perm_space
+            )
+        elif exponent <= -1:
+            return self.inverse ** (- exponent)
+        result = CompactPerm._from_array(
+            array.array(self._array.typecode, range(len(self))),
+            self.nominal_perm_space
+        )
+        base = self
+        while exponent:
+            if exponent & 1:
+                result = base * result
+            exponent >>= 1
+            if exponent:
+                base = base * base
+        return result
+
+
+    @property
+    def cycles(self):
+        '''The cycles of this permutation, like `Perm.cycles`.'''
+        if self.is_partial:
+            raise TypeError("Partial perms don't have cycles.")
+        return cycle_tracking.get_cycles(self._array)
+
+
+    @property
+    def n_cycles(self):
+        '''The number of cycles in this permutation.'''
+        if self.is_partial:
+            return NotImplemented
+        return len(self.cycles)
+
+
+    @property
+    def degree(self):
+        '''
+        The permutation's degree.
+
+        This is the number of switches of two items that turn the identity
+        permutation into this permutation.
+        '''
+        if self.is_partial:
+            return NotImplemented
+        else:
+            return len(self) - self.n_cycles
+
+
+class PermArray(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
+    '''
+    A list of perms from one perm space, stored in a single `array`.
+
+    Every perm takes `n_elements` integers of one or two bytes each (for
+    spaces with up to 256 or 65536 items), with no per-perm object overhead.
+    Perms are returned as `CompactPerm` objects, which are created on access.
+
+    Example:
+
+        >>> perm_array = PermArray(PermSpace(4), PermSpace(4)[:3])
+        >>> perm_array
+        <PermArray: 3 perms of <PermSpace: 0..3>>
+        >>> perm_array[2]
+        <CompactPerm: (0, 2, 1, 3)>
+        >>> perm_array.append((3, 2, 1, 0))
+        >>> perm_array.index(PermSpace(4)[-1])
+        3
+
+    '''
+    def __init__(self, perm_space, perms=()):
+        self.nominal_perm_space = _get_nominal_perm_space(
+            PermSpace.coerce(perm_space)
+        )
+        '''The perm space that the perms belong to.'''
+
+        self.n_elements = self.nominal_perm_space.n_elements
+        '''The number of items in every perm.'''
+
+        self._array = array.array(
+            _get_typecode(self.nominal_perm_space.sequence_length)
+        )
+        self.length = 0
+        '''The number of perms in the array.'''
+
+        self.extend(perms)
+
+
+    def append(self, perm):
+        '''
+        Add `perm` to the end of the array.
+
+        Raises `ValueError` if `perm` isn't a permutation in the array's perm
+        space.
+        '''
+        perm = sequence_tools.ensure_iterable_is_immutable_sequence(perm)
+        _check_perm_sequence(perm, self.nominal_perm_space)
+        self._array.extend(perm)
+        self.length += 1
+
+
+    def extend(self, perms):
+        '''Add every perm in `perms` to the end of the array.'''
+        for perm in perms:
+            self.append(perm)
+
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            perm_array = PermArray(self.nominal_perm_space)
+            perm_array.extend(
+                self._get_perm_array(j) for j in range(*i.indices(len(self)))
+            )
+            return perm_array
+        if i < 0:
+            i += len(self)
+        if not (0 <= i < len(self)):
+            raise IndexError
+        return CompactPerm._from_array(self._get_perm_array(i),
+                                       self.nominal_perm_space)
+
+
+    def _get_perm_array(self, i):
+        return self._array[i * self.n_elements:(i + 1) * self.n_elements]
+
+
+    def index(self, perm):
+        '''Get the index number of `perm` in this array.'''
+        try:
+            perm_array = array.array(self._array.typecode, perm)
+        except (TypeError, OverflowError) as exception:
+            raise ValueError from exception
+        for i in range(len(self)):
+            if self._get_perm_array(i) == perm_array:
+                return i
+        raise ValueError
+
+    def __repr__(self):
+        return '<%s: %s perms of %s>' % (type(self).__name__, len(self),
+                                         self.nominal_perm_space)
+
+
+from .perm_space import PermSpace
+from .perm import Perm
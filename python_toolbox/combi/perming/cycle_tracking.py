@@ -0,0 +1,132 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines tools for working with the cycles of perms.
+
+See the documentation of `CycleTracker`, `get_cycles` and
+`get_power_of_cycles` for more details.
+'''
+
+_MISSING = object()
+
+
+class CycleTracker:
+    '''
+    Tracker of the cycles in a pure perm that's being built item by item.
+
+    This is used for degreed perm spaces, where we need to know how many
+    cycles are closed by the items we've set so far. The items that were set
+    form chains like `3 -> 5 -> 0`, and for each chain we keep its start and
+    its end, so we can tell in O(1) whether setting an item closes a cycle,
+    rather than walking through the chain.
+
+    Every change can be undone, which is useful for depth-first walks.
+    '''
+    def __init__(self, fixed_map=None):
+        self._start_by_end = {}
+        '''`dict` mapping from the end of each chain to its start.'''
+
+        self._end_by_start = {}
+        '''`dict` mapping from the start of each chain to its end.'''
+
+        self.n_closed_cycles = 0
+        '''The number of cycles that were closed so far.'''
+
+        for key, value in (fixed_map or {}).items():
+            self.add(key, value)
+
+
+    def get_closing_value(self, key):
+        '''
+        Get the value that would close a cycle if `key` is mapped to it.
+
+        `key` must not be mapped yet. The closing value is the start of the
+        chain that ends with `key`, which might be `key` itself.
+        '''
+        return self._start_by_end.get(key, key)
+
+
+    def add(self, key, value):
+        '''
+        Map `key` to `value`.
+
+        `key` must not be mapped yet, and `value` must not be mapped to yet.
+        Returns a token that can be given to `undo` to cancel this.
+        '''
+        start = self._start_by_end.get(key, key)
+        end = self._end_by_start.get(value, value)
+        token = (
+            start, end, key, value,
+            self._end_by_start.get(start, _MISSING),
+            self._end_by_start.get(value, _MISSING),
+            self._start_by_end.get(key, _MISSING),
+            self._start_by_end.get(end, _MISSING),
+        )
+        self._end_by_start.pop(value, None)
+        self._start_by_end.pop(key, None)
+        if start == value:
+            self.n_closed_cycles += 1
+        else:
+            self._end_by_start[start] = end
+            self._start_by_end[end] = start
+        return token
+
+
+    def undo(self, token):
+        '''Cancel a mapping that was made with `add`, given its token.'''
+        (start, end, key, value, old_end_of_start, old_end_of_value,
+                                  old_start_of_key, old_start_of_end) = token
+        if start == value:
+            self.n_closed_cycles -= 1
+        for dict_, dict_key, old_value in (
+                (self._end_by_start, start, old_end_of_start),
+                (self._end_by_start, value, old_end_of_value),
+                (self._start_by_end, key, old_start_of_key),
+                (self._start_by_end, end, old_start_of_end)):
+            if old_value is _MISSING:
+                dict_.pop(dict_key, None)
+            else:
+                dict_[dict_key] = old_value
+
+
+def get_cycles(perm_sequence):
+    '''
+    Get the cycles of a pure perm, given as a sequence of indices.
+
+    Each cycle is a tuple that starts with its lowest item, and the cycles are
+    sorted by their first items. Example:
+
+        >>> get_cycles((2, 0, 1, 3))
+        ((0, 2, 1), (3,))
+
+    '''
+    visited = bytearray(len(perm_sequence))
+    cycles = []
+    for starting_item in range(len(perm_sequence)):
+        if visited[starting_item]:
+            continue
+        cycle = []
+        current_item = starting_item
+        while not visited[current_item]:
+            visited[current_item] = 1
+            cycle.append(current_item)
+            current_item = perm_sequence[current_item]
+        cycles.append(tuple(cycle))
+    return tuple(cycles)
+
+
+def get_power_of_cycles(cycles, exponent):
+    '''
+    Get the perm sequence of a pure perm raised to the power of `exponent`.
+
+    `cycles` are the perm's cycles, like `get_cycles` returns. Every cycle is
+    rotated by `exponent` modulo its length, so this takes O(n) time however
+    big `exponent` is. (Negative exponents work too.)
+    '''
+    perm_sequence = [None] * sum(map(len, cycles))
+    for cycle in cycles:
+        shift = exponent % len(cycle)
+        for item, new_item in zip(cycle, cycle[shift:] + cycle[:shift]):
+            perm_sequence[item] = new_item
+    return perm_sequence
@@ -0,0 +1,72 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines functions for stepping through perms without unranking each one.
+
+These are used by `PermSpace.__iter__`. Each function yields tuples of
+integer indices into the space's sequence, in the same order that
+`PermSpace.__getitem__` defines, and can start from any given item.
+'''
+
+import itertools
+
+
+def iterate_k_permutation_indices(n, k, first=None):
+    '''
+    Iterate over the `k`-permutations of `range(n)` in lexicographic order.
+
+    If `first` is given, the iteration starts from it rather than from the
+    first `k`-permutation. Every step takes amortized O(n - k) time, so full
+    permutations take amortized O(1) time per step.
+    '''
+    if first is None:
+        yield from itertools.permutations(range(n), k)
+        return
+    assert len(first) == k <= n
+    if k == 0:
+        yield ()
+        return
+
+    first_set = set(first)
+    array = list(first) + [i for i in range(n) if i not in first_set]
+    while True:
+        yield tuple(array[:k])
+        # Reversing the unused tail so it's in descending order, and then the
+        # next permutation of the whole array gives us the next
+        # `k`-permutation.
+        array[k:] = array[:k - 1:-1]
+        i = n - 2
+        while i >= 0 and array[i] > array[i + 1]:
+            i -= 1
+        if i < 0:
+            return
+        j = n - 1
+        while array[j] < array[i]:
+            j -= 1
+        array[i], array[j] = array[j], array[i]
+        array[i + 1:] = array[:i:-1]
+
+
+def iterate_combination_indices(n, k, first=None):
+    '''
+    Iterate over the `k`-combinations of `range(n)` in lexicographic order.
+
+    If `first` is given, the iteration starts from it rather than from the
+    first `k`-combination. Every step takes amortized O(1) time.
+    '''
+    if first is None:
+        yield from itertools.combinations(range(n), k)
+        return
+    assert len(first) == k <= n
+    combination = list(first)
+    while True:
+        yield tuple(combination)
+        i = k - 1
+        while i >= 0 and combination[i] == i + n - k:
+            i -= 1
+        if i < 0:
+            return
+        combination[i] += 1
+        for j in range(i + 1, k):
+            combination[j] = combination[j - 1] + 1
@@ -13,6 +13,7 @@ from python_toolbox import sequence_tools
 from python_toolbox import cute_iter_tools
 
 from .. import misc
+from . import cycle_tracking
 
 
 infinity = float('inf')
@@ -227,14 +228,10 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
             raise TypeError("Rapplied perms don't have an inverse.")
         if self.is_dapplied:
             raise TypeError("Dapplied perms don't have an inverse.")
-        if self.is_rapplied:
-            return self.nominal_perm_space[0] * self.unrapplied.inverse
-        else:
-            _perm = [None] * \
-                     self.nominal_perm_space.sequence_length
-            for i, item in enumerate(self):
-                _perm[item] = i
-            return type(self)(_perm, self.nominal_perm_space)
+        return type(self)(
+            cycle_tracking.get_power_of_cycles(self.cycles, -1),
+            self.nominal_perm_space
+        )
 
 
     __invert__ = lambda self: self.inverse
@@ -335,6 +332,8 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         elif isinstance(sequence, Perm):
             return type(self)(permed_generator,
                               sequence.nominal_perm_space)
+        elif isinstance(sequence, CompactPerm):
+            return CompactPerm(permed_generator, sequence.nominal_perm_space)
         elif isinstance(sequence, str):
             return ''.join(permed_generator)
         else:
@@ -348,9 +347,19 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
     # multiplication of objects of the same type.)
 
     def __pow__(self, exponent):
-        '''Raise the perm by the power of `exponent`.'''
+        '''
+        Raise the perm by the power of `exponent`.
+
+        For perms that aren't rapplied, dapplied or partial, this rotates each
+        of the perm's cycles, so it takes O(n) time however big `exponent` is.
+        '''
         assert isinstance(exponent, numbers.Integral)
-        if exponent <= -1:
+        if not (self.is_rapplied or self.is_dapplied or self.is_partial):
+            return type(self)(
+                cycle_tracking.get_power_of_cycles(self.cycles, exponent),
+                self.nominal_perm_space
+            )
+        elif exponent <= -1:
             return self.inverse ** (- exponent)
         elif exponent == 0:
             return self.nominal_perm_space[0]
@@ -387,24 +396,34 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         '''
         if self.is_partial:
             return NotImplemented
-        if self.is_rapplied:
-            return self.unrapplied.n_cycles
-        if self.is_dapplied:
-            return self.undapplied.n_cycles
+        return len(self.cycles)
 
-        unvisited_items = set(self)
-        n_cycles = 0
-        while unvisited_items:
-            starting_item = current_item = next(iter(unvisited_items))
 
-            while current_item in unvisited_items:
-                unvisited_items.remove(current_item)
-                current_item = self[current_item]
+    @caching.CachedProperty
+    def cycles(self):
+        '''
+        The cycles of this permutation, as tuples of index numbers.
+
+        Each cycle starts with its lowest index number, and the cycles are
+        sorted by their first items. For rapplied and dapplied perms, these are
+        the cycles of the unrapplied and undapplied perm. Example:
 
-            if current_item == starting_item:
-                n_cycles += 1
+            >>> perm = PermSpace(5)[10]
+            >>> perm
+            <Perm: (0, 2, 4, 1, 3)>
+            >>> perm.cycles
+            ((0,), (1, 2, 4, 3))
 
-        return n_cycles
+        `n_cycles`, `degree`, `inverse` and `**` all use this, so the perm is
+        walked only once.
+        '''
+        if self.is_partial:
+            raise TypeError("Partial perms don't have cycles.")
+        if self.is_rapplied:
+            return self.unrapplied.cycles
+        if self.is_dapplied:
+            return self.undapplied.cycles
+        return cycle_tracking.get_cycles(self._perm_sequence)
 
 
     def get_neighbors(self, *, degrees=(1,), perm_space=None):
@@ -468,3 +487,4 @@ class UnrecurrentedPerm(UnrecurrentedMixin, Perm):
 from .perm_space import PermSpace
 from .comb_space import CombSpace
 from .comb import Comb
+from .compact_perm import CompactPerm
@@ -4,10 +4,12 @@
 import collections
 import abc
 import functools
+import itertools
 import types
 import math
 import numbers
 import inspect
+import operator
 
 from python_toolbox import caching
 from python_toolbox import math_tools
@@ -18,6 +20,9 @@ from python_toolbox import dict_tools
 from python_toolbox import misc_tools
 
 from .. import misc
+from ..slice_space import SliceSpace
+from . import cycle_tracking
+from . import iterating
 from . import variations
 from .calculating_length import *
 from .variations import UnallowedVariationSelectionException
@@ -25,9 +30,62 @@ from ._variation_removing_mixin import _VariationRemovingMixin
 from ._variation_adding_mixin import _VariationAddingMixin
 from ._fixed_map_managing_mixin import _FixedMapManagingMixin
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 infinity = float('inf')
 
 
+def _make_numpy_array(items, shape):
+    '''
+    Make a NumPy array with the given `shape` out of nested sequences `items`.
+
+    If the innermost items are sequences themselves, we don't let NumPy add
+    dimensions for them, and make an array of objects instead.
+    '''
+    array = numpy.array(items)
+    if array.shape == shape:
+        return array
+    elif array.size == 0:
+        return array.reshape(shape)
+    array = numpy.empty(shape, dtype=object)
+    for index in numpy.ndindex(*shape):
+        item = items
+        for i in index:
+            item = item[i]
+        array[index] = item
+    return array
+
+
+def _pick_degreed_candidate(first_index, n_candidates, closing_index,
+                            open_length, closing_length, wip_i):
+    '''
+    Pick the candidate value for the next item of a perm in a degreed space.
+
+    The candidates are the available values from `first_index` on. Each of
+    them leads to `open_length` perms, except the one at `closing_index`,
+    which closes a cycle and leads to `closing_length` perms. We skip over
+    `wip_i` perms and return the index of the candidate we land on, and the
+    number of perms left to skip inside it. If we run out of candidates, the
+    index is `None`.
+    '''
+    if first_index <= closing_index:
+        n_open_candidates = closing_index - first_index
+        if wip_i < n_open_candidates * open_length:
+            return (first_index + wip_i // open_length, wip_i % open_length)
+        wip_i -= n_open_candidates * open_length
+        if wip_i < closing_length:
+            return (closing_index, wip_i)
+        wip_i -= closing_length
+        first_index = closing_index + 1
+    n_open_candidates = n_candidates - first_index
+    if wip_i < n_open_candidates * open_length:
+        return (first_index + wip_i // open_length, wip_i % open_length)
+    return (None, wip_i - n_open_candidates * open_length)
+
+
 class PermSpaceType(abc.ABCMeta):
     '''
     Metaclass for `PermSpace` and `CombSpace`.
@@ -453,6 +511,37 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 # This division is always without a remainder, because math.
 
 
+    _degreed_lengths_cache = caching.CachedProperty(
+        lambda self: {},
+        '''`dict` used as a cache by `_get_degreed_lengths`.'''
+    )
+
+    def _get_degreed_lengths(self, n_free_items, n_closed_cycles):
+        '''
+        Count the ways to finish a partially-built perm of this degreed space.
+
+        `n_free_items` is the number of items that would still be free after
+        setting the next item, and `n_closed_cycles` is the number of cycles
+        that were closed so far. Returns a tuple of two numbers: The number of
+        perms we'd get if the next item doesn't close a cycle, and the number
+        if it does.
+        '''
+        try:
+            return self._degreed_lengths_cache[(n_free_items, n_closed_cycles)]
+        except KeyError:
+            degreed_lengths = tuple(
+                sum(
+                    math_tools.abs_stirling(
+                        n_free_items,
+                        self.sequence_length - degree - n_cycles
+                    ) for degree in self.degrees
+                ) for n_cycles in (n_closed_cycles, n_closed_cycles + 1)
+            )
+            self._degreed_lengths_cache[(n_free_items, n_closed_cycles)] = \
+                                                                degreed_lengths
+            return degreed_lengths
+
+
     @caching.CachedProperty
     def variation_selection(self):
         '''
@@ -533,6 +622,10 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
 
     def __getitem__(self, i):
         if isinstance(i, (slice, sequence_tools.CanonicalSlice)):
+            if i.step not in (1, None):
+                # A perm space can only be sliced contiguously, so a slice
+                # with a step is a lazy `SliceSpace` of this space:
+                return SliceSpace.from_slice(self, i)
             canonical_slice = sequence_tools.CanonicalSlice(
                 i, self.length, offset=self.canonical_slice.start
             )
@@ -553,6 +646,23 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             return self.unsliced[i + self.canonical_slice.start]
         elif self.is_dapplied:
             return self.perm_type(self.undapplied[i], perm_space=self)
+        else:
+            return self.perm_type(self._get_perm_sequence(i), self)
+
+
+    def _get_perm_sequence(self, i):
+        '''
+        Get the perm sequence at index `i`, as a plain tuple.
+
+        This does the actual unranking for `__getitem__` and `get_many`. `i`
+        must be a valid, non-negative index.
+        '''
+        if self.is_sliced:
+            return self.unsliced._get_perm_sequence(
+                i + self.canonical_slice.start
+            )
+        elif self.is_dapplied:
+            return self.undapplied._get_perm_sequence(i)
 
         #######################################################################
         elif self.is_degreed:
@@ -560,9 +670,8 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 assert not self.is_recurrent and \
                        not self.is_partial and not self.is_combination and \
                        not self.is_dapplied and not self.is_sliced
-                return self.perm_type(map(self.sequence.__getitem__,
-                                          self.unrapplied[i]),
-                                      perm_space=self)
+                return tuple(map(self.sequence.__getitem__,
+                                 self.unrapplied._get_perm_sequence(i)))
 
 
             assert not self.is_rapplied and not self.is_recurrent and \
@@ -571,61 +680,32 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             # If that wasn't an example of asserting one's dominance, I don't
             # know what is.
 
+            # For each free index, we go over the values that are still
+            # available. All the candidates lead to the same number of perms,
+            # except the one candidate that closes a cycle, so we can skip
+            # straight to the right candidate.
             available_values = list(self.free_values)
-            wip_perm_sequence_dict = dict(self.fixed_map)
-            wip_n_cycles_in_fixed_items = \
-                                    self._n_cycles_in_fixed_items_of_just_fixed
+            wip_perm_sequence = [self.fixed_map.get(j) for j in self.sequence]
+            cycle_tracker = cycle_tracking.CycleTracker(self.fixed_map)
             wip_i = i
-            for j in self.sequence:
-                if j in wip_perm_sequence_dict:
-                    continue
-                for unused_value in available_values:
-                    candidate_perm_sequence_dict = dict(wip_perm_sequence_dict)
-                    candidate_perm_sequence_dict[j] = unused_value
-
-                    ### Checking whether we closed a cycle: ###################
-                    #                                                         #
-                    if j == unused_value:
-                        closed_cycle = True
-                    else:
-                        current = j
-                        while True:
-                            current = candidate_perm_sequence_dict[current]
-                            if current == j:
-                                closed_cycle = True
-                                break
-                            elif current not in candidate_perm_sequence_dict:
-                                closed_cycle = False
-                                break
-                    #                                                         #
-                    ### Finished checking whether we closed a cycle. ##########
-
-                    candidate_n_cycles_in_fixed_items = \
-                                     wip_n_cycles_in_fixed_items + closed_cycle
-
-                    candidate_fixed_perm_space_length = sum(
-                        math_tools.abs_stirling(
-                            self.sequence_length -
-                                             len(candidate_perm_sequence_dict),
-                            self.sequence_length - degree -
-                                              candidate_n_cycles_in_fixed_items
-                        ) for degree in self.degrees
-                    )
-
-
-                    if wip_i < candidate_fixed_perm_space_length:
-                        available_values.remove(unused_value)
-                        wip_perm_sequence_dict[j] = unused_value
-                        wip_n_cycles_in_fixed_items = \
-                                              candidate_n_cycles_in_fixed_items
-
-                        break
-                    wip_i -= candidate_fixed_perm_space_length
-                else:
-                    raise RuntimeError
+            for n_free_items_left, j in \
+                         zip(reversed(range(len(self.free_indices))),
+                             self.free_indices):
+                open_length, closing_length = self._get_degreed_lengths(
+                    n_free_items_left, cycle_tracker.n_closed_cycles
+                )
+                closing_index = available_values.index(
+                    cycle_tracker.get_closing_value(j)
+                )
+                index_of_value, wip_i = _pick_degreed_candidate(
+                    0, len(available_values), closing_index, open_length,
+                    closing_length, wip_i
+                )
+                value = available_values.pop(index_of_value)
+                cycle_tracker.add(j, value)
+                wip_perm_sequence[j] = value
             assert wip_i == 0
-            return self.perm_type((wip_perm_sequence_dict[k] for k in
-                                   self.domain), self)
+            return tuple(wip_perm_sequence)
 
         #######################################################################
         elif self.is_recurrent:
@@ -669,22 +749,17 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 else:
                     raise RuntimeError
             assert wip_i == 0
-            return self.perm_type(
-                dict_tools.get_tuple(wip_perm_sequence_dict, self.domain),
-                self
-            )
+            return dict_tools.get_tuple(wip_perm_sequence_dict, self.domain)
 
         #######################################################################
         elif self.is_fixed:
-            free_values_perm = self._free_values_unsliced_perm_space[i]
-            free_values_perm_iterator = iter(free_values_perm)
-            return self.perm_type(
-                tuple(
-                    (self._undapplied_fixed_map[m] if
-                     (m in self.fixed_indices) else
-                     next(free_values_perm_iterator)) for m in self.indices
-                ),
-                self
+            free_values_perm_sequence = \
+                 self._free_values_unsliced_perm_space._get_perm_sequence(i)
+            free_values_perm_iterator = iter(free_values_perm_sequence)
+            return tuple(
+                (self._undapplied_fixed_map[m] if
+                 (m in self.fixed_indices) else
+                 next(free_values_perm_iterator)) for m in self.indices
             )
 
         #######################################################################
@@ -704,7 +779,7 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                     raise RuntimeError
             result = tuple(wip_perm_sequence)
             assert len(result) == self.n_elements
-            return self.perm_type(result, self)
+            return result
 
 
         #######################################################################
@@ -720,7 +795,124 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             result = tuple(unused_numbers.pop(factoradic_digit) for
                                          factoradic_digit in factoradic_number)
             assert sequence_tools.get_length(result) == self.n_elements
-            return self.perm_type(result, self)
+            return result
+
+
+    def get_many(self, indices):
+        '''
+        Get the perm sequences at many indices at once, without making perms.
+
+        `indices` may be any iterable of integers, like a `range` or a NumPy
+        array, and may include negative indices. If NumPy is installed, the
+        result is a NumPy array with a row of length `n_elements` for each
+        index; otherwise it's a list of tuples.
+
+        This is much faster than getting the perms one by one. For spaces
+        that are only rapplied, dapplied, partial or sliced, indices that are
+        close to each other share the work on their common prefix, and if NumPy
+        is installed the unranking is vectorized.
+        '''
+        indices = list(map(operator.index, indices))
+        for j, i in enumerate(indices):
+            if i <= -1:
+                i += self.length
+            if not (0 <= i < self.length):
+                raise IndexError
+            indices[j] = i + self.canonical_slice.start
+        perm_sequences = self.unsliced.undapplied._get_many(indices)
+        if numpy is not None and not isinstance(perm_sequences,
+                                                numpy.ndarray):
+            perm_sequences = _make_numpy_array(
+                perm_sequences, (len(indices), self.n_elements)
+            )
+        return perm_sequences
+
+
+    def _get_many(self, indices):
+        '''
+        Get the perm sequences at `indices` of this unsliced, undapplied space.
+
+        `indices` must be a list of valid, non-negative indices. Returns a list
+        of tuples, or a NumPy array where possible.
+        '''
+        assert not self.is_sliced and not self.is_dapplied
+
+        #######################################################################
+        if self.is_recurrent or self.is_degreed or self.is_combination:
+            return list(map(self._get_perm_sequence, indices))
+
+        #######################################################################
+        elif self.is_fixed:
+            free_values_perm_space = \
+                           self._free_values_unsliced_perm_space.undapplied
+            free_values_perm_sequences = \
+                                      free_values_perm_space._get_many(indices)
+            if numpy is not None and isinstance(free_values_perm_sequences,
+                                                numpy.ndarray):
+                free_values_perm_sequences = \
+                                         free_values_perm_sequences.tolist()
+            fixed_map = self._undapplied_fixed_map
+            template = [fixed_map.get(m) for m in self.indices]
+            free_positions = [m for m in self.indices if m not in fixed_map]
+            perm_sequences = []
+            for free_values_perm_sequence in free_values_perm_sequences:
+                for position, value in zip(free_positions,
+                                           free_values_perm_sequence):
+                    template[position] = value
+                perm_sequences.append(tuple(template))
+            return perm_sequences
+
+        #######################################################################
+        elif numpy is not None and self._unsliced_length <= 2 ** 63:
+            # Vectorized unranking: First we get the digits of each index in
+            # the mixed radix of `n, n - 1, ..., n - n_elements + 1`, which
+            # are ranks among the unused items, then we turn these ranks into
+            # indices in the sequence, going from right to left.
+            wip_indices = numpy.array(indices, dtype=numpy.int64)
+            ranks = numpy.empty((len(indices), self.n_elements),
+                                dtype=numpy.int64)
+            for position in reversed(range(self.n_elements)):
+                radix = self.sequence_length - position
+                ranks[:, position] = wip_indices % radix
+                wip_indices //= radix
+            for position in reversed(range(self.n_elements - 1)):
+                ranks[:, position + 1:] += (
+                    ranks[:, position + 1:] >= ranks[:, position:position + 1]
+                )
+            if not self.is_rapplied:
+                return ranks
+            sequence_array = _make_numpy_array(tuple(self.sequence),
+                                               (self.sequence_length,))
+            return sequence_array[ranks]
+
+        #######################################################################
+        else:
+            # Going over the indices in sorted order, so neighboring indices
+            # can share the work on the common prefix of their digits.
+            perm_sequences = [None] * len(indices)
+            unused_items_stack = [list(self.sequence)]
+            perm_sequence = [None] * self.n_elements
+            previous_digits = ()
+            for j in sorted(range(len(indices)), key=indices.__getitem__):
+                wip_i = indices[j]
+                digits = [None] * self.n_elements
+                for position in reversed(range(self.n_elements)):
+                    wip_i, digits[position] = \
+                               divmod(wip_i, self.sequence_length - position)
+                n_common_digits = 0
+                for digit, previous_digit in zip(digits, previous_digits):
+                    if digit != previous_digit:
+                        break
+                    n_common_digits += 1
+                del unused_items_stack[n_common_digits + 1:]
+                for position in range(n_common_digits, self.n_elements):
+                    unused_items = list(unused_items_stack[-1])
+                    perm_sequence[position] = \
+                                          unused_items.pop(digits[position])
+                    unused_items_stack.append(unused_items)
+                perm_sequences[j] = tuple(perm_sequence)
+                previous_digits = digits
+            return perm_sequences
 
 
     enumerated_sequence = caching.CachedProperty(
@@ -732,8 +924,236 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         '''In partial perm spaces, number of elements that aren't used.'''
     )
 
-    __iter__ = lambda self: (self[i] for i in
-                                         sequence_tools.CuteRange(self.length))
+    def __iter__(self):
+        '''
+        Iterate over the perms in this space.
+
+        Rather than unranking every perm from scratch like `__getitem__` does,
+        this steps from each perm to the next one, in the same order.
+        '''
+        unsliced = self.unsliced
+        perm_sequences = itertools.islice(
+            unsliced._iterate_perm_sequences(self.canonical_slice.start),
+            self.length
+        )
+        if self.is_dapplied:
+            undapplied = unsliced.undapplied
+            for perm_sequence in perm_sequences:
+                yield self.perm_type(
+                    undapplied.perm_type(perm_sequence, undapplied),
+                    perm_space=unsliced
+                )
+        else:
+            for perm_sequence in perm_sequences:
+                yield self.perm_type(perm_sequence, unsliced)
+
+
+    def _iterate_perm_sequences(self, start=0):
+        '''
+        Iterate over the perm sequences of this space, starting from `start`.
+
+        The perm sequences are plain tuples, which `__iter__` makes into perms.
+        Slicing is ignored, and so is the domain, because it doesn't change the
+        order of the items.
+        '''
+        if not (0 <= start < self._unsliced_length):
+            return
+
+        #######################################################################
+        if self.is_dapplied:
+            yield from self.undapplied._iterate_perm_sequences(start)
+
+        #######################################################################
+        elif self.is_degreed:
+            if self.is_rapplied:
+                for perm_sequence in \
+                            self.unrapplied._iterate_perm_sequences(start):
+                    yield tuple(map(self.sequence.__getitem__, perm_sequence))
+            else:
+                yield from self._iterate_degreed_perm_sequences(start)
+
+        #######################################################################
+        elif self.is_recurrent:
+            yield from self._iterate_recurrent_perm_sequences(start)
+
+        #######################################################################
+        elif self.is_fixed:
+            fixed_map = self._undapplied_fixed_map
+            template = [fixed_map.get(m) for m in self.indices]
+            free_positions = [m for m in self.indices if m not in fixed_map]
+            free_values_perm_space = self._free_values_unsliced_perm_space
+            free_values_perm_sequences = \
+                     free_values_perm_space._iterate_perm_sequences(start)
+            for free_values_perm_sequence in free_values_perm_sequences:
+                for position, value in zip(free_positions,
+                                           free_values_perm_sequence):
+                    template[position] = value
+                yield tuple(template)
+
+        #######################################################################
+        else:
+            if start:
+                sequence_indices = {
+                    item: i for i, item in enumerate(self.sequence)
+                }
+                first = tuple(map(sequence_indices.__getitem__,
+                                  self._get_perm_sequence(start)))
+            else:
+                first = None
+            if self.is_combination:
+                iterate_indices = iterating.iterate_combination_indices
+            else:
+                iterate_indices = iterating.iterate_k_permutation_indices
+            sequence = self.sequence
+            if not self.is_rapplied:
+                yield from iterate_indices(self.sequence_length,
+                                           self.n_elements, first)
+            else:
+                for indices in iterate_indices(self.sequence_length,
+                                               self.n_elements, first):
+                    yield tuple(map(sequence.__getitem__, indices))
+
+
+    def _iterate_degreed_perm_sequences(self, start=0):
+        '''
+        Iterate over the perm sequences of this degreed space.
+
+        This walks depth-first through the free indices, using a
+        `CycleTracker` to know which candidate closes a cycle. Candidates that
+        lead to no perms of the right degrees are skipped, and so are the
+        candidates before the perm at `start`.
+        '''
+        assert not self.is_rapplied and not self.is_dapplied
+        available_values = list(self.free_values)
+        perm_sequence = [self.fixed_map.get(j) for j in self.sequence]
+        cycle_tracker = cycle_tracking.CycleTracker(self.fixed_map)
+        free_indices = tuple(self.free_indices)
+        wip_i = start
+
+        # Each frame is `[candidate_index, undo_token]` for one free index.
+        frames = []
+
+        def advance(frame):
+            nonlocal wip_i
+            depth = len(frames) - 1
+            j = free_indices[depth]
+            candidate_index, undo_token = frame
+            if undo_token is not None:
+                cycle_tracker.undo(undo_token)
+                available_values.insert(candidate_index, perm_sequence[j])
+            open_length, closing_length = self._get_degreed_lengths(
+                len(free_indices) - depth - 1, cycle_tracker.n_closed_cycles
+            )
+            closing_index = available_values.index(
+                cycle_tracker.get_closing_value(j)
+            )
+            candidate_index, wip_i = _pick_degreed_candidate(
+                candidate_index + 1, len(available_values), closing_index,
+                open_length, closing_length, wip_i
+            )
+            if candidate_index is None:
+                return False
+            value = available_values.pop(candidate_index)
+            frame[0] = candidate_index
+            frame[1] = cycle_tracker.add(j, value)
+            perm_sequence[j] = value
+            return True
+
+        while True:
+            if len(frames) == len(free_indices):
+                assert wip_i == 0
+                yield tuple(perm_sequence)
+            else:
+                frames.append([-1, None])
+            while frames and not advance(frames[-1]):
+                frames.pop()
+            if not frames:
+                return
+
+
+    def _iterate_recurrent_perm_sequences(self, start=0):
+        '''
+        Iterate over the perm sequences of this recurrent space.
+
+        This walks through the same tree of choices that `__getitem__` walks
+        through, depth-first, using an explicit stack. Subtrees are counted
+        only on the way down to the perm at `start`.
+        '''
+        available_values = list(self.sequence)
+        reserved_values = nifty_collections.Bag(self.fixed_map.values())
+        shit_set = set()
+        perm_sequence = [None] * self.n_elements
+        wip_i = start
+
+        # Each frame is `[candidates, candidate_index, removed_index,
+        # is_fixed, shit_set_additions]` for one position in the perm.
+        frames = []
+
+        def advance(frame):
+            nonlocal wip_i
+            candidates, candidate_index, removed_index, is_fixed, \
+                                                   shit_set_additions = frame
+            j = len(frames) - 1
+            if removed_index is not None:
+                value = candidates[candidate_index]
+                available_values.insert(removed_index, value)
+                if is_fixed:
+                    reserved_values[value] += 1
+                elif self.is_combination:
+                    shit_set.add(value)
+                    shit_set_additions.append(value)
+            while True:
+                candidate_index += 1
+                if candidate_index == len(candidates):
+                    shit_set.difference_update(shit_set_additions)
+                    return False
+                value = candidates[candidate_index]
+                if wip_i and not is_fixed:
+                    wip_perm_sequence_dict = dict(self.fixed_map)
+                    wip_perm_sequence_dict.update(enumerate(perm_sequence[:j]))
+                    wip_perm_sequence_dict[j] = value
+                    candidate_sub_perm_space_length = \
+                                             PermSpace._create_with_cut_prefix(
+                        self.sequence,
+                        n_elements=self.n_elements,
+                        fixed_map=wip_perm_sequence_dict,
+                        is_combination=self.is_combination,
+                        shit_set=shit_set, perm_type=self.perm_type
+                    ).length
+                    if wip_i >= candidate_sub_perm_space_length:
+                        wip_i -= candidate_sub_perm_space_length
+                        if self.is_combination:
+                            shit_set.add(value)
+                            shit_set_additions.append(value)
+                        continue
+                break
+            frame[1] = candidate_index
+            frame[2] = available_values.index(value)
+            del available_values[frame[2]]
+            if is_fixed:
+                reserved_values[value] -= 1
+            perm_sequence[j] = value
+            return True
+
+        while True:
+            j = len(frames)
+            if j == self.n_elements:
+                assert wip_i == 0
+                yield tuple(perm_sequence)
+            elif j in self.fixed_map:
+                frames.append([(self.fixed_map[j],), -1, None, True, []])
+            else:
+                frames.append([
+                    [item for item in
+                     nifty_collections.OrderedBag(available_values) -
+                     reserved_values if item not in shit_set],
+                    -1, None, False, []
+                ])
+            while frames and not advance(frames[-1]):
+                frames.pop()
+            if not frames:
+                return
+
     _reduced = property(
         lambda self: (
             type(self), self.sequence, self.domain,
@@ -784,23 +1204,27 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         #######################################################################
         elif self.is_degreed:
             if perm.is_rapplied: return self.unrapplied.index(perm.unrapplied)
+            # Like in `__getitem__`, all the lower candidates lead to the same
+            # number of perms, except for the one that closes a cycle.
+            available_values = list(self.free_values)
+            cycle_tracker = cycle_tracking.CycleTracker(self.fixed_map)
             wip_perm_number = 0
-            wip_perm_sequence_dict = dict(self.fixed_map)
-            unused_values = list(self.free_values)
-            for i, value in enumerate(perm._perm_sequence):
-                if i in self.fixed_indices:
-                    continue
-                unused_values.remove(value)
-                lower_values = [j for j in unused_values if j < value]
-                for lower_value in lower_values:
-                    temp_fixed_map = dict(wip_perm_sequence_dict)
-                    temp_fixed_map[i] = lower_value
-                    wip_perm_number += PermSpace(
-                        self.sequence_length, degrees=self.degrees,
-                        fixed_map=temp_fixed_map
-                    ).length
-
-                wip_perm_sequence_dict[self.domain[i]] = value
+            for n_free_items_left, j in \
+                         zip(reversed(range(len(self.free_indices))),
+                             self.free_indices):
+                value = perm._perm_sequence[j]
+                open_length, closing_length = self._get_degreed_lengths(
+                    n_free_items_left, cycle_tracker.n_closed_cycles
+                )
+                closing_index = available_values.index(
+                    cycle_tracker.get_closing_value(j)
+                )
+                index_of_value = available_values.index(value)
+                wip_perm_number += index_of_value * open_length
+                if closing_index < index_of_value:
+                    wip_perm_number += closing_length - open_length
+                del available_values[index_of_value]
+                cycle_tracker.add(j, value)
 
             perm_number = wip_perm_number
 
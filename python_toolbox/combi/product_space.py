@@ -6,6 +6,8 @@ import collections
 from python_toolbox import math_tools
 from python_toolbox import sequence_tools
 
+from .slice_space import SliceSpace
+
 
 class ProductSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
     '''
@@ -45,7 +47,7 @@ class ProductSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
 
     def __getitem__(self, i):
         if isinstance(i, slice):
-            raise NotImplementedError
+            return SliceSpace.from_slice(self, i)
 
         if i < 0:
             i += self.length
@@ -63,6 +65,43 @@ class ProductSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
                      zip(self.sequences, reversed(reverse_indices)))
 
 
+    def __iter__(self):
+        return self._iterate_from(0)
+
+
+    def _iterate_from(self, start):
+        '''
+        Iterate over the items, starting from index number `start`.
+
+        This is an odometer: We find the digits of `start` once, and then for
+        every item we increment the last digit and carry over to the digits
+        before it, so usually only one item of the tuple changes.
+        '''
+        if not (0 <= start < self.length):
+            return
+        sequences = self.sequences
+        sequence_lengths = self.sequence_lengths
+        n_sequences = len(sequences)
+        digits = [None] * n_sequences
+        wip_i = start
+        for j in reversed(range(n_sequences)):
+            wip_i, digits[j] = divmod(wip_i, sequence_lengths[j])
+        items = [sequence[digit] for sequence, digit in zip(sequences, digits)]
+        while True:
+            yield tuple(items)
+            j = n_sequences - 1
+            while j >= 0:
+                digits[j] += 1
+                if digits[j] < sequence_lengths[j]:
+                    items[j] = sequences[j][digits[j]]
+                    break
+                digits[j] = 0
+                items[j] = sequences[j][0]
+                j -= 1
+            else:
+                return
+
+
     _reduced = property(lambda self: (type(self), self.sequences))
     __hash__ = lambda self: hash(self._reduced)
     __eq__ = lambda self, other: (isinstance(other, ProductSpace) and
@@ -87,6 +126,3 @@ class ProductSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
 
 
     __bool__ = lambda self: bool(self.length)
-
-
-
@@ -2,9 +2,12 @@
 # This program is distributed under the MIT license.
 
 import collections
+import itertools
 
 from python_toolbox import sequence_tools
 
+from .slice_space import SliceSpace
+
 
 class SelectionSpace(sequence_tools.CuteSequenceMixin,
                      collections.abc.Sequence):
@@ -32,41 +35,156 @@ class SelectionSpace(sequence_tools.CuteSequenceMixin,
 
     Even though the length of this space is around 10 ** 3010, which is much
     bigger than the number of particles in the universe.
+
+    Selections are sets by default. Specify `result_type=frozenset` to get
+    hashable selections, or `result_type=tuple` to get tuples of the selected
+    items in the order of `sequence`. (With a `range` for `sequence`, that
+    gives you tuples of index numbers.)
+
+    Items are found by scanning the bits of the index number, so getting a
+    selection takes time proportional to the length of the sequence, though
+    only the items that are in the selection are handled in Python code. Use
+    `iterate_gray_code` to go over all the selections so that each one differs
+    from the previous one by a single item, which you'll be told, or
+    `iterate_of_size` to go over only the selections of a given size.
     '''
-    def __init__(self, sequence):
+    def __init__(self, sequence, *, result_type=set):
         self.sequence = \
              sequence_tools.ensure_iterable_is_immutable_sequence(sequence)
         self.sequence_length = len(self.sequence)
         self._sequence_set = set(self.sequence)
         self.length = 2 ** self.sequence_length
+        if result_type not in (set, frozenset, tuple):
+            raise NotImplementedError(
+                '`result_type` must be `set`, `frozenset` or `tuple`.'
+            )
+        self.result_type = result_type
+        '''The type of the selections: `set`, `frozenset` or `tuple`.'''
+
+        # The first item of the sequence is the most significant bit of the
+        # index number, so the item for bit `i` is `_items_by_bit[i]`.
+        self._items_by_bit = tuple(reversed(self.sequence))
+        self._bits_by_item = {}
+        for bit, item in enumerate(self._items_by_bit):
+            self._bits_by_item[item] = \
+                                 self._bits_by_item.get(item, 0) | (1 << bit)
 
 
     def __repr__(self):
-        return '<%s: %s>' % (
+        return '<%s: %s%s>' % (
             type(self).__name__,
-            self.sequence
+            self.sequence,
+            (', result_type=%s' % self.result_type.__name__)
+                                        if self.result_type is not set else ''
         )
 
 
+    def _get_items(self, bitmask):
+        '''
+        Get the items whose bits are on in `bitmask`, in sequence order.
+
+        Changing a big `int` bit by bit would copy it on every bit, so instead
+        we look for the bits that are on in its binary string, most significant
+        first, which is the order of the sequence.
+        '''
+        items_by_bit = self._items_by_bit
+        binary = bin(bitmask)
+        top_bit = len(binary) - 3 # Not counting the "0b" prefix.
+        items = []
+        position = binary.find('1', 2)
+        while position != -1:
+            items.append(items_by_bit[top_bit + 2 - position])
+            position = binary.find('1', position + 1)
+        return items
+
+
     def __getitem__(self, i):
         if isinstance(i, slice):
-            raise NotImplementedError
+            return SliceSpace.from_slice(self, i)
 
         if (-self.length <= i <= -1):
             i += self.length
         if not (0 <= i < self.length):
             raise IndexError
 
-        pattern = '{0:0%sb}' % self.sequence_length
-        binary_i = pattern.format(i)
-
-        assert len(binary_i) == self.sequence_length
-
-        return set(item for (is_included, item) in
-                   zip(map(int, binary_i), self.sequence) if is_included)
-
-
-    _reduced = property(lambda self: (type(self), self.sequence))
+        return self.result_type(self._get_items(i))
+
+
+    def __iter__(self):
+        if type(self).__getitem__ is not SelectionSpace.__getitem__:
+            # A subclass wraps the selections, so we'll let it.
+            return map(self.__getitem__, range(self.length))
+        return self._iterate_from(0)
+
+
+    def _iterate_from(self, start):
+        '''
+        Iterate over the selections, starting from index number `start`.
+        '''
+        result_type = self.result_type
+        get_items = self._get_items
+        for i in range(start, self.length):
+            yield result_type(get_items(i))
+
+
+    def iterate_gray_code(self):
+        '''
+        Iterate over all the selections in Gray-code order.
+
+        Every selection differs from the previous one by exactly one item,
+        either added or removed. This yields tuples of
+        `(selection, changed_item, is_added)`, where `changed_item` is the item
+        that was added to the previous selection if `is_added`, or removed from
+        it otherwise. The first selection is the empty one, and it comes with
+        `None` for both `changed_item` and `is_added`.
+
+        This is useful for searches that update some score incrementally as
+        items are added and removed, using just `changed_item` and `is_added`.
+        The selections themselves are kept up to date incrementally, except
+        for tuple selections, which are built from scratch to keep them in
+        sequence order.
+        '''
+        result_type = self.result_type
+        items_by_bit = self._items_by_bit
+        # The number of times each item is in the selection, because an item
+        # may appear in the sequence several times:
+        counts = {}
+        bitmask = 0
+        yield (result_type(), None, None)
+        for i in range(1, self.length):
+            # The bit that flips between consecutive Gray codes is the lowest
+            # bit that's on in `i`.
+            flipped_bit = i & -i
+            bitmask ^= flipped_bit
+            item = items_by_bit[flipped_bit.bit_length() - 1]
+            is_added = bool(bitmask & flipped_bit)
+            if is_added:
+                counts[item] = counts.get(item, 0) + 1
+            elif counts[item] == 1:
+                del counts[item]
+            else:
+                counts[item] -= 1
+            if result_type is tuple:
+                selection = tuple(self._get_items(bitmask))
+            else:
+                selection = result_type(counts)
+            yield (selection, item, is_added)
+
+
+    def iterate_of_size(self, size):
+        '''
+        Iterate over all the selections that have exactly `size` items.
+
+        The selections are in lexicographic order of the positions of their
+        items in the sequence.
+        '''
+        return map(self.result_type,
+                   itertools.combinations(self.sequence, size))
+
+
+    _reduced = property(
+        lambda self: (type(self), self.sequence, self.result_type)
+    )
     __hash__ = lambda self: hash(self._reduced)
     __bool__ = lambda self: bool(self.length)
     __eq__ = lambda self, other: (isinstance(other, SelectionSpace) and
@@ -82,10 +200,7 @@ class SelectionSpace(sequence_tools.CuteSequenceMixin,
         if not selection_set <= self._sequence_set:
             raise ValueError
 
-        return sum((2 ** i) for i, item in enumerate(reversed(self.sequence))
-                                                 if item in selection_set)
-
-
-
-
-
+        bitmask = 0
+        for item in selection_set:
+            bitmask |= self._bits_by_item[item]
+        return bitmask
@@ -0,0 +1,227 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines tools for going over combinatorial spaces in parallel.
+
+Spaces like `PermSpace`, `CombSpace`, `ProductSpace` and `SelectionSpace` can
+be sliced by index number, so they can be split into contiguous shards, and
+each shard can be gone over by a different process.
+'''
+
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+import os
+
+from python_toolbox import future_tools
+
+from .misc import MISSING_ELEMENT
+
+
+_CHECK_INTERVAL = 1000
+'''Number of items a worker goes over between checks whether to stop.'''
+
+_found_shard_index = None
+'''
+In worker processes, the lowest index of a shard in which an item was found.
+
+This is a shared `multiprocessing.Value`, given to the workers when they
+start.
+'''
+
+
+def get_shard_ranges(space, n_shards):
+    '''
+    Split the index numbers of `space` into `n_shards` contiguous ranges.
+
+    Returns a tuple of `range` objects whose lengths are as equal as possible.
+    If `space` has fewer than `n_shards` items, there are fewer shards, so no
+    shard is empty.
+
+    Example:
+
+        >>> get_shard_ranges(PermSpace(4), 5)
+        (range(0, 4), range(4, 9), range(9, 14), range(14, 19), range(19, 24))
+
+    '''
+    if n_shards < 1:
+        raise ValueError('`n_shards` must be positive.')
+    length = space.length
+    n_shards = min(n_shards, length)
+    return tuple(
+        range(length * i // n_shards, length * (i + 1) // n_shards)
+        for i in range(n_shards)
+    )
+
+
+def _get_default_n_shards(max_workers):
+    '''
+    Get the number of shards to use when the user didn't specify one.
+
+    We use a few shards per worker, so workers that finish early have more
+    shards to take, and so progress can be reported often enough.
+    '''
+    return 4 * (max_workers or os.cpu_count() or 1)
+
+
+def _iterate_shard(space, shard_range):
+    '''
+    Iterate over the items of `space` whose index numbers are in `shard_range`.
+
+    The space is sliced and iterated on, so the items are stepped through
+    rather than fetched by index number one by one.
+    '''
+    try:
+        shard = space[shard_range.start:shard_range.stop]
+    except NotImplementedError:
+        return map(space.__getitem__, shard_range)
+    else:
+        return iter(shard)
+
+
+def _initialize_worker(found_shard_index):
+    global _found_shard_index
+    _found_shard_index = found_shard_index
+
+
+def _map_shard(function, space, shard_range, reducer):
+    results = map(function, _iterate_shard(space, shard_range))
+    if reducer is None:
+        return list(results)
+    else:
+        return functools.reduce(reducer, results)
+
+
+def _find_in_shard(predicate, space, shard_index, shard_range):
+    '''
+    Find the first item in the shard for which `predicate` is true.
+
+    Returns `(n_checked_items, finding)`, where `finding` is `(index, item)`,
+    or `None` if no item was found, or if we stopped early because an earlier
+    shard has already found an item.
+    '''
+    for i, item in enumerate(_iterate_shard(space, shard_range)):
+        if i % _CHECK_INTERVAL == 0 and \
+                                  _found_shard_index.value < shard_index:
+            return (i, None)
+        if predicate(item):
+            with _found_shard_index.get_lock():
+                _found_shard_index.value = min(_found_shard_index.value,
+                                               shard_index)
+            return (i + 1, (shard_range.start + i, item))
+    return (shard_range.stop - shard_range.start, None)
+
+
+def map_over_space(function, space, reducer=None, *,
+                   initial=MISSING_ELEMENT, n_shards=None, max_workers=None,
+                   progress_callback=None):
+    '''
+    Call `function` on every item of `space`, in parallel processes.
+
+    The space is split into `n_shards` contiguous shards, which are handed out
+    to a `CuteProcessPoolExecutor` with `max_workers` processes. (By default,
+    4 shards per worker.) Returns a list of the results, in the order of the
+    space.
+
+    If `reducer` is given, the results are reduced with it instead of being
+    returned as a list; each worker reduces its own shard, and then the
+    results of the shards are reduced in order. This means that `reducer` must
+    be associative, like `operator.add` or `max`. If `initial` is given, it's
+    used as the first value of the reduction, and it's the result for an empty
+    space. Reducing an empty space without an `initial` raises `ValueError`.
+
+    If `progress_callback` is given, it's called as every shard is finished,
+    with the number of items that were done so far and the length of the
+    space.
+
+    `function`, `reducer` and `space` must be picklable, so they can be sent
+    to the worker processes.
+    '''
+    if reducer is not None and initial is MISSING_ELEMENT and \
+                                                            not space.length:
+        raise ValueError("Can't reduce an empty space without an `initial`.")
+    if n_shards is None:
+        n_shards = _get_default_n_shards(max_workers)
+    shard_ranges = get_shard_ranges(space, n_shards)
+    shard_results = [None] * len(shard_ranges)
+    n_done_items = 0
+    with future_tools.CuteProcessPoolExecutor(max_workers) as executor:
+        futures = {
+            executor.submit(_map_shard, function, space, shard_range,
+                            reducer): shard_index
+            for shard_index, shard_range in enumerate(shard_ranges)
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                shard_index = futures[future]
+                shard_results[shard_index] = future.result()
+                if progress_callback is not None:
+                    shard_range = shard_ranges[shard_index]
+                    n_done_items += shard_range.stop - shard_range.start
+                    progress_callback(n_done_items, space.length)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    if reducer is None:
+        return list(itertools.chain.from_iterable(shard_results))
+    elif initial is MISSING_ELEMENT:
+        return functools.reduce(reducer, shard_results)
+    else:
+        return functools.reduce(reducer, shard_results, initial)
+
+
+def find_in_space(predicate, space, *, n_shards=None, max_workers=None,
+                  progress_callback=None):
+    '''
+    Find the first item of `space` for which `predicate` is true, in parallel.
+
+    The space is split into shards like in `map_over_space`. Once an item is
+    found, the shards after it are cancelled, and the workers that are already
+    going over such shards stop soon after, while the shards before it are
+    still searched, so the item with the lowest index number is returned.
+    Returns `None` if no item was found.
+
+    If `progress_callback` is given, it's called as every shard is finished,
+    with the number of items that were checked so far and the length of the
+    space.
+    '''
+    if n_shards is None:
+        n_shards = _get_default_n_shards(max_workers)
+    shard_ranges = get_shard_ranges(space, n_shards)
+    found_shard_index = multiprocessing.Value('q', len(shard_ranges))
+    findings = {}
+    n_checked_items = 0
+    with future_tools.CuteProcessPoolExecutor(
+                                 max_workers, initializer=_initialize_worker,
+                                 initargs=(found_shard_index,)) as executor:
+        futures = {
+            executor.submit(_find_in_shard, predicate, space, shard_index,
+                            shard_range): shard_index
+            for shard_index, shard_range in enumerate(shard_ranges)
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                shard_index = futures[future]
+                n_checked_shard_items, finding = future.result()
+                if finding is not None:
+                    findings[shard_index] = finding
+                    for other_future, other_shard_index in futures.items():
+                        if other_shard_index > shard_index:
+                            other_future.cancel()
+                if progress_callback is not None:
+                    n_checked_items += n_checked_shard_items
+                    progress_callback(n_checked_items, space.length)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    if findings:
+        index, item = findings[min(findings)]
+        return item
+    else:
+        return None
@@ -0,0 +1,107 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import collections
+import itertools
+import sys
+
+from python_toolbox import sequence_tools
+
+
+def _get_range_length(range_):
+    '''Get the length of a `range`, even if it's too big for `len`.'''
+    if range_.step > 0:
+        return max(0, (range_.stop - range_.start + range_.step - 1) //
+                                                                   range_.step)
+    else:
+        return max(0, (range_.start - range_.stop - range_.step - 1) //
+                                                                 -range_.step)
+
+
+def _take(iterator, n):
+    '''Take the first `n` items of `iterator`, even if `n` is really big.'''
+    if n <= sys.maxsize:
+        return itertools.islice(iterator, n)
+    else:
+        return (item for _, item in zip(range(n), iterator))
+
+
+class SliceSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
+    '''
+    A lazy slice of another space.
+
+    This is what you get when you slice a `ProductSpace`, `ChainSpace` or
+    `SelectionSpace`, or when you slice a `PermSpace` or a `CombSpace` with a
+    step. No items are created in advance; accessing an item of the slice
+    accesses the item of the original space with the corresponding index
+    number. Steps, including negative ones, are supported, and slicing a
+    `SliceSpace` gives another `SliceSpace` on the original space.
+
+    Example:
+
+        >>> product_space = ProductSpace((range(10 ** 6), 'abc'))
+        >>> slice_space = product_space[10 ** 5:-5:1000]
+        >>> slice_space
+        <ProductSpace: 1000000 * 3>[100000:2999995:1000]
+        >>> slice_space.length
+        2900
+        >>> slice_space[1]
+        (33666, 'c')
+
+    When the step is 1, iterating on the slice uses the fast iteration of the
+    original space, starting from the first index number of the slice.
+    '''
+    def __init__(self, space, range_):
+        self.space = space
+        '''The original space that this is a slice of.'''
+
+        self.range = range_
+        '''A `range` of the index numbers in `space` that are in the slice.'''
+
+        self.length = _get_range_length(range_)
+
+
+    @classmethod
+    def from_slice(cls, space, slice_):
+        '''Create a `SliceSpace` of `space` from a `slice` object.'''
+        return cls(space, range(space.length)[slice_])
+
+
+    def __repr__(self):
+        return '%r[%s:%s%s]' % (
+            self.space, self.range.start, self.range.stop,
+            (':%s' % self.range.step) if self.range.step != 1 else ''
+        )
+
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SliceSpace(self.space, self.range[i])
+        if i < 0:
+            i += self.length
+        if not (0 <= i < self.length):
+            raise IndexError
+        return self.space[self.range[i]]
+
+
+    def __iter__(self):
+        if self.range.step == 1 and hasattr(self.space, '_iterate_from'):
+            return _take(self.space._iterate_from(self.range.start),
+                         self.length)
+        else:
+            return map(self.space.__getitem__, self.range)
+
+
+    def index(self, item):
+        '''Get the index number of `item` in this slice.'''
+        i = self.space.index(item) # Propagating `ValueError`.
+        if i not in self.range:
+            raise ValueError
+        return self.range.index(i)
+
+
+    _reduced = property(lambda self: (type(self), self.space, self.range))
+    __hash__ = lambda self: hash(self._reduced)
+    __eq__ = lambda self, other: (isinstance(other, SliceSpace) and
+                                  self._reduced == other._reduced)
+    __bool__ = lambda self: bool(self.length)
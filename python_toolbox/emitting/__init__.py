@@ -5,5 +5,7 @@
 An emitter mechanism, a variation on the publisher-subscriber design pattern.
 '''
 
-from .emitter import Emitter
+from .emitter import Emitter, emit_together
+from .coalescer import Coalescer
+from .emitter_profiler import EmitterProfiler
 from .emitter_system import EmitterSystem
\ No newline at end of file
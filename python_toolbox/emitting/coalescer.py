@@ -0,0 +1,142 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `Coalescer` class.
+
+See its documentation for more info.
+'''
+
+import threading
+
+from .emitter import emit_together
+
+
+class Coalescer:
+    '''
+    A coalescer merges many emits into one, calling every callable output once.
+
+    Instead of calling `emitter.emit()`, call `coalescer.emit(emitter)`. The
+    emitter isn't emitted right away, but when the coalescer is flushed, and
+    then all the emitters that were emitted since the last flush are emitted
+    together with `emit_together`. This means that each callable output that
+    they reach is called only once, no matter how many times it was emitted.
+
+    The coalescer is flushed in these cases:
+
+     - When `window` is given, it's flushed `window` seconds after the first
+       emit since the last flush. This happens on a timer thread, so the
+       callable outputs will be called on that thread.
+     - When the coalescer is used as a context manager, it's flushed when the
+       outermost `with` block is exited, and not inside the `with` block. If
+       the `with` block is exited because of an exception, the emitters that
+       are waiting are discarded instead, so the callable outputs won't be
+       called for a change that was only partly made.
+     - When `flush` is called.
+
+    Example:
+
+        coalescer = Coalescer()
+        with coalescer:
+            for item in items:
+                model.add(item) # Calls `coalescer.emit(model_changed)`.
+        # The callable outputs of `model_changed` were called once here.
+
+    `ordered` and `executor` are used when emitting the emitters, like in
+    `Emitter.emit`.
+    '''
+
+    def __init__(self, window=None, *, ordered=False, executor=None):
+        self.window = window
+        '''
+        Number of seconds to wait after an emit before flushing, or `None`.
+        '''
+
+        self.ordered = ordered
+        '''Whether to call the callable outputs in a stable order.'''
+
+        self.executor = executor
+        '''Executor to submit the callable outputs to, or `None`.'''
+
+        self._pending_emitters = {}
+        '''The emitters that were emitted since the last flush, in order.'''
+
+        self._depth = 0
+        '''The number of `with` blocks of this coalescer that we're in.'''
+
+        self._timer = None
+        '''The timer that's going to flush the coalescer, if any.'''
+
+        self._lock = threading.RLock()
+
+
+    def emit(self, emitter):
+        '''Emit from `emitter` when the coalescer is flushed.'''
+        with self._lock:
+            self._pending_emitters[emitter] = None
+            if self.window is not None and self._timer is None and \
+                                                              not self._depth:
+                self._timer = threading.Timer(self.window,
+                                              self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+
+    def _take_pending_emitters(self):
+        '''Stop the timer and take the emitters that are waiting.'''
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            emitters = tuple(self._pending_emitters)
+            self._pending_emitters.clear()
+            return emitters
+
+
+    def _emit_together(self, emitters):
+        if emitters:
+            return emit_together(emitters, ordered=self.ordered,
+                                 executor=self.executor)
+
+
+    def flush(self):
+        '''
+        Emit from all the emitters that were emitted since the last flush.
+
+        Returns the list of futures if there's an `executor`.
+        '''
+        return self._emit_together(self._take_pending_emitters())
+
+
+    def _flush_from_timer(self):
+        '''
+        Flush the coalescer when the timer goes off.
+
+        If we got into a `with` block while the timer was going off, we don't
+        flush, because we'll flush when the `with` block is exited.
+        '''
+        with self._lock:
+            if self._depth:
+                return
+            emitters = self._take_pending_emitters()
+        self._emit_together(emitters)
+
+
+    def __enter__(self):
+        with self._lock:
+            self._depth += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        with self._lock:
+            self._depth -= 1
+            if self._depth:
+                return
+            if exc_type is not None:
+                self._take_pending_emitters()
+                return
+        self.flush()
@@ -7,19 +7,128 @@ Defines the `Emitter` class.
 See its documentation for more info.
 '''
 
-# todo: there should probably be some circularity check. Maybe actually
-# circularity should be permitted?
-
-# todo: make some way to emit from multiple emitters simulataneously, saving
-# redundant calls to shared callable outputs.
-
-import itertools
+import asyncio
+import inspect
 import collections
-import functools
 
-from python_toolbox import cute_iter_tools
-from python_toolbox import misc_tools
 from python_toolbox import address_tools
+from python_toolbox import nifty_collections
+
+
+_profiler = None
+'''The running `EmitterProfiler`, if any.'''
+
+
+def _iterate_strongly_connected_components(roots, get_successors):
+    '''
+    Iterate over the strongly connected components of a graph of emitters.
+
+    A strongly connected component is a group of emitters that reach each
+    other. Only the emitters reached from `roots` are gone into, and
+    `get_successors` is called on an emitter to get the emitters it leads to.
+
+    This is Tarjan's algorithm. Every component is yielded as a list of its
+    emitters, in the order they were visited, and only after all the
+    components that it reaches were yielded. Successors are visited in reverse
+    order, so the reversed order of the components is a topological order that
+    follows the order of `roots` and of the successors where it can.
+    '''
+    visit_numbers = {}
+    low_links = {}
+    component_stack = []
+    emitters_on_component_stack = set()
+
+    for root in reversed(roots):
+        if root in visit_numbers:
+            continue
+        visit_numbers[root] = low_links[root] = len(visit_numbers)
+        component_stack.append(root)
+        emitters_on_component_stack.add(root)
+        path = [(root, reversed(get_successors(root)))]
+
+        while path:
+            emitter, successors = path[-1]
+            for successor in successors:
+                if successor not in visit_numbers:
+                    visit_numbers[successor] = low_links[successor] = \
+                                                             len(visit_numbers)
+                    component_stack.append(successor)
+                    emitters_on_component_stack.add(successor)
+                    path.append(
+                        (successor, reversed(get_successors(successor)))
+                    )
+                    break
+                elif successor in emitters_on_component_stack:
+                    low_links[emitter] = min(low_links[emitter],
+                                             visit_numbers[successor])
+            else:
+                path.pop()
+                if path:
+                    parent = path[-1][0]
+                    low_links[parent] = min(low_links[parent],
+                                            low_links[emitter])
+                if low_links[emitter] == visit_numbers[emitter]:
+                    component = []
+                    while True:
+                        component_member = component_stack.pop()
+                        emitters_on_component_stack.remove(component_member)
+                        component.append(component_member)
+                        if component_member is emitter:
+                            break
+                    component.reverse()
+                    yield component
+
+
+def _get_ordered_callable_outputs(emitters):
+    '''
+    Get the callable outputs that emitting from all of `emitters` would call.
+
+    They're returned as a tuple, in a stable topological order: The callable
+    outputs of an emitter come before those of the emitters it outputs to, and
+    beyond that, they're ordered by the order in which the outputs were added.
+    Every callable output appears once.
+    '''
+    components = list(_iterate_strongly_connected_components(
+        emitters,
+        lambda emitter: tuple(emitter._get_emitter_outputs())
+    ))
+    return tuple(dict.fromkeys(
+        callable_output for component in reversed(components)
+        for emitter in component
+        for callable_output in emitter._get_callable_outputs()
+    ))
+
+
+def _call_callable_outputs(callable_outputs, executor):
+    '''Call the callable outputs, or submit them to `executor` if given.'''
+    if executor is None:
+        for callable_output in callable_outputs:
+            callable_output()
+    else:
+        return [executor.submit(callable_output) for callable_output
+                in callable_outputs]
+
+
+def emit_together(emitters, *, ordered=False, executor=None):
+    '''
+    Emit from all of `emitters`, calling every callable output only once.
+
+    This is like calling `emit` on each emitter, except that callable outputs
+    that several of the emitters reach get called once instead of once per
+    emitter. The `ordered` and `executor` arguments are like in
+    `Emitter.emit`.
+    '''
+    emitters = tuple(emitters)
+    if ordered:
+        callable_outputs = _get_ordered_callable_outputs(emitters)
+    else:
+        callable_outputs = set().union(
+            *(emitter._rebuild_total_callable_outputs()
+              for emitter in emitters)
+        )
+    if _profiler is not None:
+        return _profiler._emit(emitters, callable_outputs, executor)
+    return _call_callable_outputs(callable_outputs, executor)
 
 
 class Emitter:
@@ -75,27 +184,31 @@ class Emitter:
                                           item_type=(collections.abc.Callable,
                                                      Emitter))
 
-        self._inputs = set()
+        self._inputs = nifty_collections.OrderedSet()
         '''The emitter's inputs.'''
 
-        self._outputs = set()
-        '''The emitter's inputs.'''
-
-        for output in outputs:
-            self.add_output(output)
+        self._outputs = nifty_collections.OrderedSet()
+        '''The emitter's outputs.'''
 
         self.__total_callable_outputs_cache = None
         '''
-        A cache of total callable outputs.
+        A cache of total callable outputs, or `None` if it's stale.
 
         This means the callable outputs of this emitter and any output
-        emitters.
+        emitters. It's rebuilt lazily by `_rebuild_total_callable_outputs`.
+        '''
+
+        self.__ordered_callable_outputs_cache = None
         '''
+        The total callable outputs as an ordered tuple, or `None` if stale.
 
-        self._recalculate_total_callable_outputs()
+        This is used when emitting with `ordered=True`. It's stale whenever
+        `__total_callable_outputs_cache` is stale, and maybe more often.
+        '''
+
+        for output in outputs:
+            self.add_output(output)
 
-        # We made sure to create the callable outputs cache before we add
-        # inputs, so when we update their cache, it could use ours.
         for input in inputs:
             self.add_input(input)
 
@@ -103,93 +216,89 @@ class Emitter:
         '''The emitter's name.'''
 
     def get_inputs(self):
-        '''Get the emitter's inputs.'''
-        return self._inputs
+        '''Get the emitter's inputs, as a `FrozenOrderedSet`.'''
+        return nifty_collections.FrozenOrderedSet(self._inputs)
 
     def get_outputs(self):
-        '''Get the emitter's outputs.'''
-        return self._outputs
+        '''Get the emitter's outputs, as a `FrozenOrderedSet`.'''
+        return nifty_collections.FrozenOrderedSet(self._outputs)
 
-    def _get_input_layers(self):
+    def _invalidate_total_callable_outputs(self):
         '''
-        Get the emitter's inputs as a list of layers.
+        Mark the total callable outputs of this emitter and its inputs stale.
 
-        Every item in the list will be a list of emitters on that layer. For
-        example, the first item will be a list of direct inputs of our emitter.
-        The second item will be a list of *their* inputs. Etc.
+        This is called when the outputs of this emitter change. The caches get
+        rebuilt lazily, on the next `emit` or `get_total_callable_outputs`.
 
-        Every emitter can appear only once in this scheme: It would appear on
-        the closest layer that it's on.
+        We keep the rule that if an emitter's cache is stale, then so are the
+        caches of all of its inputs, recursively. That's why we don't need to
+        go past emitters whose caches are already stale, which makes rewiring
+        many emitters in a row cost time proportional only to the emitters
+        whose caches were valid.
         '''
+        emitters_to_invalidate = [self]
+        while emitters_to_invalidate:
+            emitter = emitters_to_invalidate.pop()
+            if emitter.__total_callable_outputs_cache is None:
+                continue
+            emitter.__total_callable_outputs_cache = None
+            emitter.__ordered_callable_outputs_cache = None
+            emitters_to_invalidate.extend(emitter._inputs)
 
-        input_layers = [self._inputs]
-        current_layer = self._inputs
-        while current_layer:
 
-            next_layer = functools.reduce(
-                set.union,
-                (input._inputs for input in current_layer),
-                set()
-            )
-
-            for ancestor_layer in input_layers:
-                assert isinstance(next_layer, set)
-                next_layer -= ancestor_layer
-
-            input_layers.append(next_layer)
-
-            current_layer = next_layer
-
-
-        # assert sum(len(layer) for layer in input_layers) == \
-        #        len(reduce(set.union, input_layers, set()))
-
-        return input_layers
-
-
-    def _recalculate_total_callable_outputs_recursively(self):
+    def _forget_total_callable_outputs(self):
         '''
-        Recalculate `__total_callable_outputs_cache` recursively.
+        Mark the total callable outputs of only this emitter as stale.
 
-        This will to do the recalculation for this emitter and all its inputs.
+        Only use this when marking the inputs of this emitter as stale too, so
+        the rule described in `_invalidate_total_callable_outputs` is kept.
         '''
+        self.__total_callable_outputs_cache = None
+        self.__ordered_callable_outputs_cache = None
 
-        # todo: I suspect this wouldn't work for the following case. `self` has
-        # inputs `A` and `B`. `A` has input `B`. A callable output `func` was
-        # just removed from `self`, so this function got called. We update the
-        # cache here, then take the first input layer, which is `A` and `B` in
-        # some order. Say `B` is first. Now, we do `recalculate` on `B`, but
-        # `A` still got the cache with `func`, and `B` will take that. I need
-        # to test this.
-        #
-        # I have an idea how to solve it: In the getter of the cache, check the
-        # cache exists, otherwise rebuild. The reason we didn't do it up to now
-        # was to optimize for speed, but only `emit` needs to be fast and it
-        # doesn't use the getter. We'll clear the caches of all inputs, and
-        # they'll rebuild as they call each other.
-
-        self._recalculate_total_callable_outputs()
-        input_layers = self._get_input_layers()
-        for input_layer in input_layers:
-            for input in input_layer:
-                input._recalculate_total_callable_outputs()
-
-
-    def _recalculate_total_callable_outputs(self):
+
+    def _rebuild_total_callable_outputs(self):
         '''
-        Recalculate `__total_callable_outputs_cache` for this emitter.
+        Rebuild the total callable outputs of this emitter, returning them.
+
+        This rebuilds the stale caches of this emitter and of all the emitters
+        it reaches, using each of them once. Emitters with valid caches aren't
+        gone into.
 
-        This will to do the recalculation for this emitter and all its inputs.
+        The emitters may have cycles, so we go over the strongly connected
+        components of the stale emitters, i.e. groups of emitters that reach
+        each other. All the emitters in a component have the same total
+        callable outputs. We get each component only after all the components
+        that it reaches, so we can build the cache from their caches.
         '''
-        children_callable_outputs = functools.reduce(
-            set.union,
-            (emitter.get_total_callable_outputs() for emitter
-             in self._get_emitter_outputs() if emitter is not self),
-            set()
+        if self.__total_callable_outputs_cache is not None:
+            return self.__total_callable_outputs_cache
+
+        components = _iterate_strongly_connected_components(
+            (self,),
+            lambda emitter: tuple(
+                emitter_output for emitter_output
+                in emitter._get_emitter_outputs()
+                if emitter_output.__total_callable_outputs_cache is None
+            )
         )
+        for component in components:
+            component_members = set(component)
+            total_callable_outputs = set()
+            for component_member in component:
+                for output in component_member._outputs:
+                    if isinstance(output, Emitter):
+                        if output not in component_members:
+                            total_callable_outputs |= \
+                                         output.__total_callable_outputs_cache
+                    elif callable(output):
+                        total_callable_outputs.add(output)
+            for component_member in component:
+                component_member.__total_callable_outputs_cache = \
+                                                         total_callable_outputs
+
+        return self.__total_callable_outputs_cache
 
-        self.__total_callable_outputs_cache = \
-            children_callable_outputs.union(self._get_callable_outputs())
 
     def add_input(self, emitter):
         '''
@@ -201,14 +310,14 @@ class Emitter:
         assert isinstance(emitter, Emitter)
         self._inputs.add(emitter)
         emitter._outputs.add(self)
-        emitter._recalculate_total_callable_outputs_recursively()
+        emitter._invalidate_total_callable_outputs()
 
     def remove_input(self, emitter):
         '''Remove an input from this emitter.'''
         assert isinstance(emitter, Emitter)
         self._inputs.remove(emitter)
         emitter._outputs.remove(self)
-        emitter._recalculate_total_callable_outputs_recursively()
+        emitter._invalidate_total_callable_outputs()
 
     def add_output(self, thing):
         '''
@@ -224,7 +333,7 @@ class Emitter:
         self._outputs.add(thing)
         if isinstance(thing, Emitter):
             thing._inputs.add(self)
-        self._recalculate_total_callable_outputs_recursively()
+        self._invalidate_total_callable_outputs()
 
     def remove_output(self, thing):
         '''Remove an output from this emitter.'''
@@ -232,45 +341,111 @@ class Emitter:
         self._outputs.remove(thing)
         if isinstance(thing, Emitter):
             thing._inputs.remove(self)
-        self._recalculate_total_callable_outputs_recursively()
+        self._invalidate_total_callable_outputs()
 
-    def disconnect_from_all(self): # todo: use the freeze here
+    def disconnect_from_all(self):
         '''Disconnect the emitter from all its inputs and outputs.'''
-        for input in self._inputs:
+        for input in tuple(self._inputs):
             self.remove_input(input)
-        for output in self._outputs:
+        for output in tuple(self._outputs):
             self.remove_output(output)
 
     def _get_callable_outputs(self):
-        '''Get the direct callable outputs of this emitter.'''
-        return set(filter(callable, self._outputs))
+        '''Get the direct callable outputs of this emitter, in order.'''
+        return nifty_collections.OrderedSet(filter(callable, self._outputs))
 
     def _get_emitter_outputs(self):
-        '''Get the direct emitter outputs of this emitter.'''
-        return {output for output in self._outputs if isinstance(output, Emitter)}
+        '''Get the direct emitter outputs of this emitter, in order.'''
+        return nifty_collections.OrderedSet(
+            output for output in self._outputs if isinstance(output, Emitter)
+        )
 
     def get_total_callable_outputs(self):
         '''
         Get the total of callable outputs of this emitter.
 
         This means the direct callable outputs, and the callable outputs of
-        emitter outputs.
+        emitter outputs. Returns a `frozenset`.
         '''
-        return self.__total_callable_outputs_cache
+        return frozenset(self._rebuild_total_callable_outputs())
+
+    def get_ordered_callable_outputs(self):
+        '''
+        Get the total callable outputs of this emitter, in a stable order.
+
+        Returns a tuple. The callable outputs of an emitter come before those
+        of the emitters that it outputs to, and beyond that they're ordered by
+        the order in which the outputs were added.
+        '''
+        if self.__ordered_callable_outputs_cache is None:
+            self._rebuild_total_callable_outputs()
+            self.__ordered_callable_outputs_cache = \
+                                         _get_ordered_callable_outputs((self,))
+        return self.__ordered_callable_outputs_cache
 
-    def emit(self):
+    def emit(self, *, ordered=False, executor=None):
         '''
         Call all of the (direct or indirect) callable outputs of this emitter.
 
         This is the most important method of the emitter. When you `emit`, all
         the callable outputs get called in succession.
+
+        By default, the callable outputs are called in no particular order.
+        Specify `ordered=True` to call them in the order of
+        `get_ordered_callable_outputs`.
+
+        Specify an `executor`, like a `concurrent.futures.ThreadPoolExecutor`,
+        to submit the callable outputs to it instead of calling them here, so
+        a slow callable output won't hold up the others. In that case a list
+        of the futures is returned.
         '''
         # Note that this function gets called many times, so it should be
         # optimized for speed.
-        for callable_output in self.__total_callable_outputs_cache:
-            # We are using the cache directly instead of calling the getter,
-            # for speed.
-            callable_output()
+        if ordered:
+            callable_outputs = self.get_ordered_callable_outputs()
+        else:
+            callable_outputs = self.__total_callable_outputs_cache
+            if callable_outputs is None:
+                callable_outputs = self._rebuild_total_callable_outputs()
+        if _profiler is not None:
+            return _profiler._emit((self,), callable_outputs, executor)
+        if executor is None:
+            for callable_output in callable_outputs:
+                # We are using the cache directly instead of calling the
+                # getter, for speed.
+                callable_output()
+        else:
+            return _call_callable_outputs(callable_outputs, executor)
+
+    async def emit_async(self, *, ordered=False):
+        '''
+        Call all the callable outputs of this emitter, for use with `asyncio`.
+
+        Callable outputs that return awaitables, like coroutine functions, are
+        run concurrently as `asyncio` tasks, and this waits until they're all
+        done. Other callable outputs are just called. `ordered` is like in
+        `emit`; it's the order in which the callable outputs are called, not
+        the order in which their tasks finish.
+        '''
+        if ordered:
+            callable_outputs = self.get_ordered_callable_outputs()
+        else:
+            callable_outputs = self._rebuild_total_callable_outputs()
+        profiler = _profiler
+        if profiler is not None:
+            emitter_statistics = profiler._record_emit((self,),
+                                                       callable_outputs)
+        tasks = []
+        for callable_output in callable_outputs:
+            if profiler is None:
+                result = callable_output()
+            else:
+                result = profiler._call_for_async(emitter_statistics,
+                                                  callable_output)
+            if inspect.isawaitable(result):
+                tasks.append(asyncio.ensure_future(result))
+        if tasks:
+            await asyncio.gather(*tasks)
 
     def __repr__(self):
         '''
@@ -0,0 +1,358 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `EmitterProfiler` class.
+
+See its documentation for more info.
+'''
+
+import inspect
+import itertools
+import math
+import random
+import threading
+import time
+
+from python_toolbox import address_tools
+
+from . import emitter as emitter_module
+
+
+def _describe(thing):
+    '''Get a short name for an emitter or a callable output, for reports.'''
+    if isinstance(thing, tuple):
+        return '+'.join(map(_describe, thing))
+    elif isinstance(thing, emitter_module.Emitter):
+        return thing.name or repr(thing)
+    try:
+        return address_tools.describe(thing)
+    except Exception:
+        return repr(thing)
+
+
+class CallableOutputStatistics:
+    '''
+    Latency statistics of a callable output, when called from one emitter.
+
+    Times are in seconds. All the calls are counted in `n_calls`, `total_time`
+    and `max_time`, but only a random sample of up to `max_n_samples` of the
+    latencies is kept for `get_percentile`, so memory stays bounded during
+    long event storms.
+    '''
+
+    max_n_samples = 1000
+    '''The maximal number of latencies kept for calculating percentiles.'''
+
+    def __init__(self):
+        self.n_calls = 0
+        '''The number of times the callable output was called.'''
+
+        self.total_time = 0.0
+        '''The total time that the calls took, in seconds.'''
+
+        self.max_time = 0.0
+        '''The time that the slowest call took, in seconds.'''
+
+        self._samples = []
+        '''A random sample of the latencies, in seconds.'''
+
+        self._random = random.Random(0)
+
+
+    def add(self, latency):
+        '''Record a call to the callable output that took `latency` seconds.'''
+        self.n_calls += 1
+        self.total_time += latency
+        self.max_time = max(self.max_time, latency)
+        # Reservoir sampling, so every call has the same chance of being in
+        # the sample:
+        if len(self._samples) < self.max_n_samples:
+            self._samples.append(latency)
+        else:
+            i = self._random.randrange(self.n_calls)
+            if i < self.max_n_samples:
+                self._samples[i] = latency
+
+
+    mean_time = property(
+        lambda self: (self.total_time / self.n_calls) if self.n_calls else 0.0,
+        doc='''The mean time that a call took, in seconds.'''
+    )
+
+
+    def get_percentile(self, percentile):
+        '''
+        Get a percentile of the latencies, in seconds.
+
+        For example, `get_percentile(99)` gives a latency that 99% of the
+        calls took at most. (Estimated from the sample of latencies.)
+        '''
+        if not 0 <= percentile <= 100:
+            raise ValueError('`percentile` must be between 0 and 100.')
+        if not self._samples:
+            return 0.0
+        sorted_samples = sorted(self._samples)
+        rank = math.ceil(percentile / 100 * len(sorted_samples))
+        return sorted_samples[max(rank - 1, 0)]
+
+
+class EmitterStatistics:
+    '''
+    Statistics of the emits from an emitter.
+
+    When several emitters are emitted together with `emit_together`, they get
+    their own `EmitterStatistics`, which is keyed by a tuple of them.
+    '''
+    def __init__(self):
+        self.n_emits = 0
+        '''The number of times the emitter was emitted.'''
+
+        self.total_fan_out = 0
+        '''The total number of callable outputs called in all the emits.'''
+
+        self.max_fan_out = 0
+        '''The largest number of callable outputs called in an emit.'''
+
+        self.callable_output_statistics = {}
+        '''`CallableOutputStatistics` for every callable output.'''
+
+
+    mean_fan_out = property(
+        lambda self: (self.total_fan_out / self.n_emits) if self.n_emits
+                                                                     else 0.0,
+        doc='''The mean number of callable outputs called in an emit.'''
+    )
+
+
+class EmitterProfiler:
+    '''
+    Profiler that records emit counts and callable output latencies.
+
+    Use it as a context manager, or call `start` and `stop`. While it's
+    running, every emit from every emitter is recorded: How many times each
+    emitter was emitted, how many callable outputs it called (its fan-out,)
+    and how long each callable output took.
+
+    Example:
+
+        with EmitterProfiler() as emitter_profiler:
+            run_event_storm()
+        print(emitter_profiler.get_report())
+        with open('emitters.folded', 'w') as file:
+            file.write(emitter_profiler.get_folded_stacks())
+
+    The folded stacks can be turned into a flamegraph with `flamegraph.pl` or
+    read by tools like speedscope.
+
+    Callable outputs that run on an `executor` are timed on the thread that
+    runs them. With `Emitter.emit_async`, the time of a callable output that
+    returns an awaitable includes the time until the awaitable is done.
+
+    Only one profiler is running at a time; starting a profiler while another
+    one is running pauses the other one until this one is stopped.
+    '''
+
+    def __init__(self):
+        self.emitter_statistics = {}
+        '''`EmitterStatistics` for every emitter that was emitted.'''
+
+        self._lock = threading.Lock()
+
+        self._previous_profilers = []
+        '''Profilers that were running when this one was started.'''
+
+
+    def start(self):
+        '''Start recording emits.'''
+        self._previous_profilers.append(emitter_module._profiler)
+        emitter_module._profiler = self
+
+
+    def stop(self):
+        '''Stop recording emits.'''
+        if emitter_module._profiler is not self:
+            raise Exception("Can't stop an emitter profiler that isn't "
+                            "running.")
+        emitter_module._profiler = self._previous_profilers.pop()
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+
+    def reset(self):
+        '''Forget everything that was recorded.'''
+        with self._lock:
+            self.emitter_statistics = {}
+
+
+    def _record_emit(self, emitters, callable_outputs):
+        '''
+        Record an emit from `emitters`, returning its `EmitterStatistics`.
+        '''
+        key = emitters[0] if len(emitters) == 1 else emitters
+        with self._lock:
+            try:
+                emitter_statistics = self.emitter_statistics[key]
+            except KeyError:
+                emitter_statistics = self.emitter_statistics[key] = \
+                                                            EmitterStatistics()
+            emitter_statistics.n_emits += 1
+            emitter_statistics.total_fan_out += len(callable_outputs)
+            emitter_statistics.max_fan_out = max(
+                emitter_statistics.max_fan_out, len(callable_outputs)
+            )
+        return emitter_statistics
+
+
+    def _record_call(self, emitter_statistics, callable_output, latency):
+        statistics_by_callable_output = \
+                                  emitter_statistics.callable_output_statistics
+        with self._lock:
+            try:
+                statistics = statistics_by_callable_output[callable_output]
+            except KeyError:
+                statistics = statistics_by_callable_output[callable_output] = \
+                                                     CallableOutputStatistics()
+            statistics.add(latency)
+
+
+    def _call(self, emitter_statistics, callable_output):
+        '''Call `callable_output` and record how long it took.'''
+        start_time = time.perf_counter()
+        try:
+            return callable_output()
+        finally:
+            self._record_call(emitter_statistics, callable_output,
+                              time.perf_counter() - start_time)
+
+
+    def _emit(self, emitters, callable_outputs, executor):
+        '''Emit from `emitters` like `Emitter.emit`, recording everything.'''
+        emitter_statistics = self._record_emit(emitters, callable_outputs)
+        if executor is None:
+            for callable_output in callable_outputs:
+                self._call(emitter_statistics, callable_output)
+        else:
+            return [executor.submit(self._call, emitter_statistics,
+                                    callable_output) for callable_output
+                    in callable_outputs]
+
+
+    def _call_for_async(self, emitter_statistics, callable_output):
+        '''
+        Call `callable_output` for `emit_async`, recording how long it took.
+
+        If it returns an awaitable, the call is recorded when the awaitable is
+        done, and an awaitable that wraps it is returned instead.
+        '''
+        start_time = time.perf_counter()
+        try:
+            result = callable_output()
+        except BaseException:
+            self._record_call(emitter_statistics, callable_output,
+                              time.perf_counter() - start_time)
+            raise
+        if not inspect.isawaitable(result):
+            self._record_call(emitter_statistics, callable_output,
+                              time.perf_counter() - start_time)
+            return result
+
+        async def await_result():
+            try:
+                return await result
+            finally:
+                self._record_call(emitter_statistics, callable_output,
+                                  time.perf_counter() - start_time)
+        return await_result()
+
+
+    def _iterate_rows(self):
+        '''
+        Iterate over `(emitter, callable_output, statistics)` rows.
+
+        The rows are sorted by total time, from largest to smallest.
+        '''
+        with self._lock:
+            rows = [
+                (emitter, callable_output, callable_output_statistics)
+                for emitter, emitter_statistics
+                in self.emitter_statistics.items()
+                for callable_output, callable_output_statistics
+                in emitter_statistics.callable_output_statistics.items()
+            ]
+        rows.sort(key=lambda row: row[2].total_time, reverse=True)
+        return iter(rows)
+
+
+    def get_report(self, limit=20):
+        '''
+        Get a report of the recorded emits, as a string.
+
+        The report has a table of the emitters that were emitted most, and a
+        table of the callable outputs that took the most time, with up to
+        `limit` rows each. Times are in milliseconds.
+        '''
+        with self._lock:
+            emitter_rows = sorted(self.emitter_statistics.items(),
+                                  key=lambda item: item[1].n_emits,
+                                  reverse=True)[:limit]
+        lines = [
+            'Emitters by number of emits:',
+            '{:>10} {:>10} {:>10}  {}'.format('emits', 'mean fan', 'max fan',
+                                              'emitter'),
+        ]
+        for emitter, emitter_statistics in emitter_rows:
+            lines.append('{:>10} {:>10.1f} {:>10}  {}'.format(
+                emitter_statistics.n_emits, emitter_statistics.mean_fan_out,
+                emitter_statistics.max_fan_out, _describe(emitter)
+            ))
+
+        lines += [
+            '',
+            'Callable outputs by total time:',
+            '{:>10} {:>10} {:>10} {:>10} {:>10} {:>10}  {}'.format(
+                'calls', 'total ms', 'mean ms', 'p50 ms', 'p99 ms', 'max ms',
+                'emitter: callable output'
+            ),
+        ]
+        rows = itertools.islice(self._iterate_rows(), limit)
+        for emitter, callable_output, statistics in rows:
+            lines.append(
+                '{:>10} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}  '
+                '{}: {}'.format(
+                    statistics.n_calls, statistics.total_time * 1000,
+                    statistics.mean_time * 1000,
+                    statistics.get_percentile(50) * 1000,
+                    statistics.get_percentile(99) * 1000,
+                    statistics.max_time * 1000,
+                    _describe(emitter), _describe(callable_output)
+                )
+            )
+        return '\n'.join(lines)
+
+
+    def get_folded_stacks(self):
+        '''
+        Get the recorded latencies in the "folded stacks" format, as a string.
+
+        Every line is an emitter and a callable output, separated by `;`, and
+        then the total time in microseconds that the callable output took when
+        called from the emitter. This is the input format of `flamegraph.pl`.
+        '''
+        stacks = {}
+        for emitter, callable_output, statistics in self._iterate_rows():
+            stack = '{};{}'.format(
+                _describe(emitter).replace(';', ':'),
+                _describe(callable_output).replace(';', ':')
+            )
+            stacks[stack] = stacks.get(stack, 0) + \
+                                        round(statistics.total_time * 10 ** 6)
+        return ''.join('{} {}\n'.format(stack, microseconds)
+                       for stack, microseconds in stacks.items())
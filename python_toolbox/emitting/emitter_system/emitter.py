@@ -16,8 +16,8 @@ class Emitter(OriginalEmitter):
     more info.
 
     What this adds is that it keeps track of which emitter system this emitter
-    belongs to, and it allows freezing the cache rebuilding for better speed
-    when adding many emitters to the system.
+    belongs to, and it allows freezing the cache invalidation for better speed
+    when rewiring many emitters in the system.
 
     See documentation of `EmitterSystem` for more info.
     '''
@@ -41,18 +41,16 @@ class Emitter(OriginalEmitter):
         OriginalEmitter.__init__(self, inputs=inputs,
                                  outputs=outputs, name=name)
 
-    def _recalculate_total_callable_outputs_recursively(self):
+    def _invalidate_total_callable_outputs(self):
         '''
-        Recalculate `__total_callable_outputs_cache` recursively.
+        Mark the total callable outputs of this emitter and its inputs stale.
 
-        This will to do the recalculation for this emitter and all its inputs.
-
-        Will not do anything if `_cache_rebuilding_frozen` is positive.
+        Will not do anything if the emitter system's `cache_rebuilding_freezer`
+        is frozen; all the emitters in the system will be marked as stale when
+        it thaws.
         '''
         if not self.emitter_system.cache_rebuilding_freezer.frozen:
-            OriginalEmitter._recalculate_total_callable_outputs_recursively(
-                self
-            )
+            OriginalEmitter._invalidate_total_callable_outputs(self)
 
     def add_input(self, emitter): # todo: ability to add plural in same method
         '''
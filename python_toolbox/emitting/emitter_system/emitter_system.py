@@ -27,10 +27,10 @@ class EmitterSystem:
     generate an `emit`ting that affects all emitters in the system.
 
     The `EmitterSystem` also offers a context manager,
-    `.freeze_cache_rebuilding`. When you do actions using this context manager,
-    the emitters will not rebuild their cache when changing their
+    `.cache_rebuilding_freezer`. When you do actions using this context
+    manager, the emitters will not invalidate their cache when changing their
     inputs/outputs. When the outermost context manager has exited, all the
-    caches for these emitters will get rebuilt.
+    caches for these emitters will get rebuilt, lazily.
     '''
     # possible future idea: there is the idea of optimizing by cutting
     # redundant links between boxes. I'm a bit suspicious of it. The next
@@ -55,16 +55,21 @@ class EmitterSystem:
     Context manager for freezing the cache rebuilding in an emitter system.
 
     When you do actions using this context manager, the emitters will not
-    rebuild their cache when changing their inputs/outputs. When the outermost
-    context manager has exited, all the caches for these emitters will get
-    rebuilt.
+    invalidate their cache when changing their inputs/outputs. When the
+    outermost context manager has exited, all the caches for these emitters
+    will get rebuilt, lazily.
     '''
 
 
     @cache_rebuilding_freezer.on_thaw
     def _recalculate_all_cache(self):
-        '''Recalculate the cache for all the emitters.'''
-        self.bottom_emitter._recalculate_total_callable_outputs_recursively()
+        '''
+        Mark the cache of all the emitters as stale.
+
+        The caches will be rebuilt lazily, when the emitters are used.
+        '''
+        for emitter in self.emitters:
+            emitter._forget_total_callable_outputs()
 
 
 
@@ -89,6 +94,10 @@ class EmitterSystem:
         '''
         with self.cache_rebuilding_freezer:
             emitter.disconnect_from_all()
+        # The emitter has no inputs now, so it's fine to mark only its own
+        # cache as stale. We can't count on the freezer for that if it's still
+        # frozen, because the emitter won't be in the system when it thaws.
+        emitter._forget_total_callable_outputs()
         self.emitters.remove(emitter)
 
 
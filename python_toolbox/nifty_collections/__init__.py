@@ -4,7 +4,9 @@
 '''Defines various data types, similarly to the stdlib's `collections`.'''
 
 from .ordered_dict import OrderedDict
-from .various_ordered_sets import OrderedSet, FrozenOrderedSet, EmittingOrderedSet
+from .various_ordered_sets import (OrderedSet, FrozenOrderedSet,
+                                   EmittingOrderedSet, IndexedOrderedSet)
+from .indexed_ordered_dict import IndexedOrderedDict
 from .weak_key_default_dict import WeakKeyDefaultDict
 from .weak_key_identity_dict import WeakKeyIdentityDict
 from .lazy_tuple import LazyTuple
@@ -0,0 +1,128 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import collections
+import itertools
+import operator
+
+from .various_ordered_sets import IndexedOrderedSet
+from .abstract import Ordered
+
+
+class IndexedOrderedDict(collections.abc.MutableMapping):
+    '''
+    A dictionary with an order, which can be quickly indexed by position.
+
+    This is like `OrderedDict`, except that getting the index number of a key
+    with `index` and getting a key or an item by its index number with
+    `get_key_at` and `get_item_at` take logarithmic time instead of linear
+    time. The keys are kept in an `IndexedOrderedSet`, so see its
+    documentation for the time that the other operations take.
+
+    Like `collections.OrderedDict`, comparing to another ordered dictionary is
+    order-sensitive, while comparing to other mappings isn't.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        self._keys = IndexedOrderedSet()
+        self._values = {}
+        self.update(*args, **kwargs)
+
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._values:
+            self._keys.add(key)
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        del self._values[key]
+        self._keys.discard(key)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    __len__ = lambda self: len(self._values)
+    __iter__ = lambda self: iter(self._keys)
+    __reversed__ = lambda self: reversed(self._keys)
+
+
+    def index(self, key):
+        '''Get the index number of `key`.'''
+        return self._keys.index(key)
+
+    def get_key_at(self, index):
+        '''Get the key whose index number is `index`.'''
+        return self._keys[index]
+
+    def get_item_at(self, index):
+        '''Get the `(key, value)` item whose index number is `index`.'''
+        key = self._keys[index]
+        return (key, self._values[key])
+
+
+    def move_to_end(self, key, last=True):
+        '''
+        Move an existing key to the end (or start if `last=False`.)
+        '''
+        self._keys.move_to_end(key, last=last)
+
+    def popitem(self, last=True):
+        '''Remove and return the last item, or the first if `last=False`.'''
+        if not self:
+            raise KeyError('dictionary is empty')
+        key = self._keys.pop(last=last)
+        return (key, self._values.pop(key))
+
+    def clear(self):
+        '''Remove all the items.'''
+        self._keys.clear()
+        self._values.clear()
+
+
+    def sort(self, key=None, reverse=False):
+        '''
+        Sort the items according to their keys, changing the order in-place.
+
+        The optional `key` argument, (not to be confused with the dictionary
+        keys,) will be passed to the `sorted` function as a key function.
+        '''
+        self._keys.sort(key=key, reverse=reverse)
+
+    def reorder(self, keys):
+        '''
+        Change the order of the keys to the order of `keys`, in-place.
+
+        `keys` must have all of the dictionary's keys, each of them once.
+        '''
+        self._keys.reorder(keys)
+
+
+    def copy(self):
+        '''Get a shallow copy of the dictionary.'''
+        return type(self)(self.items())
+
+    @property
+    def reversed(self):
+        '''Get a version of this dictionary with key order reversed.'''
+        return type(self)(reversed(tuple(self.items())))
+
+
+    def __repr__(self):
+        if not self:
+            return '%s()' % (type(self).__name__,)
+        return '%s(%r)' % (type(self).__name__, list(self.items()))
+
+    def __eq__(self, other):
+        if isinstance(other, (IndexedOrderedDict, collections.OrderedDict)):
+            return len(self) == len(other) and all(itertools.starmap(
+                operator.eq, zip(self.items(), other.items())
+            ))
+        return collections.abc.MutableMapping.__eq__(self, other)
+
+    __hash__ = None
+
+
+Ordered.register(IndexedOrderedDict)
@@ -1,6 +1,8 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import itertools
+
 from python_toolbox import comparison_tools
 
 from collections import OrderedDict as StdlibOrderedDict
@@ -23,9 +25,42 @@ class OrderedDict(StdlibOrderedDict):
         '''
         key_function = \
                    comparison_tools.process_key_function_or_attribute_name(key)
-        sorted_keys = sorted(self.keys(), key=key_function, reverse=reverse)
-        for key_ in sorted_keys[1:]:
-            self.move_to_end(key_)
+        # `sorted` finds runs that are already sorted and merges them, so if
+        # the keys were sorted before some new keys were added, this takes
+        # O(k log k + n) time for `k` new keys.
+        self._reorder(sorted(self.keys(), key=key_function, reverse=reverse))
+
+
+    def reorder(self, keys):
+        '''
+        Change the order of the keys to the order of `keys`, in-place.
+
+        `keys` must have all of the dictionary's keys, each of them once.
+        '''
+        keys = tuple(keys)
+        if len(keys) != len(self) or set(keys) != self.keys():
+            raise ValueError("`keys` must have all of the dictionary's keys, "
+                             "each of them once.")
+        self._reorder(keys)
+
+
+    def _reorder(self, keys):
+        '''
+        Change the order of the keys to the order of `keys`, in-place.
+
+        We can only reorder a `collections.OrderedDict` by moving keys to the
+        end, so we move as few of them as we can: Keys at the start that are
+        already in place stay there, and so does the first key after them,
+        since moving all the keys after it to the end leaves it in place.
+        '''
+        for n_keys_in_place, (new_key, old_key) in enumerate(zip(keys, self)):
+            if new_key != old_key:
+                break
+        else:
+            return
+        move_to_end = self.move_to_end
+        for key in itertools.islice(keys, n_keys_in_place + 1, None):
+            move_to_end(key)
 
 
     def index(self, key):
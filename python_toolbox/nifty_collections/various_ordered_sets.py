@@ -8,6 +8,7 @@ import operator
 import itertools
 
 from python_toolbox import comparison_tools
+from python_toolbox import misc_tools
 from python_toolbox import context_management
 from python_toolbox import caching
 from python_toolbox import freezing
@@ -138,13 +139,42 @@ class OrderedSet(BaseOrderedSet, collections.abc.MutableSet):
         The optional `key` argument will be passed to the `sorted` function as
         a key function.
         '''
-        # Inefficient implementation until someone cares.
         key_function = \
                    comparison_tools.process_key_function_or_attribute_name(key)
-        sorted_members = sorted(tuple(self), key=key_function, reverse=reverse)
+        # `sorted` finds runs that are already sorted and merges them, so if
+        # the items were sorted before some new items were added, this takes
+        # O(k log k + n) time for `k` new items.
+        self._reorder(sorted(self, key=key_function, reverse=reverse))
+
+
+    def reorder(self, keys):
+        '''
+        Change the order of the items to the order of `keys`, in-place.
+
+        `keys` must have all of the ordered set's items, each of them once.
+        '''
+        keys = tuple(keys)
+        if len(keys) != len(self) or set(keys) != self._map.keys():
+            raise ValueError("`keys` must have all of the ordered set's "
+                             "items, each of them once.")
+        self._reorder(keys)
+
+
+    def _reorder(self, keys):
+        '''
+        Change the order of the items to the order of `keys`, in-place.
 
-        self.clear()
-        self |= sorted_members
+        The existing nodes are relinked in one pass, without creating new ones.
+        '''
+        end = self._end
+        previous_node = end
+        for key in keys:
+            node = self._map[key]
+            previous_node[NEXT] = node
+            node[PREV] = previous_node
+            previous_node = node
+        previous_node[NEXT] = end
+        end[PREV] = previous_node
 
 
     def discard(self, key):
@@ -225,6 +255,16 @@ class EmittingOrderedSet(OrderedSet):
             self.remove(key)
         self.add(key, last=last)
 
+    def _reorder(self, keys):
+        '''
+        Change the order of the items to the order of `keys`, in-place.
+
+        This emits once, if there are any items.
+        '''
+        super()._reorder(keys)
+        if self:
+            self._emit()
+
     _emitter_freezer = freezing.FreezerProperty()
 
     def __eq__(self, other):
@@ -238,3 +278,285 @@ class EmittingOrderedSet(OrderedSet):
     def get_without_emitter(self):
         '''Get a version of this ordered set without an emitter attached.'''
         return OrderedSet(self)
+
+
+
+class _REMOVED(misc_tools.NonInstantiable):
+    '''Marker for a slot of an `IndexedOrderedSet` that has no item.'''
+
+
+def _lowest_bit(i):
+    return i & -i
+
+
+def _build_fenwick_tree(values):
+    '''
+    Build a Fenwick tree of `values`, in linear time.
+
+    A Fenwick tree, or binary indexed tree, is a list in which item number `i`
+    (counting from 1, item 0 is unused) is the sum of the values in the range
+    `(i - _lowest_bit(i), i]`. This allows getting the sum of any prefix of
+    the values, and changing a value, in logarithmic time.
+    '''
+    tree = [0]
+    tree.extend(values)
+    for i in range(1, len(tree)):
+        parent = i + _lowest_bit(i)
+        if parent < len(tree):
+            tree[parent] += tree[i]
+    return tree
+
+
+def _append_to_fenwick_tree(tree, value):
+    '''
+    Append a value to a Fenwick tree.
+
+    The new node sums the nodes under it, and there are as many of them as the
+    trailing zeros of the new node's number, which is 1 on average, so this
+    takes amortized constant time.
+    '''
+    i = len(tree)
+    stop = i - _lowest_bit(i)
+    j = i - 1
+    while j > stop:
+        value += tree[j]
+        j -= _lowest_bit(j)
+    tree.append(value)
+
+
+def _add_to_fenwick_tree(tree, i, delta):
+    '''Add `delta` to value number `i` (counting from 0) in a Fenwick tree.'''
+    i += 1
+    while i < len(tree):
+        tree[i] += delta
+        i += _lowest_bit(i)
+
+
+def _get_fenwick_tree_prefix_sum(tree, n):
+    '''Get the sum of the first `n` values in a Fenwick tree.'''
+    total = 0
+    while n:
+        total += tree[n]
+        n -= _lowest_bit(n)
+    return total
+
+
+def _find_in_fenwick_tree(tree, prefix_sum):
+    '''
+    Find the largest `n` so the sum of the first `n` values is `prefix_sum`.
+
+    The values must not be negative. When they're all zeros and ones, this is
+    the index number (counting from 0) of the value that has `prefix_sum`
+    ones before it, if that value is one.
+    '''
+    n = 0
+    bit = 1 << (len(tree).bit_length() - 1)
+    while bit:
+        next_n = n + bit
+        if next_n < len(tree) and tree[next_n] <= prefix_sum:
+            n = next_n
+            prefix_sum -= tree[n]
+        bit >>= 1
+    return n
+
+
+class IndexedOrderedSet(collections.abc.MutableSet, collections.abc.Sequence):
+    '''
+    A `set` with an order, which can be quickly indexed by position.
+
+    This is like `OrderedSet`, except that getting an item by its index number
+    and getting the index number of an item (`ordered_set[i]` and
+    `ordered_set.index(item)`) take logarithmic time instead of linear time.
+    Membership checks take constant time, and adding and removing items, and
+    `move_to_end`, take amortized logarithmic time. (Adding an item to the end
+    takes amortized constant time.)
+
+    The items are kept in a list of slots, in order. Removing an item leaves
+    its slot empty, and a Fenwick tree that counts the items in the slots
+    gives the positions of items. When there are too many empty slots, the
+    list is rebuilt without them. There's room left at the start of the list
+    for adding items at the start with `add(item, last=False)` or
+    `move_to_end(item, last=False)`.
+    '''
+
+    def __init__(self, iterable=()):
+        self._rebuild(dict.fromkeys(iterable))
+
+
+    def _rebuild(self, items, n_free_start_slots=0):
+        '''
+        Rebuild the slots with `items` in order, without empty slots.
+
+        `n_free_start_slots` empty slots are left at the start.
+        '''
+        self._slots = [_REMOVED] * n_free_start_slots
+        self._slots.extend(items)
+        self._slot_by_item = {
+            item: slot for slot, item in
+            enumerate(self._slots[n_free_start_slots:], n_free_start_slots)
+        }
+        self._n_free_start_slots = n_free_start_slots
+        self._tree = _build_fenwick_tree(
+            itertools.chain(itertools.repeat(0, n_free_start_slots),
+                            itertools.repeat(1, len(self._slot_by_item)))
+        )
+
+
+    def __len__(self):
+        return len(self._slot_by_item)
+
+    def __contains__(self, item):
+        return item in self._slot_by_item
+
+    def __iter__(self):
+        for item in self._slots:
+            if item is not _REMOVED:
+                yield item
+
+    def __reversed__(self):
+        for item in reversed(self._slots):
+            if item is not _REMOVED:
+                yield item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(
+                map(self.__getitem__, range(*index.indices(len(self))))
+            )
+        if index < 0:
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError
+        return self._slots[_find_in_fenwick_tree(self._tree, index)]
+
+    def index(self, item):
+        '''Get the index number of `item` in the ordered set.'''
+        try:
+            slot = self._slot_by_item[item]
+        except KeyError:
+            raise ValueError('%r is not in the ordered set.' % (item,))
+        return _get_fenwick_tree_prefix_sum(self._tree, slot)
+
+    def __repr__(self):
+        if not self:
+            return '%s()' % (type(self).__name__,)
+        return '%s(%r)' % (type(self).__name__, list(self))
+
+    def __eq__(self, other):
+        return (
+            (type(self) is type(other)) and
+            (len(self) == len(other)) and
+            all(itertools.starmap(operator.eq, zip(self, other)))
+        )
+
+    __hash__ = None
+
+
+    def add(self, item, last=True):
+        '''
+        Add an element to a set.
+
+        This has no effect if the element is already present.
+
+        Specify `last=False` to add the item at the start of the ordered set.
+        '''
+        if item in self._slot_by_item:
+            return
+        if last:
+            self._slot_by_item[item] = len(self._slots)
+            self._slots.append(item)
+            _append_to_fenwick_tree(self._tree, 1)
+        else:
+            if not self._n_free_start_slots:
+                self._rebuild(tuple(self), max(len(self), 8))
+            self._n_free_start_slots -= 1
+            slot = self._n_free_start_slots
+            self._slot_by_item[item] = slot
+            self._slots[slot] = item
+            _add_to_fenwick_tree(self._tree, slot, 1)
+
+
+    def discard(self, item):
+        '''
+        Remove an element from a set if it is a member.
+
+        If the element is not a member, do nothing.
+        '''
+        try:
+            slot = self._slot_by_item.pop(item)
+        except KeyError:
+            return
+        self._slots[slot] = _REMOVED
+        _add_to_fenwick_tree(self._tree, slot, -1)
+
+        # Empty slots at the end are dropped, and empty slots at the start can
+        # be used for adding items at the start:
+        while self._slots and self._slots[-1] is _REMOVED:
+            self._slots.pop()
+            self._tree.pop()
+        self._n_free_start_slots = min(self._n_free_start_slots,
+                                       len(self._slots))
+        while self._n_free_start_slots < len(self._slots) and \
+                           self._slots[self._n_free_start_slots] is _REMOVED:
+            self._n_free_start_slots += 1
+
+        if len(self._slots) > 2 * len(self._slot_by_item) + 16:
+            self._rebuild(tuple(self))
+
+
+    def clear(self):
+        '''Clear the ordered set, removing all items.'''
+        self._rebuild(())
+
+
+    def pop(self, last=True):
+        '''Remove and return the last element, or the first if `last=False`.'''
+        if not self:
+            raise KeyError('set is empty')
+        item = self._slots[-1 if last else self._n_free_start_slots]
+        self.discard(item)
+        return item
+
+
+    def move_to_end(self, item, last=True):
+        '''
+        Move an existing element to the end (or start if `last=False`.)
+        '''
+        if item not in self._slot_by_item:
+            raise KeyError(item)
+        self.discard(item)
+        self.add(item, last=last)
+
+
+    def sort(self, key=None, reverse=False):
+        '''
+        Sort the items according to their keys, changing the order in-place.
+
+        The optional `key` argument will be passed to the `sorted` function as
+        a key function.
+        '''
+        key_function = \
+                   comparison_tools.process_key_function_or_attribute_name(key)
+        # `sorted` finds runs that are already sorted and merges them, so if
+        # the items were sorted before some new items were added, this takes
+        # O(k log k + n) time for `k` new items.
+        self._rebuild(sorted(self, key=key_function, reverse=reverse))
+
+
+    def reorder(self, keys):
+        '''
+        Change the order of the items to the order of `keys`, in-place.
+
+        `keys` must have all of the ordered set's items, each of them once.
+        The slots are rebuilt in one pass.
+        '''
+        keys = tuple(keys)
+        if len(keys) != len(self) or set(keys) != self._slot_by_item.keys():
+            raise ValueError("`keys` must have all of the ordered set's "
+                             "items, each of them once.")
+        self._rebuild(keys)
+
+
+    def copy(self):
+        '''Get a shallow copy of the ordered set.'''
+        return type(self)(self)
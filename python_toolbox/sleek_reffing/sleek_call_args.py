@@ -8,16 +8,44 @@ See its documentation for more details.
 '''
 
 import inspect
+import weakref
 
 from python_toolbox import cheat_hashing
 
-from .sleek_ref import SleekRef
-from .cute_sleek_value_dict import CuteSleekValueDict
+from .exceptions import SleekRefDied
 
 
 __all__ = ['SleekCallArgs']
 
 
+class _ArgRef(weakref.ref):
+    '''
+    A weakref to an argument.
+
+    This is a separate type so we could tell a weakref that we made apart from
+    an argument that happens to be a weakref.
+    '''
+    __slots__ = ()
+
+
+def _dereference(thing):
+    '''Get the argument from an item of `SleekCallArgs._refs`.'''
+    if type(thing) is _ArgRef:
+        argument = thing()
+        if argument is None:
+            raise SleekRefDied
+        return argument
+    return thing
+
+
+def _cheat_hash_with(cheat_hasher, value):
+    '''Hash `value`, or cheat-hash it with `cheat_hasher` if unhashable.'''
+    try:
+        return hash(value)
+    except TypeError:
+        return cheat_hasher(value)
+
+
 class SleekCallArgs:
     '''
     A bunch of call args with a sleekref to them.
@@ -32,7 +60,17 @@ class SleekCallArgs:
 
     All the argument values are sleekreffed to avoid memory leaks. (See
     documentation of `python_toolbox.sleek_reffing.SleekRef` for more details.)
+
+    Since caches may hold many of these, they're kept compact: the argument
+    names are kept in sorted tuples, and the arguments are kept in one flat
+    tuple, holding a weakref for each weakreffable argument and the argument
+    itself for the rest. (The attributes are slotted, but there's still a
+    `__dict__`, so you can set other attributes on them like before.)
     '''
+
+    __slots__ = ('containing_dict', '_arg_names', '_star_kwarg_names',
+                 '_n_star_args', '_refs', '_hash', '__dict__', '__weakref__')
+
     # What if we one of the args gets gc'ed before this SCA gets added to the
     # dictionary? It will render this SCA invalid, but we'll still be in the
     # dict. So make note to user: Always keep reference to args and kwargs
@@ -46,60 +84,116 @@ class SleekCallArgs:
         calculate call args from `*args` and `**kwargs`.
         '''
 
-        self.containing_dict = containing_dict
-        '''
-        `dict` we'll try to remove ourselves from when 1 of our sleekrefs dies.
-        '''
-
         args_spec = inspect.getfullargspec(function)
         star_args_name, star_kwargs_name = args_spec.varargs, args_spec.varkw
 
         call_args = inspect.getcallargs(function, *args, **kwargs)
         del args, kwargs
 
-        self.star_args_refs = []
-        '''Sleekrefs to star-args.'''
-
+        star_args = ()
         if star_args_name:
-            star_args = call_args.pop(star_args_name, None)
-            if star_args:
-                self.star_args_refs = [SleekRef(star_arg, self.destroy) for
-                                       star_arg in star_args]
+            star_args = call_args.pop(star_args_name, ())
 
-        self.star_kwargs_refs = {}
-        '''Sleerefs to star-kwargs.'''
+        star_kwargs = {}
         if star_kwargs_name:
             star_kwargs = call_args.pop(star_kwargs_name, {})
-            if star_kwargs:
-                self.star_kwargs_refs = CuteSleekValueDict(self.destroy,
-                                                           star_kwargs)
 
-        self.args_refs = CuteSleekValueDict(self.destroy, call_args)
-        '''Mapping from argument name to value, sleek-style.'''
+        self._initialize(containing_dict, call_args, star_args, star_kwargs)
 
-        # In the future the `.args`, `.star_args` and `.star_kwargs` attributes
-        # may change, so we must record the hash now:
-        self._hash = cheat_hashing.cheat_hash(
-            (
-                self.args,
-                self.star_args,
-                self.star_kwargs
-            )
-        )
 
+    @classmethod
+    def from_call_args(cls, containing_dict, call_args, star_args=(),
+                       star_kwargs=None, cheat_hasher=None):
+        '''
+        Construct a `SleekCallArgs` from call args that were already resolved.
+
+        This skips the introspection that the normal constructor does on every
+        call. `call_args` must be a `dict` mapping each named argument of the
+        function to its value, (including arguments that got their default
+        value,) `star_args` is the sequence of extraneous positional arguments
+        and `star_kwargs` is the `dict` of extraneous keyword arguments.
+
+        This is useful when the caller has already analyzed the function's
+        signature once and can resolve the call args by itself, like
+        `caching.cache` does.
+
+        If some of the arguments are unhashable, they're cheat-hashed with
+        `cheat_hashing.cheat_hash`. You may give a `cheat_hasher`, like a
+        `cheat_hashing.IncrementalCheatHasher`, to cheat-hash them with
+        instead. It's called with each unhashable argument separately.
+        '''
+        sleek_call_args = cls.__new__(cls)
+        sleek_call_args._initialize(containing_dict, call_args, star_args,
+                                    star_kwargs or {}, cheat_hasher)
+        return sleek_call_args
 
 
-    args = property(lambda self: dict(self.args_refs))
-    '''The arguments.'''
+    def _initialize(self, containing_dict, call_args, star_args, star_kwargs,
+                    cheat_hasher=None):
+        '''Initialize the sleekrefs and the hash from resolved call args.'''
 
-    star_args = property(
-        lambda self:
-            tuple((star_arg_ref() for star_arg_ref in self.star_args_refs))
-    )
-    '''Extraneous arguments. (i.e. `*args`.)'''
+        self.containing_dict = containing_dict
+        '''
+        `dict` we'll try to remove ourselves from when 1 of our sleekrefs dies.
+        '''
 
-    star_kwargs = property(lambda self: dict(self.star_kwargs_refs))
-    '''Extraneous keyword arguments. (i.e. `*kwargs`.)'''
+        self._arg_names = arg_names = tuple(sorted(call_args))
+        self._n_star_args = len(star_args)
+        self._star_kwarg_names = star_kwarg_names = tuple(sorted(star_kwargs))
+
+        values = tuple(map(call_args.__getitem__, arg_names))
+        if star_args:
+            values += tuple(star_args)
+        if star_kwarg_names:
+            values += tuple(map(star_kwargs.__getitem__, star_kwarg_names))
+
+        # In the future the arguments may change, so we must record the hash
+        # now:
+        hash_tuple = (arg_names, star_kwarg_names, values)
+        try:
+            self._hash = hash(hash_tuple)
+        except TypeError:
+            if cheat_hasher is None:
+                self._hash = cheat_hashing.cheat_hash(hash_tuple)
+            else:
+                self._hash = hash((arg_names, star_kwarg_names,
+                                   tuple(_cheat_hash_with(cheat_hasher, value)
+                                         for value in values)))
+
+        destroy = self.destroy
+        refs = []
+        for value in values:
+            if type(value).__weakrefoffset__:
+                try:
+                    value = _ArgRef(value, destroy)
+                except TypeError:
+                    pass
+            refs.append(value)
+        self._refs = tuple(refs)
+
+
+    @property
+    def args(self):
+        '''The arguments.'''
+        return dict(zip(self._arg_names, map(_dereference, self._refs)))
+
+
+    @property
+    def star_args(self):
+        '''Extraneous arguments. (i.e. `*args`.)'''
+        n_arg_names = len(self._arg_names)
+        return tuple(map(
+            _dereference,
+            self._refs[n_arg_names : n_arg_names + self._n_star_args]
+        ))
+
+
+    @property
+    def star_kwargs(self):
+        '''Extraneous keyword arguments. (i.e. `*kwargs`.)'''
+        first_index = len(self._arg_names) + self._n_star_args
+        return dict(zip(self._star_kwarg_names,
+                        map(_dereference, self._refs[first_index:])))
 
 
     def destroy(self, _=None):
@@ -118,12 +212,23 @@ class SleekCallArgs:
     def __eq__(self, other):
         if not isinstance(other, SleekCallArgs):
             return NotImplemented
-        return self.args == other.args and \
-               self.star_args == other.star_args and \
-               self.star_kwargs == other.star_kwargs
+        if self is other:
+            return True
+        if self._arg_names != other._arg_names or \
+           self._star_kwarg_names != other._star_kwarg_names or \
+           self._n_star_args != other._n_star_args:
+            return False
+        for ref, other_ref in zip(self._refs, other._refs):
+            if ref is other_ref:
+                continue
+            try:
+                value, other_value = _dereference(ref), _dereference(other_ref)
+            except SleekRefDied:
+                return False
+            if value is not other_value and not value == other_value:
+                return False
+        return True
 
 
     def __ne__(self, other):
         return not self == other
-
-
@@ -4,16 +4,26 @@
 '''Testing module for `python_toolbox.caching.cache`.'''
 
 
+import asyncio
 import datetime as datetime_module
+import inspect
 import re
+import sys
+import textwrap
+import threading
+import time
 import weakref
 
+import pytest
+
 from python_toolbox import caching
+from python_toolbox import cheat_hashing
 from python_toolbox.caching import cache
 from python_toolbox import misc_tools
 from python_toolbox import temp_value_setting
 from python_toolbox import cute_testing
 from python_toolbox import gc_tools
+from python_toolbox import future_tools
 
 
 @misc_tools.set_attributes(i=0)
@@ -125,6 +135,52 @@ def test_unhashable_arguments():
     assert f(meow=y) == f(1, meow=y)
 
 
+def test_cheat_hasher():
+    '''Test that a `cheat_hasher` doesn't re-walk an unchanged argument.'''
+    hashed_items = []
+
+    class Item:
+        def __hash__(self):
+            hashed_items.append(self)
+            return 7
+
+    class Config(list):
+        version = 0
+
+    cheat_hasher = cheat_hashing.IncrementalCheatHasher(
+        get_version=lambda thing: getattr(thing, 'version', None)
+    )
+    calls = []
+
+    @cache(cheat_hasher=cheat_hasher)
+    def f(config, n=1):
+        calls.append(config)
+        return len(config) * n
+
+    config = Config([Item(), Item(), [Item(), {'a': Item()}]])
+    assert f(config) == 3
+    n_hashed_items = len(hashed_items)
+    assert n_hashed_items >= 4
+    assert f(config) == f(config, 1) == f(n=1, config=config) == 3
+    assert len(hashed_items) == n_hashed_items
+    assert calls == [config]
+    assert f(config, 2) == 6
+    assert len(hashed_items) == n_hashed_items
+    assert calls == [config, config]
+
+    config.append(Item())
+    config.version += 1
+    assert f(config) == 4
+    assert len(hashed_items) > n_hashed_items
+    assert calls == [config, config, config]
+
+    # Without a `cheat_hasher`, the argument is walked on every call:
+    n_hashed_items = len(hashed_items)
+    g = cache()(lambda config: len(config))
+    assert g(config) == g(config) == 4
+    assert len(hashed_items) >= n_hashed_items + 2 * 5
+
+
 def test_helpful_message_when_forgetting_parentheses():
     '''Test user gets a helpful exception when when forgetting parentheses.'''
 
@@ -230,3 +286,309 @@ def test_time_to_keep():
         fixed_time += datetime_module.timedelta(days=1000)
         assert list(map(f, 'abcdef')) == [13, 14, 15, 16, 17, 18]
         assert f(a='d', b='meow') == 19
+
+
+def _check_call_args_resolution(f):
+    '''
+    Check that `cache` resolves all kinds of arguments of `f` to the same key.
+
+    `f` must have the signature `(a, b, c=3, *args, d, e=5, **kwargs)`, where
+    `a` may be positional-only, and return a new number on every call.
+    '''
+    for cached_function in (cache()(f), cache(max_size=10)(f)):
+
+        result = cached_function(1, 2, d=4)
+        assert result == cached_function(1, 2, 3, d=4) == \
+               cached_function(1, b=2, d=4) == \
+               cached_function(1, c=3, b=2, e=5, d=4)
+
+        assert cached_function(1, 2, 3, 'x', d=4) != result
+        assert cached_function(1, 2, 3, 'x', d=4) == \
+                                               cached_function(1, 2, 3, 'x', d=4)
+
+        other_result = cached_function(1, 2, d=4, meow='frrr', z=7)
+        assert other_result != result
+        assert cached_function(1, 2, z=7, meow='frrr', d=4) == other_result
+
+        with cute_testing.RaiseAssertor(TypeError):
+            cached_function(1, 2)
+
+        with cute_testing.RaiseAssertor(TypeError):
+            cached_function(1, 2, b=2, d=4)
+
+
+def test_call_args_resolution():
+    '''Test that `cache` resolves all kinds of arguments to the same key.'''
+
+    @misc_tools.set_attributes(i=0)
+    def f(a, b, c=3, *args, d, e=5, **kwargs):
+        try:
+            return f.i
+        finally:
+            f.i += 1
+
+    _check_call_args_resolution(f)
+
+
+def test_call_args_resolution_with_positional_only_arguments():
+    '''Test `cache` on a function with a positional-only argument.'''
+    if sys.version_info < (3, 8):
+        pytest.skip('Positional-only arguments need Python 3.8 or later.')
+
+    # Using `exec` so this module can still be compiled on older Pythons:
+    namespace = {}
+    exec(textwrap.dedent('''
+        def f(a, /, b, c=3, *args, d, e=5, **kwargs):
+            try:
+                return f.i
+            finally:
+                f.i += 1
+    '''), namespace)
+    f = namespace['f']
+    f.i = 0
+
+    _check_call_args_resolution(f)
+
+
+def test_time_to_keep_and_max_size():
+    '''Test `cache` with both `time_to_keep` and `max_size`.'''
+    counting_func.i = 0
+    f = cache(max_size=3, time_to_keep={'days': 10})(counting_func)
+
+    start_datetime = datetime_module.datetime.now()
+    fixed_time = start_datetime
+    def _mock_now():
+        return fixed_time
+
+    with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+        assert list(map(f, 'abc')) == [0, 1, 2]
+        assert list(map(f, 'abc')) == [0, 1, 2]
+        assert f('d') == 3 # Now `f('a')` has been thrown out by LRU.
+        assert list(map(f, 'bcd')) == [1, 2, 3]
+        assert f('a') == 4 # Now `f('b')` has been thrown out by LRU.
+        fixed_time += datetime_module.timedelta(days=5)
+        assert f('e') == 5 # Now `f('c')` has been thrown out by LRU.
+        fixed_time += datetime_module.timedelta(days=5)
+        # `f('d')` and `f('a')` have expired, `f('e')` hasn't:
+        assert list(map(f, 'eda')) == [5, 6, 7]
+        fixed_time += datetime_module.timedelta(days=1)
+
+        # Churning through many entries; older ones get thrown out by LRU:
+        assert list(map(f, range(1000))) == list(range(8, 1008))
+        assert list(map(f, (997, 998, 999))) == [1005, 1006, 1007]
+        assert f(0) == 1008
+        fixed_time += datetime_module.timedelta(days=9)
+        assert list(map(f, (998, 999, 0))) == [1006, 1007, 1008]
+        fixed_time += datetime_module.timedelta(days=1)
+        assert list(map(f, (998, 999, 0))) == [1009, 1010, 1011]
+
+        f.cache_clear()
+        assert f(0) == 1012
+
+
+def test_thread_safe():
+    '''Test that `thread_safe=True` computes each value only once.'''
+    for kwargs in ({}, {'max_size': 3}, {'time_to_keep': {'days': 1}}):
+        calls = []
+        calls_lock = threading.Lock()
+
+        @cache(thread_safe=True, **kwargs)
+        def f(x):
+            with calls_lock:
+                calls.append(x)
+            time.sleep(0.05)
+            return x * 2
+
+        with future_tools.CuteThreadPoolExecutor(10) as executor:
+            results = tuple(executor.map(f, (1, 2) * 10))
+
+        assert results == (2, 4) * 10
+        assert sorted(calls) == [1, 2]
+        assert f(1) == 2
+        assert f(2) == 4
+        assert sorted(calls) == [1, 2]
+        f.cache_clear()
+        assert f(1) == 2
+        assert sorted(calls) == [1, 1, 2]
+
+
+def test_thread_safe_statistics():
+    '''Test that `thread_safe=True` counts hits and misses accurately.'''
+    for kwargs in ({}, {'max_size': 5}):
+
+        @cache(thread_safe=True, **kwargs)
+        def f(x):
+            return x * 2
+
+        def call_f_many_times(i):
+            for j in range(2000):
+                f(j % 10)
+
+        old_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(10 ** -6)
+        try:
+            with future_tools.CuteThreadPoolExecutor(8) as executor:
+                tuple(executor.map(call_f_many_times, range(8)))
+        finally:
+            sys.setswitchinterval(old_switch_interval)
+        cache_info = f.cache_info()
+        assert cache_info.hits + cache_info.misses == 8 * 2000
+
+
+def test_thread_safe_exception():
+    '''Test that `thread_safe=True` doesn't cache exceptions.'''
+    calls = []
+
+    @cache(thread_safe=True)
+    def f(x):
+        calls.append(x)
+        time.sleep(0.05)
+        raise ValueError(x)
+
+    def call_f(x):
+        try:
+            f(x)
+        except ValueError as value_error:
+            return value_error.args
+
+    with future_tools.CuteThreadPoolExecutor(5) as executor:
+        assert tuple(executor.map(call_f, (7,) * 5)) == ((7,),) * 5
+    assert calls == [7]
+
+    with cute_testing.RaiseAssertor(ValueError):
+        f(7)
+    assert calls == [7, 7]
+
+
+def test_thread_safe_failed_store():
+    '''
+    Test that `thread_safe=True` doesn't hang waiters when storing fails.
+    '''
+    class FailingBackend:
+        def lookup(self, function_name, key):
+            raise KeyError(key)
+        def store(self, function_name, key, value):
+            raise OSError('Disk is full.')
+        def discard(self, function_name, key):
+            pass
+        def clear(self, function_name=None):
+            pass
+        def get_size(self, function_name=None):
+            return 0
+
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @cache(thread_safe=True, backend=FailingBackend(), name='f')
+    def f(x):
+        calls.append(x)
+        started.set()
+        release.wait()
+        return x * 2
+
+    def call_f(x):
+        try:
+            return f(x)
+        except OSError as os_error:
+            return os_error.args
+
+    with future_tools.CuteThreadPoolExecutor(2) as executor:
+        computing_future = executor.submit(call_f, 3)
+        assert started.wait(10)
+        waiting_future = executor.submit(call_f, 3)
+        time.sleep(0.1)
+        release.set()
+        assert computing_future.result(10) == ('Disk is full.',)
+        assert waiting_future.result(10) == 6
+    assert calls == [3]
+
+    # The failed key isn't left in-flight, so the next call computes again:
+    with cute_testing.RaiseAssertor(OSError):
+        f(3)
+    assert calls == [3, 3]
+
+
+def test_coroutine_function():
+    '''Test that `cache` caches the results of coroutine functions.'''
+    for kwargs in ({}, {'max_size': 3}, {'time_to_keep': {'days': 1}}):
+        calls = []
+
+        @cache(**kwargs)
+        async def f(x, y=1):
+            calls.append(x)
+            await asyncio.sleep(0.01)
+            if x == 'bad':
+                raise ValueError(x)
+            return x * y
+
+        assert inspect.iscoroutinefunction(f)
+
+        async def main():
+            assert await f(2) == await f(2, 1) == await f(y=1, x=2) == 2
+            assert calls == [2]
+            assert await asyncio.gather(*(f(3) for _ in range(5))) == [3] * 5
+            assert calls == [2, 3]
+            for _ in range(2):
+                with cute_testing.RaiseAssertor(ValueError):
+                    await f('bad')
+            assert calls == [2, 3, 'bad', 'bad']
+            results = await asyncio.gather(
+                *(f('bad') for _ in range(3)), return_exceptions=True
+            )
+            assert all(isinstance(result, ValueError) for result in results)
+            assert calls == [2, 3, 'bad', 'bad', 'bad']
+
+        # Not using `asyncio.run`, which needs Python 3.7 or later:
+        event_loop = asyncio.new_event_loop()
+        try:
+            event_loop.run_until_complete(main())
+        finally:
+            event_loop.close()
+
+    with cute_testing.RaiseAssertor(ValueError, 'coroutine function'):
+        @cache(thread_safe=True)
+        async def g(x):
+            return x
+
+
+def test_cache_info():
+    '''Test the `cache_info` method of cached functions.'''
+    f = cache(max_size=2)(counting_func)
+    assert f.cache_info() == caching.CacheInfo(hits=0, misses=0, evictions=0,
+                                               expirations=0, size=0,
+                                               miss_time=0)
+    f(1), f(1), f(a=1), f(2), f(3), f(3)
+    cache_info = f.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.evictions,
+            cache_info.expirations, cache_info.size) == (3, 3, 1, 0, 2)
+    assert cache_info.miss_time >= 0
+
+    g = cache(time_to_keep={'days': 1})(counting_func)
+    fixed_time = datetime_module.datetime.now()
+    with temp_value_setting.TempValueSetter(
+                    (caching.decorators, '_get_now'), lambda: fixed_time):
+        g(1), g(2), g(2)
+        fixed_time += datetime_module.timedelta(days=2)
+        g(3)
+    cache_info = g.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.evictions,
+            cache_info.expirations, cache_info.size) == (1, 3, 0, 2, 1)
+
+
+def test_info_publisher():
+    '''Test that `cache` publishes its `CacheInfo` periodically.'''
+    published_infos = []
+    f = cache(info_publisher=published_infos.append,
+              info_publishing_interval={'seconds': 0})(counting_func)
+    f(1)
+    f(1)
+    assert [cache_info.hits for cache_info in published_infos] == [0, 0]
+    assert [cache_info.misses for cache_info in published_infos] == [0, 1]
+
+    published_infos = []
+    g = cache(info_publisher=published_infos.append)(counting_func)
+    g(1)
+    g(1)
+    assert not published_infos
@@ -205,3 +205,17 @@ def test_force_value_not_getter():
 
     a = A()
     assert a.personality == counting_func == a.personality == counting_func
+
+
+def test_cache_info():
+    '''Test `CachedProperty.cache_info`.'''
+    class C:
+        personality = CachedProperty(counting_func)
+
+    assert C.personality.cache_info().misses == 0
+    c1, c2 = C(), C()
+    c1.personality, c1.personality, c2.personality
+    cache_info = C.personality.cache_info()
+    assert cache_info.misses == 2
+    assert cache_info.hits is cache_info.size is None
+    assert cache_info.miss_time >= 0
@@ -3,8 +3,14 @@
 
 '''Testing module for `python_toolbox.caching.CachedType`.'''
 
+import datetime as datetime_module
+
+from python_toolbox import caching
+from python_toolbox import temp_value_setting
 from python_toolbox.caching import CachedType
 
+infinity = float('inf')
+
 
 def test():
     '''Test basic workings of `CachedType`.'''
@@ -20,4 +26,93 @@ def test_keyword_only_separator_and_annotations():
         def __init__(self, a: int, b: float, *, c: 'lol' = 7) -> None:
             pass
 
-    assert B(1, 2) is B(b=2, a=1, c=7) is not B(b=2, a=1, c=8)
\ No newline at end of file
+    assert B(1, 2) is B(b=2, a=1, c=7) is not B(b=2, a=1, c=8)
+
+
+def test_cache_info():
+    '''Test `CachedType.cache_info`.'''
+    class C(metaclass=CachedType):
+        def __init__(self, a=1):
+            pass
+
+    assert C.cache_info().hits == C.cache_info().misses == 0
+    C(1), C(1), C(a=1), C(2)
+    cache_info = C.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.size) == (2, 2, 2)
+    assert cache_info.evictions == cache_info.expirations == 0
+    assert cache_info.miss_time >= 0
+
+
+def test_max_size_and_time_to_keep():
+    '''Test `CachedType` with `max_size` and `time_to_keep`.'''
+    class D(metaclass=CachedType, max_size=2):
+        def __init__(self, a):
+            pass
+
+    d1, d2 = D(1), D(2)
+    assert D(1) is d1
+    d3 = D(3) # Now `D(2)` has been forgotten.
+    assert D(1) is d1
+    assert D(3) is d3
+    assert D(2) is not d2
+    assert D.cache_info().evictions == 2
+    assert D.cache_info().size == 2
+
+    D.cache_clear()
+    assert D(1) is not d1
+
+    class E(metaclass=CachedType, time_to_keep={'days': 1}):
+        def __init__(self, a):
+            pass
+
+    fixed_time = datetime_module.datetime.now()
+    with temp_value_setting.TempValueSetter(
+                    (caching.decorators, '_get_now'), lambda: fixed_time):
+        e1 = E(1)
+        assert E(a=1) is e1
+        fixed_time += datetime_module.timedelta(days=2)
+        assert E(1) is not e1
+        assert E.cache_info().expirations == 1
+
+
+def test_subclass():
+    '''Test that subclasses of a `CachedType` class get their own cache.'''
+    class F(metaclass=CachedType, max_size=10):
+        def __init__(self, a=1):
+            pass
+
+    class G(F):
+        def __init__(self, a=1, b=2):
+            pass
+
+    assert F() is F(1) is not G() is G(1, 2)
+    assert type(G(b=2)) is G
+
+
+def test_subclass_limits():
+    '''Test that subclasses inherit `max_size` and `time_to_keep`.'''
+    class H(metaclass=CachedType, max_size=2, time_to_keep={'days': 1}):
+        def __init__(self, a):
+            pass
+
+    class I(H):
+        pass
+
+    class J(I, max_size=3):
+        pass
+
+    class K(H, max_size=infinity, time_to_keep=None):
+        pass
+
+    fixed_time = datetime_module.datetime.now()
+    with temp_value_setting.TempValueSetter(
+                    (caching.decorators, '_get_now'), lambda: fixed_time):
+        for cls, max_size, expires in ((H, 2, True), (I, 2, True),
+                                       (J, 3, True), (K, None, False)):
+            instances = [cls(i) for i in range(5)]
+            assert cls.cache_info().size == (max_size or 5)
+            assert cls(4) is instances[4]
+            fixed_time += datetime_module.timedelta(days=2)
+            assert (cls(4) is not instances[4]) == expires
+            assert cls.cache_info().expirations == \
+                                                   (max_size if expires else 0)
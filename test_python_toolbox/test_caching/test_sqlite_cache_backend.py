@@ -0,0 +1,208 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for `python_toolbox.caching.SqliteCacheBackend`.'''
+
+import textwrap
+import threading
+import time
+
+from python_toolbox import cute_testing
+from python_toolbox import future_tools
+from python_toolbox import misc_tools
+from python_toolbox import temp_file_tools
+from python_toolbox.caching import cache, SqliteCacheBackend
+
+
+@misc_tools.set_attributes(i=0)
+def counting_func(a=1, b=2, *args, **kwargs):
+    '''Function that returns a bigger number every time.'''
+    try:
+        return counting_func.i
+    finally:
+        counting_func.i += 1
+
+
+def _store_in_backend(path, i):
+    '''Store a result in a backend. Used from other processes.'''
+    SqliteCacheBackend(path).store('f', bytes([i]), {'number': i})
+
+
+def test_persistence():
+    '''Test that results survive across backends using the same file.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        f = cache(backend=SqliteCacheBackend(path))(counting_func)
+
+        result = f(1)
+        assert f(1) == f(1, 2) == f(b=2, a=1) == result
+        assert f({1, 'meow'}, x=[1, 2]) == f({'meow', 1}, x=[1, 2]) != result
+
+        g = cache(backend=SqliteCacheBackend(path))(counting_func)
+        assert g(1) == result
+        assert g.cache_info().hits == 1
+        assert g.cache_info().size == 2
+
+        g.cache_clear()
+        assert f(1) != result
+
+
+def test_functions_with_same_name():
+    '''Test that functions with the same name don't share their results.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        backend = SqliteCacheBackend(temp_folder / 'cache.sqlite')
+
+        def make_multiplier(factor):
+            @cache(backend=backend)
+            def multiply(x):
+                return x * factor
+            return multiply
+
+        double, triple = make_multiplier(2), make_multiplier(3)
+        assert double.__qualname__ == triple.__qualname__
+        assert double(5) == 10
+        assert triple(5) == 15
+        other_double = make_multiplier(2)
+        assert other_double(5) == 10
+        assert other_double.cache_info().hits == 1
+
+        increment = cache(backend=backend)(lambda x: x + 1)
+        negate = cache(backend=backend)(lambda x: -x)
+        assert increment(5) == 6
+        assert negate(5) == -5
+
+        # Unpicklable closures need a `name`:
+        with cute_testing.RaiseAssertor(TypeError):
+            make_multiplier(lambda: None)
+        lock = threading.Lock()
+        @cache(backend=backend, name='locked_multiply')
+        def locked_multiply(x):
+            with lock:
+                return x * 4
+        assert locked_multiply(5) == 20
+
+
+def test_changed_code():
+    '''Test that results of a function's old code aren't used.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        namespace = {'cache': cache, 'SqliteCacheBackend': SqliteCacheBackend,
+                     'path': path, '__name__': __name__}
+
+        exec(textwrap.dedent('''
+            @cache(backend=SqliteCacheBackend(path))
+            def f(x):
+                return x + 1
+        '''), namespace)
+        old_f = namespace['f']
+        assert old_f(1) == 2
+
+        exec(textwrap.dedent('''
+            @cache(backend=SqliteCacheBackend(path))
+            def f(x):
+                return x + 2
+        '''), namespace)
+        new_f = namespace['f']
+        assert new_f.__qualname__ == old_f.__qualname__
+        assert new_f(1) == 3
+        assert new_f.cache_info().hits == 0
+
+        exec(textwrap.dedent('''
+            @cache(backend=SqliteCacheBackend(path))
+            def f(x):
+                return x + 1
+        '''), namespace)
+        assert namespace['f'](1) == 2
+        assert namespace['f'].cache_info().hits == 1
+
+
+def test_max_size():
+    '''Test that `SqliteCacheBackend` throws away least-recently-used results.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        f = cache(
+            backend=SqliteCacheBackend(temp_folder / 'cache.sqlite',
+                                       max_size=3)
+        )(counting_func)
+
+        r0, r1, r2 = f(0), f(1), f(2)
+        assert f(0) == r0
+        f(3) # Now `f(1)` has been thrown out.
+        assert f(0) == r0
+        assert f(2) == r2
+        assert f(1) != r1
+        cache_info = f.cache_info()
+        assert (cache_info.evictions, cache_info.size) == (2, 3)
+
+
+def test_max_size_per_function():
+    '''Test that `max_size` applies to each function sharing a backend.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        backend = SqliteCacheBackend(temp_folder / 'cache.sqlite', max_size=2)
+        f = cache(backend=backend)(lambda x: x + 1)
+        g = cache(backend=backend)(lambda x: x + 2)
+        for i in range(2):
+            g(i)
+        for i in range(5):
+            f(i)
+        assert (f.cache_info().evictions, f.cache_info().size) == (3, 2)
+        assert (g.cache_info().evictions, g.cache_info().size) == (0, 2)
+        assert backend.get_size() == 4
+        g(0), g(1)
+        assert g.cache_info().hits == 2
+
+
+def test_batched_uses():
+    '''Test that `SqliteCacheBackend` writes the times of uses in batches.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        backend = SqliteCacheBackend(path, max_size=3)
+        backend.n_batched_uses = 2
+        for i in range(3):
+            backend.store('f', bytes([i]), i)
+            time.sleep(0.01)
+
+        def get_last_used(i):
+            return backend._connection.execute(
+                'SELECT last_used FROM entries WHERE key = ?', (bytes([i]),)
+            ).fetchone()[0]
+
+        last_used_0, last_used_1 = get_last_used(0), get_last_used(1)
+        assert backend.lookup('f', bytes([0])) == 0
+        assert get_last_used(0) == last_used_0 # Not written yet.
+        assert backend.lookup('f', bytes([1])) == 1
+        assert get_last_used(0) > last_used_0
+        assert get_last_used(1) > last_used_1
+
+        # Now 2 is the least recently used, even for another backend:
+        SqliteCacheBackend(path, max_size=3).store('f', bytes([3]), 3)
+        assert backend.get_size('f') == 3
+        with cute_testing.RaiseAssertor(KeyError):
+            backend.lookup('f', bytes([2]))
+
+        # A pending use is written when storing:
+        assert backend.lookup('f', bytes([0])) == 0
+        time.sleep(0.01)
+        backend.store('f', bytes([4]), 4)
+        assert backend.lookup('f', bytes([0])) == 0
+        with cute_testing.RaiseAssertor(KeyError):
+            backend.lookup('f', bytes([1]))
+
+
+def test_processes():
+    '''Test that several processes can use the same file at once.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        backend = SqliteCacheBackend(path)
+        with future_tools.CuteProcessPoolExecutor(4) as executor:
+            tuple(executor.map(_store_in_backend, (path,) * 20, range(20)))
+        assert backend.get_size('f') == 20
+        assert backend.lookup('f', bytes([7])) == {'number': 7}
+
+
+def test_incompatible_arguments():
+    '''Test that `max_size` and `time_to_keep` can't be used with a backend.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        backend = SqliteCacheBackend(temp_folder / 'cache.sqlite')
+        for kwargs in ({'max_size': 7}, {'time_to_keep': {'days': 1}}):
+            with cute_testing.RaiseAssertor(ValueError, "Can't use"):
+                cache(backend=backend, **kwargs)
@@ -4,8 +4,12 @@
 '''Testing module for `python_toolbox.abc_tools.AbstractStaticMethod`.'''
 
 import copy
+import sys
 
-from python_toolbox.cheat_hashing import cheat_hash
+from python_toolbox import cute_testing
+from python_toolbox import gc_tools
+from python_toolbox.cheat_hashing import cheat_hash, IncrementalCheatHasher
+from python_toolbox.cheat_hashing.cheat_hash import dispatch_map
 
 
 def test_cheat_hash():
@@ -31,3 +35,74 @@ def test_cheat_hash():
     for thing, thing_copy in zip(things, things_copy):
         assert cheat_hash(thing) == cheat_hash(thing) == \
                cheat_hash(thing_copy) == cheat_hash(thing_copy)
+
+
+def test_dispatch_map():
+    '''Test that `cheat_hash` notices types being added to `dispatch_map`.'''
+
+    class Meow(list):
+        pass
+
+    meow = Meow([1, 2])
+    assert cheat_hash(meow) == cheat_hash([1, 2])
+    dispatch_map[Meow] = lambda thing: 7
+    try:
+        assert cheat_hash(meow) == 7
+        assert cheat_hash([1, meow]) == cheat_hash([1, Meow([3])])
+    finally:
+        del dispatch_map[Meow]
+    assert cheat_hash(meow) == cheat_hash([1, 2])
+
+
+def test_deep_nesting():
+    '''Test `cheat_hash` on structures nested deeper than the recursion limit.'''
+    deep_list = []
+    deep_list_copy = []
+    for i in range(sys.getrecursionlimit() * 2):
+        deep_list = [i, {i: [deep_list]}, {i}]
+        deep_list_copy = [i, {i: [deep_list_copy]}, {i}]
+    assert cheat_hash(deep_list) == cheat_hash(deep_list_copy)
+    assert cheat_hash(deep_list) != cheat_hash([deep_list])
+
+
+def test_incremental_cheat_hasher():
+    '''Test that `IncrementalCheatHasher` remembers cheat-hashes by version.'''
+
+    class Meow(list):
+        pass
+
+    cheat_hasher = IncrementalCheatHasher(max_size=2)
+    for thing in ([1, {2: 3}], Meow([1, {2: 3}])):
+        original_cheat_hash = cheat_hash(thing)
+        assert cheat_hasher(thing, version=1) == original_cheat_hash
+        thing.append(4)
+        # The version wasn't changed, so the old cheat-hash is remembered:
+        assert cheat_hasher(thing, version=1) == original_cheat_hash
+        assert cheat_hasher(thing, version=2) == cheat_hash(thing) != \
+                                                           original_cheat_hash
+        assert cheat_hasher(thing) == cheat_hash(thing)
+    assert len(cheat_hasher) == 2
+
+    meow = Meow([1, 2])
+    cheat_hasher(meow, version=1)
+    assert len(cheat_hasher) == 3
+    del meow
+    gc_tools.collect()
+    assert len(cheat_hasher) == 2
+
+    for i in range(5):
+        cheat_hasher([i], version=1)
+    assert len(cheat_hasher) == 3
+    cheat_hasher.clear()
+    assert len(cheat_hasher) == 0
+
+
+def test_incremental_cheat_hasher_tracking_changes():
+    '''Test `IncrementalCheatHasher` with `track_changes=True`.'''
+    cheat_hasher = IncrementalCheatHasher(track_changes=True)
+    thing = {1: [2, 3], 4: {5}}
+    assert cheat_hasher(thing) == cheat_hasher(thing) == cheat_hash(thing)
+    thing[1].append(6)
+    assert cheat_hasher(thing) == cheat_hash(thing)
+    with cute_testing.RaiseAssertor(NotImplementedError):
+        IncrementalCheatHasher(get_version=len, track_changes=True)
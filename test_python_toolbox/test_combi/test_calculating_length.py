@@ -1,6 +1,11 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import itertools
+
+from python_toolbox import math_tools
+from python_toolbox import nifty_collections
+
 from python_toolbox.combi.perming.calculating_length import *
 
 def test_recurrent_perm_space_length():
@@ -13,3 +18,47 @@ def test_recurrent_comb_space_length():
     assert calculate_length_of_recurrent_comb_space(3, (3, 1, 1)) == 4
     assert calculate_length_of_recurrent_comb_space(2, (3, 2, 2, 1)) == 9
     assert calculate_length_of_recurrent_comb_space(3, (3, 2, 2, 1)) == 14
+
+
+def test_big_k():
+    assert calculate_length_of_recurrent_perm_space(60, (1,) * 80) == \
+                          math_tools.factorial(80) // math_tools.factorial(20)
+    assert calculate_length_of_recurrent_comb_space(60, (1,) * 80) == \
+                                                    math_tools.binomial(80, 60)
+    assert calculate_length_of_recurrent_comb_space(50, (50, 50)) == 51
+    assert calculate_length_of_recurrent_perm_space(30, (1, 2) * 50) > \
+           calculate_length_of_recurrent_perm_space(30, (1, 2) * 49)
+
+
+def test_generating_function():
+    from python_toolbox.combi.perming import calculating_length
+    for sequence in ('aabbbc', 'aaaa', 'abcdd', 'aabbccdd'):
+        fbb = nifty_collections.FrozenBagBag(
+            nifty_collections.Bag(sequence).values()
+        )
+        for k in range(len(sequence) + 2):
+            perms = set(itertools.permutations(sequence, k))
+            combs = {tuple(sorted(perm)) for perm in perms}
+            assert calculating_length.\
+                     _calculate_length_with_generating_function(
+                                  k, fbb, is_exponential=True) == len(perms)
+            assert calculating_length.\
+                     _calculate_length_with_generating_function(
+                                  k, fbb, is_exponential=False) == len(combs)
+
+
+def test_cache():
+    cache_info = calculate_length_of_recurrent_perm_space.cache_info()
+    calculate_length_of_recurrent_perm_space(5, (3, 3, 2, 1))
+    calculate_length_of_recurrent_perm_space(5, (3, 3, 2, 1))
+    new_cache_info = calculate_length_of_recurrent_perm_space.cache_info()
+    assert new_cache_info.hits >= cache_info.hits + 1
+    assert new_cache_info.size <= 10 ** 5
+
+    cache_info = calculate_length_of_recurrent_comb_space.cache_info()
+    calculate_length_of_recurrent_comb_space(5, (3, 3, 2, 1, 1))
+    calculate_length_of_recurrent_comb_space(
+        5, nifty_collections.FrozenBagBag((3, 3, 2, 1, 1))
+    )
+    new_cache_info = calculate_length_of_recurrent_comb_space.cache_info()
+    assert new_cache_info.hits >= cache_info.hits + 1
@@ -34,3 +34,12 @@ def test_chain_spaces():
     assert not ChainSpace(())
 
 
+
+
+def test_slicing():
+    chain_space = ChainSpace(('abc', range(4), (7, 8)))
+    for slice_ in (slice(None), slice(2, 7), slice(None, None, -2),
+                   slice(3, None), slice(7, 8)):
+        assert tuple(chain_space[slice_]) == tuple(chain_space)[slice_]
+    assert chain_space[4:][1] == 2
+    assert chain_space[4:].index(8) == 4
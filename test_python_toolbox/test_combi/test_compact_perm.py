@@ -0,0 +1,87 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import pickle
+
+from python_toolbox import cute_testing
+
+from python_toolbox.combi import *
+
+
+def test_compact_perm():
+    perm_space = PermSpace(7)
+    for perm in (perm_space[0], perm_space[1234], perm_space[-1]):
+        compact_perm = CompactPerm(perm)
+        assert not hasattr(compact_perm, '__dict__')
+        assert tuple(compact_perm) == tuple(perm)
+        assert compact_perm.to_perm() == perm
+        assert compact_perm.n_cycles == perm.n_cycles
+        assert compact_perm.degree == perm.degree
+        assert tuple(~compact_perm) == tuple(~perm)
+        for exponent in (-3, -1, 0, 1, 2, 5):
+            assert tuple(compact_perm ** exponent) == tuple(perm ** exponent)
+        assert compact_perm.apply('abcdefg') == perm.apply('abcdefg')
+        assert 'abcdefg' * compact_perm == 'abcdefg' * perm
+        assert compact_perm * perm == CompactPerm(perm * perm)
+        assert perm * compact_perm == perm * perm
+        assert compact_perm * compact_perm == CompactPerm(perm * perm)
+        assert compact_perm == CompactPerm(tuple(perm), perm_space)
+        assert compact_perm != perm
+        assert hash(compact_perm) == hash(CompactPerm(perm))
+        assert pickle.loads(pickle.dumps(compact_perm)) == compact_perm
+
+    assert CompactPerm(perm_space[3]) < CompactPerm(perm_space[4])
+    assert repr(CompactPerm((1, 0))) == '<CompactPerm: (1, 0)>'
+
+    partial_compact_perm = CompactPerm(PermSpace(5, n_elements=3)[7])
+    assert partial_compact_perm.is_partial
+    assert partial_compact_perm.degree is NotImplemented
+    with cute_testing.RaiseAssertor(TypeError):
+        ~partial_compact_perm
+
+    big_perm = PermSpace(1000)[10 ** 100]
+    assert CompactPerm(big_perm).degree == big_perm.degree
+
+    with cute_testing.RaiseAssertor(NotImplementedError):
+        CompactPerm(PermSpace('abc')[0])
+    with cute_testing.RaiseAssertor(NotImplementedError):
+        CompactPerm(CombSpace(5, 2)[0])
+    for invalid_perm_sequence in ((0, 1), (0, 1, 1), (0, 1, 3), (0, -1, 2)):
+        with cute_testing.RaiseAssertor(ValueError):
+            CompactPerm(invalid_perm_sequence, PermSpace(3))
+    with cute_testing.RaiseAssertor(ValueError):
+        CompactPerm((1, 1))
+
+
+def test_perm_array():
+    perm_space = PermSpace(5)
+    perm_array = PermArray(perm_space, perm_space[10:20])
+    assert len(perm_array) == 10
+    assert tuple(perm_array) == tuple(map(CompactPerm, perm_space[10:20]))
+    assert perm_array[-1] == CompactPerm(perm_space[19])
+    assert perm_array.index(perm_space[15]) == 5
+    assert perm_space[15] in perm_array
+    assert perm_space[25] not in perm_array
+    assert (7, 7, 7, 7, 7) not in perm_array
+    assert tuple(perm_array[2:8:3]) == \
+                                (perm_array[2], perm_array[5])
+
+    perm_array.append((4, 3, 2, 1, 0))
+    perm_array.extend([perm_space[0]])
+    assert len(perm_array) == 12
+    assert perm_array[-2] == CompactPerm(perm_space[-1])
+    for invalid_perm in ((0, 1), (0, 1, 2, 3, 3), (0, 1, 2, 3, 5),
+                         (0, 1, 2, 3, 'x')):
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_array.append(invalid_perm)
+    with cute_testing.RaiseAssertor(ValueError):
+        PermArray(perm_space, [(0, 0, 0, 0, 0)])
+    assert len(perm_array) == 12
+    partial_perm_array = PermArray(PermSpace(5, n_elements=2), [(4, 0)])
+    with cute_testing.RaiseAssertor(ValueError):
+        partial_perm_array.append((5, 0))
+    with cute_testing.RaiseAssertor(IndexError):
+        perm_array[12]
+
+    assert len(PermArray(PermSpace(3, n_elements=0), [()] * 3)) == 3
+    assert PermArray(PermSpace(300), [PermSpace(300)[0]])._array.itemsize == 2
@@ -6,6 +6,8 @@ import itertools
 import functools
 import math
 
+import pytest
+
 from python_toolbox import cute_testing
 from python_toolbox import math_tools
 from python_toolbox import cute_iter_tools
@@ -746,3 +748,151 @@ def test_variations_make_unequal():
 
 
 
+
+
+def test_iteration_matches_indexing():
+    '''Test that iterating on a space gives the same perms as indexing it.'''
+    perm_spaces = (
+        PermSpace(5), PermSpace('meow'), PermSpace(6, n_elements=3),
+        PermSpace('abcde', domain='vwxyz'), CombSpace(7, 3),
+        CombSpace('abcdef', 2), PermSpace(5, fixed_map={1: 3, 4: 0}),
+        PermSpace('abcde', 4, fixed_map={2: 'b'}), PermSpace('aabbc'),
+        PermSpace('abab', n_elements=3),
+        PermSpace('abcba', fixed_map={0: 'b'}),
+        CombSpace('aabbbc', 3), CombSpace((2, 1, 1, 0, 0), 2),
+        PermSpace(6)[100:400], CombSpace('aabbbc', 3)[2:7],
+        PermSpace('aabbc', 4, domain='wxyz', fixed_map={'x': 'c'})[5:20],
+    )
+    for perm_space in perm_spaces:
+        assert tuple(perm_space) == \
+                         tuple(perm_space[i] for i in range(perm_space.length))
+        for start, stop in ((1, 5), (7, 8), (-4, None), (3, 3)):
+            assert tuple(perm_space[start:stop]) == \
+                                  tuple(perm_space)[start:stop]
+
+    assert tuple(map(tuple, PermSpace('abcd', n_elements=2))) == \
+                                tuple(itertools.permutations('abcd', 2))
+    assert tuple(map(tuple, CombSpace('abcd', 2))) == \
+                                tuple(itertools.combinations('abcd', 2))
+
+
+def test_get_many():
+    '''Test `PermSpace.get_many`, with or without NumPy.'''
+    perm_spaces = (
+        PermSpace(6), PermSpace('meowz', 3), PermSpace(7)[100:900],
+        PermSpace('abcde', domain='vwxyz'), PermSpace(3, n_elements=0),
+        PermSpace('abcdef', 4, fixed_map={0: 'c'}), CombSpace(7, 3),
+        PermSpace('aabbc'), PermSpace(5, degrees=2),
+    )
+    for perm_space in perm_spaces:
+        length = perm_space.length
+        indices = [0, length - 1, length // 2, length // 3, length // 3, -1,
+                   -length]
+        perm_sequences = perm_space.get_many(indices)
+        if not isinstance(perm_sequences, list):
+            assert perm_sequences.shape == (len(indices),
+                                            perm_space.n_elements)
+            perm_sequences = list(map(tuple, perm_sequences.tolist()))
+        assert perm_sequences == [tuple(perm_space[i]) for i in indices]
+
+        perm_sequences = perm_space.get_many(range(perm_space.length))
+        if not isinstance(perm_sequences, list):
+            perm_sequences = list(map(tuple, perm_sequences.tolist()))
+        assert perm_sequences == list(map(tuple, perm_space))
+
+        with cute_testing.RaiseAssertor(IndexError):
+            perm_space.get_many([1, perm_space.length])
+
+
+def test_get_many_numpy():
+    '''Test that `PermSpace.get_many` returns a NumPy array if possible.'''
+    numpy = pytest.importorskip('numpy')
+    perm_sequences = \
+                 PermSpace(20).get_many(numpy.arange(10 ** 18, 10 ** 18 + 5))
+    assert perm_sequences.dtype == numpy.int64
+    assert perm_sequences.tolist() == \
+            [list(PermSpace(20)[10 ** 18 + i]) for i in range(5)]
+    assert PermSpace('abc').get_many([5]).tolist() == [['c', 'b', 'a']]
+    assert PermSpace(((1, 2), (3, 4))).get_many([1])[0, 0] == (3, 4)
+
+
+def test_degreed_iteration_and_index():
+    '''Test iterating on degreed spaces and indexing big ones.'''
+    perm_spaces = (
+        PermSpace(6, degrees=(1, 3)), PermSpace('abcde', degrees=2),
+        PermSpace(6, degrees=(2, 4), fixed_map={1: 3}),
+        PermSpace(5, degrees=3, domain='vwxyz'),
+        PermSpace(7, degrees=(0, 5))[20:300],
+    )
+    for perm_space in perm_spaces:
+        perms = tuple(perm_space)
+        assert perms == tuple(perm_space[i] for i in range(perm_space.length))
+        assert all(perm.degree in perm_space.degrees for perm in perms)
+        for i, perm in enumerate(perms):
+            assert perm_space.index(perm) == i
+        assert tuple(perm_space[7:11]) == perms[7:11]
+
+    perm_space = PermSpace(30, degrees=(3, 5))
+    for i in (0, 10 ** 10, perm_space.length // 3, perm_space.length - 1):
+        perm = perm_space[i]
+        assert perm.degree in (3, 5)
+        assert perm_space.index(perm) == i
+    assert tuple(perm_space[10 ** 10:10 ** 10 + 20]) == \
+                   tuple(perm_space[10 ** 10 + i] for i in range(20))
+
+
+def test_cycles_and_powers():
+    '''Test `Perm.cycles` and raising perms to big powers.'''
+    perm = PermSpace(5)[10]
+    assert perm.cycles == ((0,), (1, 2, 4, 3))
+    assert perm.n_cycles == 2
+    assert perm.degree == 3
+    assert perm ** 4 == perm ** 0 == perm ** (10 ** 9 * 4) == PermSpace(5)[0]
+    assert perm ** 3 == ~perm == perm ** -1 == perm ** (4 * 10 ** 9 - 1)
+    assert PermSpace('abcde', domain='vwxyz')[10].cycles == perm.cycles
+
+    for perm in map(PermSpace(6).__getitem__, range(0, 720, 37)):
+        product = perm
+        for exponent in range(1, 8):
+            assert perm ** exponent == product
+            assert perm ** -exponent == ~product
+            product *= perm
+        assert sorted(itertools.chain.from_iterable(perm.cycles)) == \
+                                                                list(range(6))
+
+    big_perm = PermSpace(1000)[10 ** 2000]
+    assert big_perm ** (10 ** 100) * big_perm ** (- 10 ** 100) == \
+                                                          PermSpace(1000)[0]
+    with cute_testing.RaiseAssertor(TypeError):
+        PermSpace(5, n_elements=3)[7].cycles
+
+
+def test_stepped_slicing():
+    '''Test that slicing perm and comb spaces with a step gives `SliceSpace`.'''
+    perm_space = PermSpace(4)
+    perms = tuple(perm_space)
+    for slice_ in (slice(1, 10, 2), slice(None, None, -1), slice(20, 2, -5),
+                   slice(-3, None, 2), slice(5, 100, 7)):
+        slice_space = perm_space[slice_]
+        assert isinstance(slice_space, SliceSpace)
+        assert tuple(slice_space) == perms[slice_]
+        assert len(slice_space) == len(perms[slice_])
+        for i, perm in enumerate(slice_space):
+            assert slice_space[i] == perm
+            assert slice_space.index(perm) == i
+    assert perm_space[1:10:2][-1] == perms[9]
+    assert perm_space[1:10:2][1:3] == perm_space[3:7:2]
+    assert perms[2] not in perm_space[1:10:2]
+
+    # Stepped slices of contiguously-sliced spaces:
+    assert tuple(perm_space[2:20][1:10:3]) == perms[2:20][1:10:3]
+
+    comb_space = CombSpace('abcde', 2)
+    combs = tuple(comb_space)
+    slice_space = comb_space[::-2]
+    assert isinstance(slice_space, SliceSpace)
+    assert tuple(slice_space) == combs[::-2]
+    assert tuple(comb_space[1::3]) == combs[1::3]
+
+    assert tuple(PermSpace(4)[1:10:1]) == perms[1:10]
+    assert isinstance(PermSpace(4)[1:10:1], PermSpace)
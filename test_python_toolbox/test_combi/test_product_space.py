@@ -1,6 +1,8 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import itertools
+
 from python_toolbox import cute_testing
 
 from python_toolbox.combi import *
@@ -50,3 +52,34 @@ def test():
                                              ProductSpace((range(4), range(3)))
     assert ProductSpace((range(4), range(3))) != \
                                              ProductSpace((range(3), range(4)))
+
+
+def test_slicing_and_iteration():
+    product_space = ProductSpace((range(3), 'ab', range(2)))
+    assert tuple(product_space) == \
+                tuple(product_space[i] for i in range(product_space.length))
+    for slice_ in (slice(None), slice(2, 9), slice(None, None, -1),
+                   slice(1, -1, 3), slice(5, 2), slice(-4, None)):
+        slice_space = product_space[slice_]
+        assert isinstance(slice_space, SliceSpace)
+        assert tuple(slice_space) == tuple(product_space)[slice_]
+        assert tuple(slice_space[1:3]) == tuple(product_space)[slice_][1:3]
+        for i, item in enumerate(slice_space):
+            assert slice_space[i] == item
+            assert slice_space.index(item) == i
+    assert (0, 'a', 0) not in product_space[1:]
+    assert repr(product_space[2:9:3]) == '<ProductSpace: 3 * 2 * 2>[2:9:3]'
+    assert not product_space[5:2]
+    assert tuple(ProductSpace((range(3), (), range(2)))) == ()
+
+    huge_product_space = ProductSpace((range(10 ** 10),) * 3)
+    slice_space = huge_product_space[10 ** 25:]
+    assert slice_space.length == 10 ** 30 - 10 ** 25
+    assert slice_space[0] == (100000, 0, 0)
+    assert tuple(itertools.islice(slice_space, 3)) == \
+                         ((100000, 0, 0), (100000, 0, 1), (100000, 0, 2))
+    assert tuple(huge_product_space[-2:]) == (
+        (10 ** 10 - 1, 10 ** 10 - 1, 10 ** 10 - 2),
+        (10 ** 10 - 1, 10 ** 10 - 1, 10 ** 10 - 1)
+    )
+    assert MapSpace(sum, huge_product_space[-2:])[1] == 3 * (10 ** 10 - 1)
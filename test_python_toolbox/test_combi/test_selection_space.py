@@ -30,3 +30,69 @@ def test():
 
 
 
+
+
+def test_result_types():
+    selection_space = SelectionSpace('abcd', result_type=frozenset)
+    assert selection_space[5] == frozenset('bd')
+    assert isinstance(selection_space[5], frozenset)
+    assert len(set(selection_space)) == 16
+    assert selection_space.index(frozenset('bd')) == 5
+    assert repr(SelectionSpace(range(3), result_type=tuple)) == \
+                           '<SelectionSpace: range(0, 3), result_type=tuple>'
+    assert selection_space != SelectionSpace('abcd')
+
+    selection_space = SelectionSpace(range(4), result_type=tuple)
+    assert selection_space[11] == (0, 2, 3)
+    assert selection_space.index((0, 2, 3)) == 11
+    assert tuple(selection_space) == tuple(
+        tuple(sorted(selection)) for selection in SelectionSpace(range(4))
+    )
+    assert SelectionSpace(range(30), result_type=tuple)[-1] == \
+                                                              tuple(range(30))
+
+
+def test_gray_code():
+    selection_space = SelectionSpace('abcde')
+    steps = tuple(selection_space.iterate_gray_code())
+    selections = tuple(selection for selection, _, _ in steps)
+    assert steps[0] == (set(), None, None)
+    assert len(selections) == selection_space.length
+    assert len(set(map(frozenset, selections))) == selection_space.length
+    for selection, (next_selection, changed_item, is_added) in \
+                                                    zip(selections, steps[1:]):
+        assert selection ^ next_selection == {changed_item}
+        assert (changed_item in next_selection) == is_added
+
+    # Keeping a running total using only the changes:
+    selection_space = SelectionSpace(range(8), result_type=tuple)
+    total = 0
+    for selection, changed_item, is_added in \
+                                         selection_space.iterate_gray_code():
+        if changed_item is not None:
+            total += changed_item if is_added else -changed_item
+        assert total == sum(selection)
+        assert selection == tuple(sorted(selection))
+
+    # Items that appear several times in the sequence:
+    selection_space = SelectionSpace('aab')
+    for i, (selection, _, _) in enumerate(selection_space.iterate_gray_code()):
+        assert selection == selection_space[i ^ (i >> 1)]
+
+
+def test_of_size():
+    selection_space = SelectionSpace(range(6), result_type=frozenset)
+    selections = tuple(selection_space.iterate_of_size(3))
+    assert len(selections) == 20
+    assert set(selections) == {selection for selection in selection_space
+                               if len(selection) == 3}
+    assert selections[:2] == ({0, 1, 2}, {0, 1, 3})
+    assert tuple(selection_space.iterate_of_size(0)) == (frozenset(),)
+
+
+def test_slicing():
+    selection_space = SelectionSpace(range(4))
+    for slice_ in (slice(3, 9), slice(None, None, 5), slice(-3, None)):
+        assert tuple(selection_space[slice_]) == \
+                                               tuple(selection_space)[slice_]
+    assert SelectionSpace(range(100))[-1:][0] == set(range(100))
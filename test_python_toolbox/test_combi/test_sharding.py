@@ -0,0 +1,85 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import operator
+
+from python_toolbox import cute_testing
+
+from python_toolbox.combi import *
+
+
+def _get_degree(perm):
+    return perm.degree
+
+def _get_sum(items):
+    return sum(items)
+
+def _is_big(selection):
+    return sum(selection) >= 12
+
+def _has_degree_five(perm):
+    return perm.degree == 5
+
+
+def test_get_shard_ranges():
+    assert get_shard_ranges(PermSpace(4), 5) == (
+        range(0, 4), range(4, 9), range(9, 14), range(14, 19), range(19, 24)
+    )
+    assert get_shard_ranges(PermSpace(2), 5) == (range(0, 1), range(1, 2))
+    assert get_shard_ranges(CombSpace(3, 4), 5) == ()
+    perm_space = PermSpace(30)
+    shard_ranges = get_shard_ranges(perm_space, 7)
+    assert shard_ranges[0].start == 0
+    assert shard_ranges[-1].stop == perm_space.length
+    for shard_range, next_shard_range in zip(shard_ranges, shard_ranges[1:]):
+        assert shard_range.stop == next_shard_range.start
+    with cute_testing.RaiseAssertor(ValueError):
+        get_shard_ranges(perm_space, 0)
+
+
+def test_map_over_space():
+    perm_space = PermSpace(6)
+    progress = []
+    assert map_over_space(
+        _get_degree, perm_space, n_shards=5, max_workers=2,
+        progress_callback=lambda *args: progress.append(args)
+    ) == [perm.degree for perm in perm_space]
+    assert len(progress) == 5
+    assert progress[-1] == (perm_space.length, perm_space.length)
+
+    assert map_over_space(_get_degree, perm_space[100:200], operator.add,
+                          max_workers=2) == \
+                          sum(perm.degree for perm in perm_space[100:200])
+    product_space = ProductSpace((range(4), range(5), range(3)))
+    assert map_over_space(_get_sum, product_space, max, max_workers=2) == 9
+    assert map_over_space(_get_sum, CombSpace(3, 4), operator.add,
+                          initial=7, max_workers=2) == 7
+
+
+def test_empty_space():
+    empty_space = PermSpace(6)[10:10]
+    assert empty_space.length == 0
+    assert map_over_space(_get_degree, empty_space, max_workers=2) == []
+    assert map_over_space(_get_degree, empty_space, operator.add, initial=0,
+                          max_workers=2) == 0
+    with cute_testing.RaiseAssertor(ValueError, 'empty space'):
+        map_over_space(_get_degree, empty_space, operator.add, max_workers=2)
+    assert find_in_space(bool, empty_space, max_workers=2) is None
+
+
+def test_find_in_space():
+    selection_space = SelectionSpace(range(6))
+    assert find_in_space(_is_big, selection_space, n_shards=8,
+                         max_workers=2) == \
+                   next(selection for selection in selection_space
+                        if _is_big(selection))
+    perm_space = PermSpace(8)
+    first_perm = next(perm for perm in perm_space if perm.degree == 5)
+    progress = []
+    assert find_in_space(
+        _has_degree_five, perm_space[1:], n_shards=20, max_workers=2,
+        progress_callback=lambda *args: progress.append(args)
+    ) == first_perm
+    assert progress[-1][0] < perm_space.length
+    assert find_in_space(_has_degree_five, PermSpace(5), max_workers=2) is \
+                                                                          None
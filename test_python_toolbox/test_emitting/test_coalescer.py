@@ -0,0 +1,79 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import threading
+
+from python_toolbox import cute_testing
+from python_toolbox import emitting
+
+
+def test_context_manager():
+    calls = []
+    function = lambda: calls.append(None)
+    emitter_0 = emitting.Emitter(outputs=function)
+    emitter_1 = emitting.Emitter(outputs=(function,
+                                          lambda: calls.append(1)))
+    coalescer = emitting.Coalescer()
+
+    with coalescer:
+        for _ in range(100):
+            coalescer.emit(emitter_0)
+        with coalescer:
+            coalescer.emit(emitter_1)
+        assert calls == []
+    assert sorted(calls, key=str) == [1, None]
+
+    coalescer.emit(emitter_0)
+    assert len(calls) == 2
+    coalescer.flush()
+    assert len(calls) == 3
+    coalescer.flush()
+    assert len(calls) == 3
+
+
+def test_exception():
+    calls = []
+    emitter = emitting.Emitter(outputs=lambda: calls.append(None))
+    coalescer = emitting.Coalescer()
+
+    with cute_testing.RaiseAssertor(ZeroDivisionError):
+        with coalescer:
+            coalescer.emit(emitter)
+            with coalescer:
+                coalescer.emit(emitter)
+            1 / 0
+    assert calls == []
+    coalescer.flush()
+    assert calls == []
+
+    with coalescer:
+        with cute_testing.RaiseAssertor(ZeroDivisionError):
+            with coalescer:
+                1 / 0
+        coalescer.emit(emitter)
+    assert calls == [None]
+
+
+def test_window():
+    event = threading.Event()
+    calls = []
+
+    def function():
+        calls.append(threading.current_thread())
+        event.set()
+
+    emitter = emitting.Emitter(outputs=function)
+    coalescer = emitting.Coalescer(window=0.05, ordered=True)
+    for _ in range(100):
+        coalescer.emit(emitter)
+    assert event.wait(timeout=10)
+    assert len(calls) == 1
+    assert calls[0] is not threading.current_thread()
+
+    with coalescer:
+        coalescer.emit(emitter)
+    assert len(calls) == 2
+    assert calls[1] is threading.current_thread()
+    event.clear()
+    assert not event.wait(timeout=0.2)
+    assert len(calls) == 2
@@ -1,6 +1,11 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import asyncio
+import concurrent.futures
+import threading
+
+from python_toolbox import cute_testing
 from python_toolbox import misc_tools
 
 from python_toolbox import emitting
@@ -38,3 +43,197 @@ def test():
     assert my_function.call_counter == 8
 
 
+
+
+def test_diamond():
+    '''
+    Test that removing an output updates all the emitters that reach it.
+
+    `emitter_2` has the inputs `emitter_0` and `emitter_1`, and `emitter_1`
+    also has the input `emitter_0`.
+    '''
+    calls = []
+    function = lambda: calls.append(None)
+    emitter_2 = emitting.Emitter(outputs=function)
+    emitter_1 = emitting.Emitter(outputs=emitter_2)
+    emitter_0 = emitting.Emitter(outputs=(emitter_1, emitter_2))
+    for emitter in (emitter_0, emitter_1, emitter_2):
+        assert emitter.get_total_callable_outputs() == {function}
+    emitter_0.emit()
+    assert len(calls) == 1 # Not twice, even though there are two paths.
+
+    emitter_2.remove_output(function)
+    for emitter in (emitter_0, emitter_1, emitter_2):
+        assert emitter.get_total_callable_outputs() == set()
+        emitter.emit()
+    assert len(calls) == 1
+
+    emitter_1.add_output(function)
+    emitter_0.emit()
+    assert len(calls) == 2
+    emitter_1.remove_input(emitter_0)
+    emitter_0.emit()
+    assert len(calls) == 2
+    emitter_1.emit()
+    assert len(calls) == 3
+
+
+def test_cycles():
+    calls = []
+    function_0 = lambda: calls.append(0)
+    function_1 = lambda: calls.append(1)
+    function_2 = lambda: calls.append(2)
+    emitter_2 = emitting.Emitter(outputs=function_2)
+    emitter_1 = emitting.Emitter(outputs=(function_1, emitter_2))
+    emitter_0 = emitting.Emitter(outputs=(function_0, emitter_1),
+                                 inputs=emitter_1)
+    emitter_0.add_output(emitter_0)
+
+    for emitter in (emitter_0, emitter_1):
+        assert emitter.get_total_callable_outputs() == \
+                                         {function_0, function_1, function_2}
+    assert emitter_2.get_total_callable_outputs() == {function_2}
+    emitter_1.emit()
+    assert sorted(calls) == [0, 1, 2]
+
+    emitter_2.add_output(emitter_0)
+    emitter_2.emit()
+    assert sorted(calls) == [0, 0, 1, 1, 2, 2]
+
+    emitter_0.disconnect_from_all()
+    assert not emitter_0.get_inputs() and not emitter_0.get_outputs()
+    assert emitter_0.get_total_callable_outputs() == set()
+    assert emitter_1.get_total_callable_outputs() == {function_1, function_2}
+    assert emitter_2.get_total_callable_outputs() == {function_2}
+
+
+def test_getters_return_copies():
+    '''Test that the getters don't expose the emitter's internal sets.'''
+    function = lambda: None
+    emitter_1 = emitting.Emitter(outputs=function)
+    emitter_0 = emitting.Emitter(outputs=emitter_1)
+    emitter_2 = emitting.Emitter(inputs=emitter_1, outputs=emitter_0)
+
+    for getter in (emitter_1.get_inputs, emitter_1.get_outputs,
+                   emitter_1.get_total_callable_outputs):
+        with cute_testing.RaiseAssertor(AttributeError):
+            getter().add(lambda: None)
+    assert tuple(emitter_1.get_outputs()) == (function, emitter_2)
+    assert tuple(emitter_1.get_inputs()) == (emitter_0,)
+
+    # The emitters in the cycle share their total callable outputs inside:
+    total_callable_outputs = emitter_0.get_total_callable_outputs()
+    assert emitter_1.get_total_callable_outputs() == total_callable_outputs
+    assert total_callable_outputs == {function}
+    other_function = lambda: None
+    emitter_2.add_output(other_function)
+    assert total_callable_outputs == {function}
+    assert emitter_0.get_total_callable_outputs() == \
+                                              {function, other_function}
+
+
+def test_big_emitter_system():
+    calls = []
+    emitter_system = emitting.EmitterSystem()
+    emitter_system.bottom_emitter.add_output(lambda: calls.append(None))
+    emitters = [emitter_system.make_emitter() for _ in range(10 ** 4)]
+    for emitter, next_emitter in zip(emitters, emitters[1:]):
+        emitter.add_output(next_emitter)
+    emitters[-1].add_output(lambda: calls.append(None))
+
+    emitters[0].emit()
+    assert len(calls) == 2
+    emitter_system.top_emitter.emit()
+    assert len(calls) == 4
+
+    with emitter_system.cache_rebuilding_freezer:
+        for emitter in emitters[:100]:
+            emitter_system.remove_emitter(emitter)
+    assert len(emitter_system.emitters) == 10 ** 4 - 100 + 2
+    emitters[0].emit()
+    assert len(calls) == 4
+    emitters[100].emit()
+    assert len(calls) == 6
+
+
+def test_ordered():
+    calls = []
+    make_function = lambda name: lambda: calls.append(name)
+    emitter_3 = emitting.Emitter(outputs=(make_function('3a'),
+                                          make_function('3b')))
+    emitter_2 = emitting.Emitter(outputs=(make_function('2'), emitter_3))
+    emitter_1 = emitting.Emitter(outputs=(emitter_3, make_function('1')))
+    emitter_1.add_output(emitter_2)
+    emitter_0 = emitting.Emitter(outputs=(emitter_1, make_function('0'),
+                                          emitter_2))
+
+    for _ in range(3):
+        emitter_0.emit(ordered=True)
+        # `emitter_3` comes after `emitter_2`, even though it was added to
+        # `emitter_1` first, because `emitter_2` outputs to it.
+        assert calls == ['0', '1', '2', '3a', '3b']
+        del calls[:]
+
+    assert len(emitter_0.get_ordered_callable_outputs()) == 5
+    emitter_2.remove_output(emitter_3)
+    emitter_2.add_output(emitter_1)
+    emitter_1.remove_output(emitter_2)
+    emitter_0.emit(ordered=True)
+    assert calls == ['0', '2', '1', '3a', '3b']
+    del calls[:]
+
+    emitter_3.add_output(emitter_2) # Now there's a cycle.
+    emitter_1.emit(ordered=True)
+    assert sorted(calls) == ['1', '2', '3a', '3b']
+    del calls[:]
+
+    emitting.emit_together((emitter_3, emitter_1), ordered=True)
+    assert sorted(calls) == ['1', '2', '3a', '3b']
+
+
+def test_executor():
+    event = threading.Event()
+    calls = []
+    emitter = emitting.Emitter(outputs=(event.wait,
+                                        lambda: calls.append(None)))
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        futures = emitter.emit(executor=executor)
+        assert len(futures) == 2
+        # The slow callable output doesn't hold up the other one:
+        futures[0 if futures[0].done() else 1].result(timeout=5)
+        assert calls == [None]
+        event.set()
+        concurrent.futures.wait(futures, timeout=5)
+        assert all(future.done() for future in futures)
+    assert emitter.emit() is None
+
+
+def test_emit_async():
+    calls = []
+
+    async def coroutine_function():
+        calls.append('started')
+        await asyncio.sleep(0)
+        calls.append('finished')
+
+    emitter_1 = emitting.Emitter(outputs=(coroutine_function,
+                                          lambda: calls.append('function')))
+    emitter_0 = emitting.Emitter(outputs=emitter_1)
+
+    # Not using `asyncio.run`, which needs Python 3.7 or later:
+    event_loop = asyncio.new_event_loop()
+    try:
+        event_loop.run_until_complete(emitter_0.emit_async(ordered=True))
+    finally:
+        event_loop.close()
+    assert calls == ['function', 'started', 'finished']
+
+
+def test_emit_together():
+    calls = []
+    function = lambda: calls.append(None)
+    emitter_0 = emitting.Emitter(outputs=function)
+    emitter_1 = emitting.Emitter(outputs=function)
+    emitter_2 = emitting.Emitter(outputs=lambda: calls.append(2))
+    emitting.emit_together((emitter_0, emitter_1, emitter_2))
+    assert sorted(calls, key=str) == [2, None]
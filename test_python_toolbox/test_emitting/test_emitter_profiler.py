@@ -0,0 +1,113 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import asyncio
+import concurrent.futures
+import time
+
+from python_toolbox import cute_testing
+
+from python_toolbox import emitting
+
+
+def slow_function():
+    time.sleep(0.01)
+
+def fast_function():
+    pass
+
+
+def test():
+    emitter_1 = emitting.Emitter(outputs=(slow_function, fast_function),
+                                 name='emitter_1')
+    emitter_0 = emitting.Emitter(outputs=(emitter_1, fast_function),
+                                 name='emitter_0')
+    emitter_0.emit() # Not recorded.
+
+    with emitting.EmitterProfiler() as emitter_profiler:
+        for _ in range(10):
+            emitter_1.emit()
+        emitter_0.emit(ordered=True)
+        emitting.emit_together((emitter_0, emitter_1))
+    emitter_0.emit() # Not recorded.
+
+    statistics_1 = emitter_profiler.emitter_statistics[emitter_1]
+    assert statistics_1.n_emits == 10
+    assert statistics_1.mean_fan_out == statistics_1.max_fan_out == 2
+    slow_function_statistics = \
+                          statistics_1.callable_output_statistics[slow_function]
+    assert slow_function_statistics.n_calls == 10
+    assert 0.1 <= slow_function_statistics.total_time < 10
+    assert 0.01 <= slow_function_statistics.get_percentile(50) <= \
+           slow_function_statistics.get_percentile(99) <= \
+                                               slow_function_statistics.max_time
+    assert statistics_1.callable_output_statistics[fast_function].n_calls == 10
+
+    statistics_0 = emitter_profiler.emitter_statistics[emitter_0]
+    assert statistics_0.n_emits == 1
+    assert emitter_profiler.emitter_statistics[
+        (emitter_0, emitter_1)
+    ].n_emits == 1
+    assert len(emitter_profiler.emitter_statistics) == 3
+
+    report = emitter_profiler.get_report()
+    assert 'emitter_1' in report and 'slow_function' in report
+    report_lines = report.split('\n')
+    # The slowest callable output comes first:
+    assert 'slow_function' in report_lines[
+        report_lines.index('Callable outputs by total time:') + 2
+    ]
+
+    folded_stacks = emitter_profiler.get_folded_stacks().splitlines()
+    assert len(folded_stacks) == 6
+    stack, microseconds = folded_stacks[0].rsplit(' ', 1)
+    assert stack.startswith('emitter_1;') and stack.endswith('slow_function')
+    assert int(microseconds) >= 10 ** 5
+
+    emitter_profiler.reset()
+    assert not emitter_profiler.emitter_statistics
+    with cute_testing.RaiseAssertor(Exception):
+        emitter_profiler.stop()
+
+
+def test_nested_profilers():
+    emitter = emitting.Emitter(outputs=fast_function)
+    with emitting.EmitterProfiler() as outer_emitter_profiler:
+        emitter.emit()
+        with emitting.EmitterProfiler() as inner_emitter_profiler:
+            emitter.emit()
+        emitter.emit()
+    assert outer_emitter_profiler.emitter_statistics[emitter].n_emits == 2
+    assert inner_emitter_profiler.emitter_statistics[emitter].n_emits == 1
+
+
+def test_executor_and_async():
+    async def coroutine_function():
+        await asyncio.sleep(0.01)
+
+    emitter = emitting.Emitter(outputs=(slow_function, fast_function))
+    async_emitter = emitting.Emitter(outputs=(coroutine_function,
+                                              fast_function))
+    with emitting.EmitterProfiler() as emitter_profiler:
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            futures = emitter.emit(executor=executor)
+            concurrent.futures.wait(futures)
+        # Not using `asyncio.run`, which needs Python 3.7 or later:
+        event_loop = asyncio.new_event_loop()
+        try:
+            event_loop.run_until_complete(async_emitter.emit_async())
+        finally:
+            event_loop.close()
+
+    statistics = emitter_profiler.emitter_statistics[emitter]
+    assert statistics.n_emits == 1
+    assert statistics.callable_output_statistics[slow_function].max_time >= \
+                                                                           0.01
+    async_statistics = emitter_profiler.emitter_statistics[async_emitter]
+    assert async_statistics.n_emits == 1
+    assert async_statistics.callable_output_statistics[
+        coroutine_function
+    ].max_time >= 0.01
+    assert async_statistics.callable_output_statistics[
+        fast_function
+    ].n_calls == 1
@@ -0,0 +1,76 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import collections
+
+from python_toolbox import cute_testing
+
+from python_toolbox.nifty_collections import (IndexedOrderedDict,
+                                              OrderedDict, Ordered)
+
+
+def test():
+    indexed_ordered_dict = IndexedOrderedDict(((1, 'a'), (2, 'b')), c=3)
+    assert isinstance(indexed_ordered_dict, Ordered)
+    assert list(indexed_ordered_dict.items()) == [(1, 'a'), (2, 'b'),
+                                                  ('c', 3)]
+    assert indexed_ordered_dict.index('c') == 2
+    assert indexed_ordered_dict.get_key_at(1) == 2
+    assert indexed_ordered_dict.get_item_at(-1) == ('c', 3)
+    with cute_testing.RaiseAssertor(ValueError):
+        indexed_ordered_dict.index(7)
+    with cute_testing.RaiseAssertor(IndexError):
+        indexed_ordered_dict.get_key_at(3)
+
+    indexed_ordered_dict[1] = 'z'
+    assert indexed_ordered_dict.index(1) == 0
+    indexed_ordered_dict.move_to_end(1)
+    assert list(indexed_ordered_dict) == [2, 'c', 1]
+    assert indexed_ordered_dict.index(1) == 2
+    del indexed_ordered_dict['c']
+    assert indexed_ordered_dict.index(1) == 1
+    assert indexed_ordered_dict.popitem(last=False) == (2, 'b')
+    assert indexed_ordered_dict.popitem() == (1, 'z')
+    assert not indexed_ordered_dict
+    with cute_testing.RaiseAssertor(KeyError):
+        indexed_ordered_dict.popitem()
+
+
+def test_equality():
+    indexed_ordered_dict = IndexedOrderedDict(((1, 'a'), (2, 'b')))
+    reversed_indexed_ordered_dict = indexed_ordered_dict.reversed
+    assert list(reversed_indexed_ordered_dict) == [2, 1]
+    assert indexed_ordered_dict != reversed_indexed_ordered_dict
+    assert indexed_ordered_dict == indexed_ordered_dict.copy() == \
+                                             OrderedDict(((1, 'a'), (2, 'b')))
+    assert indexed_ordered_dict != collections.OrderedDict(((2, 'b'),
+                                                            (1, 'a')))
+    assert indexed_ordered_dict == {2: 'b', 1: 'a'} == \
+                                                reversed_indexed_ordered_dict
+    assert repr(indexed_ordered_dict) == "IndexedOrderedDict([(1, 'a'), " \
+                                         "(2, 'b')])"
+
+
+def test_sort():
+    indexed_ordered_dict = IndexedOrderedDict(((3+1j, 'a'), (1+2j, 'b'),
+                                               (2+3j, 'c')))
+    indexed_ordered_dict.sort('real')
+    assert list(indexed_ordered_dict) == [1+2j, 2+3j, 3+1j]
+    indexed_ordered_dict.sort(key=indexed_ordered_dict.__getitem__,
+                              reverse=True)
+    assert list(indexed_ordered_dict.values()) == ['c', 'b', 'a']
+    assert indexed_ordered_dict.index(3+1j) == 2
+    indexed_ordered_dict.reorder((3+1j, 1+2j, 2+3j))
+    assert list(indexed_ordered_dict.values()) == ['a', 'b', 'c']
+    assert indexed_ordered_dict.get_key_at(1) == 1+2j
+
+
+def test_big():
+    indexed_ordered_dict = IndexedOrderedDict()
+    for i in range(10 ** 5):
+        indexed_ordered_dict[i] = i
+    for i in range(0, 10 ** 5, 2):
+        del indexed_ordered_dict[i]
+    assert len(indexed_ordered_dict) == 5 * 10 ** 4
+    assert indexed_ordered_dict.index(99999) == 5 * 10 ** 4 - 1
+    assert indexed_ordered_dict.get_key_at(1000) == 2001
@@ -76,4 +76,36 @@ def test_builtin_reversed():
 def test_reversed():
     ordered_dict = OrderedDict(((1, 'a'), (2, 'b'), (3, 'c')))
     assert ordered_dict.reversed == OrderedDict(((3, 'c'), (2, 'b'), (1, 'a')))
-    assert type(ordered_dict.reversed) is type(ordered_dict) is OrderedDict
\ No newline at end of file
+    assert type(ordered_dict.reversed) is type(ordered_dict) is OrderedDict
+
+def test_reorder():
+    '''Test the `OrderedDict.reorder` method.'''
+    ordered_dict = OrderedDict(((1, 'a'), (2, 'b'), (3, 'c'), (4, 'd')))
+    ordered_dict.reorder((1, 2, 4, 3))
+    assert list(ordered_dict.items()) == [(1, 'a'), (2, 'b'), (4, 'd'),
+                                          (3, 'c')]
+    ordered_dict.reorder(iter((3, 4, 2, 1)))
+    assert list(ordered_dict) == [3, 4, 2, 1]
+    ordered_dict.reorder((3, 4, 2, 1))
+    assert list(ordered_dict) == [3, 4, 2, 1]
+    for bad_keys in ((3, 4, 2), (3, 4, 2, 1, 1), (3, 4, 2, 2), (3, 4, 2, 5)):
+        with cute_testing.RaiseAssertor(ValueError):
+            ordered_dict.reorder(bad_keys)
+    assert list(ordered_dict) == [3, 4, 2, 1]
+
+    empty_ordered_dict = OrderedDict()
+    empty_ordered_dict.reorder(())
+    empty_ordered_dict.sort()
+    assert not empty_ordered_dict
+
+
+def test_sort_with_new_keys():
+    '''Test sorting an `OrderedDict` that was sorted before keys were added.'''
+    ordered_dict = OrderedDict((i, str(i)) for i in range(0, 1000, 2))
+    for i in (1001, 5, 999, 1003, -1):
+        ordered_dict[i] = str(i)
+    ordered_dict.sort()
+    assert list(ordered_dict) == sorted(ordered_dict)
+    assert all(ordered_dict[i] == str(i) for i in ordered_dict)
+    ordered_dict.sort(reverse=True)
+    assert list(ordered_dict) == sorted(ordered_dict, reverse=True)
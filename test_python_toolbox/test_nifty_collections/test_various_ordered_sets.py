@@ -2,13 +2,15 @@
 # This program is distributed under the MIT license.
 
 import operator
+import random
 
 from python_toolbox import cute_testing
 
 from python_toolbox import logic_tools
 from python_toolbox import emitting
 from python_toolbox.nifty_collections import (OrderedSet, FrozenOrderedSet,
-                                              EmittingOrderedSet)
+                                              EmittingOrderedSet,
+                                              IndexedOrderedSet)
 
 
 class BaseOrderedSetTestCase(cute_testing.TestCase):
@@ -36,6 +38,27 @@ class BaseMutableOrderedSetTestCase(BaseOrderedSetTestCase):
         assert list(ordered_set) == [2, 5, 7, 61]
         ordered_set.sort(key=lambda x: -x, reverse=True)
         assert list(ordered_set) == [2, 5, 7, 61]
+        for i in (60, 1, 3):
+            ordered_set.add(i)
+        ordered_set.sort()
+        assert list(ordered_set) == [1, 2, 3, 5, 7, 60, 61]
+        ordered_set.sort(reverse=True)
+        assert list(ordered_set) == [61, 60, 7, 5, 3, 2, 1]
+        assert list(reversed(ordered_set)) == [1, 2, 3, 5, 7, 60, 61]
+
+    def test_reorder(self):
+        ordered_set = self.ordered_set_type('abcd')
+        ordered_set.reorder('dbca')
+        assert tuple(ordered_set) == tuple('dbca')
+        assert tuple(reversed(ordered_set)) == tuple('acbd')
+        assert ordered_set.pop() == 'a'
+        assert ordered_set.pop(last=False) == 'd'
+        ordered_set.add('e')
+        assert tuple(ordered_set) == tuple('bce')
+        for bad_keys in ('bc', 'bcee', 'bcf', 'bcbe'):
+            with cute_testing.RaiseAssertor(ValueError):
+                ordered_set.reorder(bad_keys)
+        assert tuple(ordered_set) == tuple('bce')
 
     def test_mutable(self):
 
@@ -137,9 +160,76 @@ class EmittingOrderedSetTestCase(BaseMutableOrderedSetTestCase):
         assert times_emitted == [5]
         assert tuple(emitting_ordered_set) == \
                                              (0, 1, 2, 3, 5, 6, 7, 8, 9, 10, 4)
+        emitting_ordered_set.sort()
+        assert times_emitted == [6]
+        assert tuple(emitting_ordered_set) == tuple(range(11))
+
 
 
 
+class IndexedOrderedSetTestCase(BaseMutableOrderedSetTestCase):
+    __test__ = True
+    ordered_set_type = IndexedOrderedSet
+
+    def test_indexing(self):
+        indexed_ordered_set = self.ordered_set_type('abcdef')
+        assert indexed_ordered_set[0] == 'a'
+        assert indexed_ordered_set[-1] == 'f'
+        assert indexed_ordered_set[1:5:2] == self.ordered_set_type('bd')
+        assert indexed_ordered_set.index('d') == 3
+        indexed_ordered_set.discard('b')
+        indexed_ordered_set.move_to_end('a')
+        indexed_ordered_set.move_to_end('e', last=False)
+        assert tuple(indexed_ordered_set) == tuple('ecdfa')
+        assert [indexed_ordered_set[i] for i in range(5)] == list('ecdfa')
+        assert [indexed_ordered_set.index(item) for item in 'ecdfa'] == \
+                                                                list(range(5))
+        assert repr(indexed_ordered_set) == \
+                       "IndexedOrderedSet(['e', 'c', 'd', 'f', 'a'])"
+        with cute_testing.RaiseAssertor(IndexError):
+            indexed_ordered_set[5]
+        with cute_testing.RaiseAssertor(ValueError):
+            indexed_ordered_set.index('b')
+        with cute_testing.RaiseAssertor(KeyError):
+            indexed_ordered_set.move_to_end('b')
+
+    def test_random_operations(self):
+        random_ = random.Random(0)
+        indexed_ordered_set = self.ordered_set_type()
+        items = []
+        for _ in range(5000):
+            item = random_.randrange(200)
+            operation = random_.randrange(6)
+            if operation == 0:
+                indexed_ordered_set.add(item)
+                if item not in items:
+                    items.append(item)
+            elif operation == 1:
+                indexed_ordered_set.add(item, last=False)
+                if item not in items:
+                    items.insert(0, item)
+            elif operation == 2:
+                indexed_ordered_set.discard(item)
+                if item in items:
+                    items.remove(item)
+            elif operation == 3 and item in items:
+                last = random_.choice((True, False))
+                indexed_ordered_set.move_to_end(item, last=last)
+                items.remove(item)
+                items.insert(len(items) if last else 0, item)
+            elif operation == 4 and items:
+                last = random_.choice((True, False))
+                assert indexed_ordered_set.pop(last=last) == \
+                                                  items.pop(-1 if last else 0)
+            elif operation == 5 and items:
+                i = random_.randrange(len(items))
+                assert indexed_ordered_set[i] == items[i]
+                assert indexed_ordered_set.index(items[i]) == i
+            assert len(indexed_ordered_set) == len(items)
+        assert list(indexed_ordered_set) == items
+        assert list(reversed(indexed_ordered_set)) == items[::-1]
+        assert list(map(indexed_ordered_set.__getitem__,
+                        range(len(items)))) == items
 
 
 def test_operations_on_different_types():
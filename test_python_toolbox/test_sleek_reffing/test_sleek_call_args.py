@@ -10,6 +10,7 @@ from python_toolbox import gc_tools
 from python_toolbox.sleek_reffing import (SleekCallArgs,
                                           SleekRef,
                                           CuteSleekValueDict)
+from python_toolbox.sleek_reffing.cute_sleek_value_dict import KeyedSleekRef
 from .shared import _is_weakreffable, A, counter
 
 
@@ -62,3 +63,39 @@ def test_unhashable():
     gc_tools.collect()
     # Not GCed because all objects in `kwargs` are not weakreffable:
     assert len(sca_dict) == 1
+
+
+def test_equality():
+    '''Test `SleekCallArgs` equality and hashing across ways of calling.'''
+    def g(a, b=2, *args, c=3, **kwargs): pass
+
+    a = A()
+    sca1 = SleekCallArgs({}, g, a, 2, 'x', y=[1, 2], z=3)
+    sca2 = SleekCallArgs({}, g, a, 2, 'x', c=3, z=3, y=[1, 2])
+    sca3 = SleekCallArgs.from_call_args({}, {'c': 3, 'b': 2, 'a': a}, ('x',),
+                                        {'z': 3, 'y': [1, 2]})
+    assert sca1 == sca2 == sca3
+    assert hash(sca1) == hash(sca2) == hash(sca3)
+    assert sca1.args == {'a': a, 'b': 2, 'c': 3}
+    assert sca1.star_args == ('x',)
+    assert sca1.star_kwargs == {'y': [1, 2], 'z': 3}
+
+    assert sca1 != SleekCallArgs({}, g, a, 2, 'x', y=[1, 2], z=4)
+    assert sca1 != SleekCallArgs({}, g, a, 2, y=[1, 2], z=3)
+    assert sca1 != SleekCallArgs({}, g, A(), 2, 'x', y=[1, 2], z=3)
+
+
+def test_custom_attributes():
+    '''Test that custom attributes can be set on `SleekCallArgs` and refs.'''
+    a = A()
+    sleek_call_args = SleekCallArgs({}, f, 1, 2, x=a)
+    sleek_call_args.note = 'x'
+    assert sleek_call_args.note == 'x'
+    weakref.ref(sleek_call_args)
+
+    sleek_ref = SleekRef(a)
+    sleek_ref.note = 'y'
+    assert sleek_ref.note == 'y'
+    keyed_sleek_ref = KeyedSleekRef(a, None, 'key')
+    keyed_sleek_ref.note = 'z'
+    assert keyed_sleek_ref.note == 'z'